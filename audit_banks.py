@@ -0,0 +1,47 @@
+"""
+Аудит банков вопросов: точные и почти-дубликаты (MinHash/LSH).
+
+Запуск:
+    python audit_banks.py                       # все специализации
+    python audit_banks.py oupds prof            # выбранные
+    python audit_banks.py --threshold 0.7 --all # порог сходства, все группы
+Код выхода 1, если найдены дубликаты (для CI).
+"""
+import argparse
+import sys
+
+from config.settings import settings
+from library.bank_audit import audit_banks
+from library.question_loader import BankError, parse_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск дубликатов в банках вопросов")
+    parser.add_argument("specializations", nargs="*", help="По умолчанию все")
+    parser.add_argument("--threshold", type=float, default=settings.bank_audit_threshold)
+    parser.add_argument("--bands", type=int, default=16, help="Полос LSH (делитель 64)")
+    parser.add_argument("--all", action="store_true", help="Показать все группы")
+    args = parser.parse_args()
+    
+    banks = []
+    for spec_id in args.specializations or settings.specializations:
+        try:
+            banks.append(parse_bank(spec_id))
+        except BankError as e:
+            print(f"❌ {spec_id}: {e}")
+    
+    report = audit_banks(banks, args.threshold, args.bands)
+    print(f"🔎 {report.summary()}")
+    print(f"⏱ {report.elapsed:.2f} с, кандидатов LSH проверено: {report.candidates}")
+    
+    groups = report.groups if args.all else report.groups[:20]
+    for group in groups:
+        marker = "🌐" if group.cross_spec else "📄"
+        print(f"{marker} {group.describe(limit=12)}")
+    if len(report.groups) > len(groups):
+        print(f"… ещё {len(report.groups) - len(groups)} групп (--all)")
+    return 1 if report.groups else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
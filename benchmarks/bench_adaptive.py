@@ -0,0 +1,123 @@
+"""
+Адаптивный режим на синтетическом откалиброванном банке.
+
+1. Точность и длина теста: экзаменуемые с θ ~ N(0, 1) проходят обычный тест
+   (случайные вопросы, фиксированная длина) и адаптивный (остановка по
+   adaptive_target_se). Сравниваются средняя длина, стандартная ошибка и
+   RMSE оценки θ (EAP в обоих случаях).
+2. Стоимость выбора вопроса: индекс (корзина + первые непоказанные) против
+   полного обхода банка, для банков разного размера.
+
+Запуск: python -m benchmarks.bench_adaptive [--examinees 1000] [--items 1000]
+"""
+import argparse
+import math
+import random
+import time
+
+from config.settings import settings
+from library.adaptive import AdaptiveIndex, AdaptiveSession, information, probability
+from library.models import Question, question_uid
+from library.question_loader import QuestionBank
+
+
+def synthetic_bank(items: int, seed: int = 7):
+    """Банк из items вопросов и их параметры 2PL: a ~ LogNormal(0, 0.3), b ~ N(0, 1)."""
+    rng = random.Random(seed)
+    questions = []
+    params = {}
+    for i in range(items):
+        question = Question.model_construct(
+            question=f"Синтетический вопрос {i}", options=["А", "Б", "В", "Г"], correct_answers={1}, uid=0
+        )
+        questions.append(question)
+        params[question_uid(question.question, question.options)] = (
+            rng.lognormvariate(0, 0.3), rng.gauss(0, 1)
+        )
+    return QuestionBank("synthetic", tuple(questions), settings.questions_dir), params
+
+
+def run_exam(index: AdaptiveIndex, bank: QuestionBank, theta: float, adaptive: bool, length: int, rng: random.Random):
+    """Один тест: (число вопросов, оценка θ, стандартная ошибка)."""
+    session = AdaptiveSession(
+        index, bank,
+        max_questions=length if not adaptive else settings.difficulty_questions["адаптивный"],
+        min_questions=settings.adaptive_min_questions if adaptive else length,
+        target_se=settings.adaptive_target_se if adaptive else 0.0,
+        randomesque=settings.adaptive_randomesque
+    )
+    if adaptive:
+        session.next_question()
+        while True:
+            k = session.items[-1]
+            correct = rng.random() < probability(index.a[k], index.b[k], theta)
+            if session.answer(correct) is None:
+                break
+    else:
+        for k in rng.sample(range(len(index)), length):
+            session.items.append(k)
+            session.record(k, rng.random() < probability(index.a[k], index.b[k], theta))
+    return len(session.items), session.theta, session.se
+
+
+def compare(index: AdaptiveIndex, bank: QuestionBank, examinees: int):
+    rng = random.Random(1)
+    thetas = [rng.gauss(0, 1) for _ in range(examinees)]
+    
+    def summary(adaptive: bool, length: int):
+        lengths, errors, ses = [], [], []
+        for theta in thetas:
+            n, estimate, se = run_exam(index, bank, theta, adaptive, length, rng)
+            lengths.append(n)
+            errors.append((estimate - theta) ** 2)
+            ses.append(se)
+        return sum(lengths) / examinees, sum(ses) / examinees, math.sqrt(sum(errors) / examinees)
+    
+    cat_len, cat_se, cat_rmse = summary(True, 0)
+    print(f"{'режим':<26}{'вопросов':>10}{'SE':>8}{'RMSE θ':>9}")
+    print(f"{'адаптивный (SE ≤ %.2f)' % settings.adaptive_target_se:<26}{cat_len:>10.1f}{cat_se:>8.3f}{cat_rmse:>9.3f}")
+    for length in (round(cat_len), settings.difficulty_questions["базовый"], settings.difficulty_questions["продвинутый"]):
+        fixed_len, fixed_se, fixed_rmse = summary(False, length)
+        print(f"{'обычный, %d вопросов' % length:<26}{fixed_len:>10.1f}{fixed_se:>8.3f}{fixed_rmse:>9.3f}")
+
+
+def selection_cost(sizes):
+    print(f"\n{'вопросов':>9}{'индекс, с':>11}{'выбор (индекс)':>16}{'выбор (обход)':>15}")
+    rng = random.Random(3)
+    for size in sizes:
+        bank, params = synthetic_bank(size, seed=size)
+        start = time.perf_counter()
+        index = AdaptiveIndex(bank, params)
+        build = time.perf_counter() - start
+        
+        thetas = [rng.uniform(-3, 3) for _ in range(2000)]
+        used = set(rng.sample(range(size), 15))
+        start = time.perf_counter()
+        for theta in thetas:
+            index.select(theta, used, settings.adaptive_randomesque)
+        indexed = (time.perf_counter() - start) / len(thetas)
+        
+        start = time.perf_counter()
+        for theta in thetas[:20]:
+            max(
+                (k for k in range(size) if k not in used),
+                key=lambda k: information(index.a[k], index.b[k], theta)
+            )
+        scan = (time.perf_counter() - start) / 20
+        print(f"{size:>9}{build:>11.2f}{indexed * 1e6:>13.1f} мкс{scan * 1e6:>12.0f} мкс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Адаптивный режим: длина теста и стоимость выбора")
+    parser.add_argument("--examinees", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=1000, help="Вопросов в банке для сравнения режимов")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+    
+    bank, params = synthetic_bank(args.items)
+    compare(AdaptiveIndex(bank, params), bank, args.examinees)
+    selection_cost(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Память и время AntiSpam в зависимости от числа пользователей.
+
+legacy — прежняя схема: defaultdict(list) с пересборкой списка на каждое событие
+и без удаления пользователей; gcra — AntiSpamMiddleware (один TAT на пользователя,
+вытеснение простаивающих). Замер после активной фазы и после минуты простоя
+(один новый запрос).
+
+Запуск: python -m benchmarks.bench_antispam_memory [--users 1000 10000 100000]
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+
+from library.middlewares import AntiSpamMiddleware
+
+
+class LegacyAntiSpam:
+    """Алгоритм прежней версии AntiSpamMiddleware (для сравнения)."""
+
+    def __init__(self, rate_limit: float = 0.5, max_requests: int = 3):
+        self.rate_limit = rate_limit
+        self.max_requests = max_requests
+        self.user_last_time: dict[int, list[float]] = defaultdict(list)
+
+    def allow(self, user_id: int, now: float) -> bool:
+        user_times = self.user_last_time[user_id]
+        user_times[:] = [t for t in user_times if now - t < self.rate_limit]
+        if len(user_times) >= self.max_requests:
+            return False
+        user_times.append(now)
+        return True
+
+
+def run_case(limiter, users: int, events_per_user: int) -> tuple[float, float, float]:
+    """
+    Returns:
+        (нс на событие, КБ после активности, КБ после простоя)
+    """
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    now = 0.0
+    start = time.perf_counter()
+    for i in range(events_per_user):
+        for user_id in range(users):
+            now += 0.0001
+            limiter.allow(user_id, now)
+    elapsed = time.perf_counter() - start
+    active = tracemalloc.get_traced_memory()[0] - base
+
+    # Минута простоя, затем один запрос нового пользователя
+    limiter.allow(users + 1, now + 60)
+    idle = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    return elapsed / (users * events_per_user) * 1e9, active / 1024, idle / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память AntiSpam по числу пользователей")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--events-per-user", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'пользователей':<14}{'схема':<8}{'нс/событие':>12}{'КБ активн.':>12}{'КБ простой':>12}")
+    for users in args.users:
+        for name, limiter in (
+            ("legacy", LegacyAntiSpam()),
+            ("gcra", AntiSpamMiddleware(max_users=max(args.users) * 2)),
+        ):
+            ns, active_kb, idle_kb = run_case(limiter, users, args.events_per_user)
+            print(f"{users:<14}{name:<8}{ns:>12.0f}{active_kb:>12.0f}{idle_kb:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Масштабирование аудита дубликатов (MinHash/LSH) на синтетических банках.
+
+Для каждого размера генерирует банк с ~1% переформулированных копий
+и ~1% точных копий, сообщает время, время на вопрос (должно быть
+примерно постоянным — линейный рост) и долю найденных пар.
+
+Запуск: python -m benchmarks.bench_bank_audit [--sizes 5000 10000 20000 40000]
+"""
+import argparse
+import random
+from pathlib import Path
+
+from library.bank_audit import audit_banks
+from library.models import Question
+from library.question_loader import QuestionBank
+
+
+def make_bank(size: int, rng: random.Random):
+    """Банк случайных вопросов + копии: (банк, число переформулированных пар)."""
+    vocabulary = ["".join(rng.choice("абвгдежзиклмнопрстуфхцчшэюя") for _ in range(rng.randint(3, 10)))
+                  for _ in range(3000)]
+    questions = []
+    for i in range(size):
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 20))) + "?"
+        options = [" ".join(rng.choice(vocabulary) for _ in range(3)) for _ in range(4)]
+        questions.append(Question(question=text, options=options, correct_answers={1}))
+    
+    near = 0
+    for i in range(0, size, 100):
+        source = questions[i]
+        words = source.question.split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)  # одно слово заменено
+        questions.append(Question(question=" ".join(words), options=source.options, correct_answers={1}))
+        questions.append(source.model_copy())  # точная копия
+        near += 1
+    return QuestionBank("synthetic", tuple(questions), Path("synthetic.json")), near
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Масштабирование аудита дубликатов")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 10000, 20000, 40000])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+    
+    rng = random.Random(3)
+    print(f"{'вопросов':>10}{'время, с':>10}{'мкс/вопрос':>12}{'кандидатов':>12}{'точных':>8}{'похожих':>9}{'найдено пар':>13}")
+    for size in args.sizes:
+        bank, near = make_bank(size, rng)
+        report = audit_banks([bank], args.threshold)
+        found = len(report.near_groups)
+        print(
+            f"{report.questions:>10}{report.elapsed:>10.2f}{report.elapsed / report.questions * 1e6:>12.0f}"
+            f"{report.candidates:>12}{len(report.exact_groups):>8}{found:>9}{found / near:>12.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
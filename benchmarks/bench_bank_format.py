@@ -0,0 +1,99 @@
+"""
+JSON против .qbank на синтетическом банке большого размера.
+
+Генерирует банк из --questions вопросов во временной папке, затем замеряет:
+    - загрузку банка: разбор JSON + pydantic против открытия .qbank (mmap);
+    - выбор вопросов на один тест (load_questions_for_specialization);
+    - прирост RSS процесса после загрузки.
+
+Запуск: python -m benchmarks.bench_bank_format [--questions 20000] [--exams 200]
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from config.settings import settings
+from library import question_loader
+from library.enum import Difficulty
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса (Linux, /proc/self/statm)."""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * 4096 / 1024 / 1024
+
+
+def make_bank(path: Path, count: int):
+    """Синтетический банк: 3-6 вариантов, 1-3 правильных ответа."""
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        n = rng.randint(3, 6)
+        correct = sorted(rng.sample(range(1, n + 1), rng.randint(1, min(3, n))))
+        items.append({
+            "question": f"Вопрос {i}: " + "текст формулировки вопроса " * rng.randint(2, 8),
+            "options": [f"Вариант {j} к вопросу {i}" for j in range(1, n + 1)],
+            "correct_answers": ",".join(map(str, correct))
+        })
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+
+def bench_exams(exams: int) -> float:
+    """Медиана выбора вопросов на один тест, мкс."""
+    samples = []
+    for _ in range(exams):
+        start = time.perf_counter()
+        question_loader.load_questions_for_specialization("bench", Difficulty.ADVANCED)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON против скомпилированного банка")
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--exams", type=int, default=200)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix="bank_format_") as tmp:
+        settings.questions_dir = Path(tmp)
+        settings.compiled_banks_dir = Path(tmp) / "banks"
+        json_path = settings.questions_dir / "bench.json"
+        make_bank(json_path, args.questions)
+        
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        bank = question_loader.parse_json_bank("bench")
+        json_ms = (time.perf_counter() - start) * 1000
+        json_rss = rss_mb() - rss_before
+        question_loader._banks["bench"] = bank
+        json_exam_us = bench_exams(args.exams)
+        
+        start = time.perf_counter()
+        question_loader.compile_bank("bench")
+        compile_ms = (time.perf_counter() - start) * 1000
+        qbank_path = question_loader.compiled_bank_path("bench")
+        del bank
+        question_loader._banks.clear()
+        
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        bank = question_loader.parse_bank("bench")
+        qbank_ms = (time.perf_counter() - start) * 1000
+        qbank_rss = rss_mb() - rss_before
+        question_loader._banks["bench"] = bank
+        qbank_exam_us = bench_exams(args.exams)
+        
+        print(f"Банк: {args.questions} вопросов, JSON {json_path.stat().st_size / 1024:.0f} КБ, "
+              f".qbank {qbank_path.stat().st_size / 1024:.0f} КБ (компиляция {compile_ms:.0f} мс)")
+        print(f"{'':<10}{'загрузка, мс':>14}{'RSS, МБ':>10}{'тест, мкс':>12}")
+        print(f"{'JSON':<10}{json_ms:>14.1f}{json_rss:>10.1f}{json_exam_us:>12.0f}")
+        print(f"{'.qbank':<10}{qbank_ms:>14.1f}{qbank_rss:>10.1f}{qbank_exam_us:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Бенчмарк маршрутизации callback_query: цепочки F.data-фильтров в 11 роутерах
+против однократного разбора CallbackData и таблицы маршрутов.
+
+Запуск: python -m benchmarks.bench_callback_dispatch [--iterations N]
+"""
+import argparse
+import asyncio
+import time
+
+from aiogram import Dispatcher, Router, F
+from aiogram.filters import StateFilter
+from aiogram.types import CallbackQuery, User
+
+from library.callbacks import (
+    CallbackDispatcher,
+    SpecCallback,
+    DifficultyCallback,
+    AnswerCallback,
+    MenuCallback,
+    MenuAction
+)
+from library.middlewares import CallbackDispatchMiddleware
+from library.states import TestStates
+
+SPECS = [
+    "oupds", "ispolniteli", "aliment", "doznanie", "rozyisk",
+    "prof", "oko", "informatika", "kadry", "bezopasnost", "upravlenie"
+]
+
+ANSWERING = TestStates.answering_question.state
+DIFFICULTY = TestStates.waiting_difficulty.state
+
+# (название, legacy callback_data, новый callback_data, состояние FSM)
+CASES = [
+    ("answer_toggle", "ans_3", AnswerCallback(num=3).pack(), ANSWERING),
+    ("next_question", "next", MenuCallback(action=MenuAction.NEXT).pack(), ANSWERING),
+    ("select_difficulty", "diff_базовый", DifficultyCallback(level="базовый").pack(), DIFFICULTY),
+    ("spec_first", "spec_oupds", SpecCallback(spec="oupds").pack(), None),
+    ("spec_last", "spec_upravlenie", SpecCallback(spec="upravlenie").pack(), None),
+    ("help", "help", MenuCallback(action=MenuAction.HELP).pack(), None),
+]
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+def build_legacy_dispatcher() -> Dispatcher:
+    """Dispatcher со старой схемой: 11 роутеров с одинаковыми F.data-фильтрами."""
+    dp = Dispatcher()
+    for spec in SPECS:
+        router = Router(name=spec)
+        router.callback_query.register(_noop, F.data == f"spec_{spec}")
+        router.callback_query.register(_noop, F.data.startswith("diff_"), StateFilter(TestStates.waiting_difficulty))
+        router.callback_query.register(_noop, F.data.startswith("ans_"), StateFilter(TestStates.answering_question))
+        router.callback_query.register(_noop, F.data == "next", StateFilter(TestStates.answering_question))
+        for action in ("show_answers", "generate_cert", "repeat_test", "my_stats", "main_menu", "help"):
+            router.callback_query.register(_noop, F.data == action)
+        dp.include_router(router)
+    return dp
+
+
+def build_dispatch_table_dispatcher() -> Dispatcher:
+    """Dispatcher с CallbackDispatchMiddleware и таблицей маршрутов."""
+    table = CallbackDispatcher(name="bench_dispatch")
+    for spec in SPECS:
+        table.route(SpecCallback(spec=spec))(_noop)
+    table.route(DifficultyCallback, state=TestStates.waiting_difficulty)(_noop)
+    table.route(AnswerCallback, state=TestStates.answering_question)(_noop)
+    table.route(MenuCallback(action=MenuAction.NEXT), state=TestStates.answering_question)(_noop)
+    for action in MenuAction:
+        if action is not MenuAction.NEXT:
+            table.route(MenuCallback(action=action))(_noop)
+    
+    dp = Dispatcher()
+    dp.callback_query.outer_middleware(CallbackDispatchMiddleware(table))
+    dp.include_router(table.router)
+    return dp
+
+
+def make_callback(data: str) -> CallbackQuery:
+    """Минимальный CallbackQuery без обращения к Bot API."""
+    return CallbackQuery(
+        id="1",
+        from_user=User(id=1, is_bot=False, first_name="Bench"),
+        chat_instance="1",
+        data=data
+    )
+
+
+async def measure(dp: Dispatcher, event: CallbackQuery, raw_state: str | None, iterations: int) -> float:
+    """Среднее время маршрутизации одного update в микросекундах."""
+    for _ in range(100):
+        await dp.propagate_event("callback_query", event, raw_state=raw_state)
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await dp.propagate_event("callback_query", event, raw_state=raw_state)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int) -> dict[str, tuple[float, float]]:
+    """Прогон всех сценариев: {case: (legacy_us, table_us)}."""
+    legacy = build_legacy_dispatcher()
+    table = build_dispatch_table_dispatcher()
+    results = {}
+    for name, legacy_data, table_data, raw_state in CASES:
+        legacy_us = await measure(legacy, make_callback(legacy_data), raw_state, iterations)
+        table_us = await measure(table, make_callback(table_data), raw_state, iterations)
+        results[name] = (legacy_us, table_us)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args.iterations))
+    
+    print(f"{'Сценарий':<20}{'F.data, мкс':>14}{'таблица, мкс':>16}{'ускорение':>12}")
+    for name, (legacy_us, table_us) in results.items():
+        print(f"{name:<20}{legacy_us:>14.2f}{table_us:>16.2f}{legacy_us / table_us:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
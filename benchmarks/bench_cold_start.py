@@ -0,0 +1,174 @@
+"""
+Холодный старт: время импорта точки входа и профиль -X importtime.
+
+Каждый прогон — новый интерпретатор (`python -c "import test_bot_main"`), профиль
+снимается отдельным прогоном с -X importtime (он сам замедляет импорт).
+Отчёт: медиана времени старта, самые тяжёлые модули (кумулятивно) и собственное
+время модулей проекта (медиана --profile-runs прогонов). Проверки (код 1 при нарушении):
+    - тяжёлые зависимости (reportlab, aiohttp.web) не загружаются при импорте;
+    - с --compare: старт и собственное время проекта медленнее baseline
+      не больше чем на --threshold процентов (как в microbench);
+    - с --target-ms / --own-target-ms: абсолютные пороги. Время старта зависит
+      от машины и её загрузки (разброс между прогонами — до 10%), поэтому по
+      умолчанию абсолютные пороги не проверяются: регрессии ищутся по baseline,
+      снятому на той же машине.
+
+Запуск:
+    python -m benchmarks.bench_cold_start --output cold_start.json     # сохранить baseline
+    python -m benchmarks.bench_cold_start --compare cold_start.json    # сравнить (код 1 при регрессии)
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+PROJECT_PACKAGES = ("test_bot_main", "library", "config", "specializations")
+# Должны загружаться только по требованию
+LAZY_MODULES = ("reportlab", "aiohttp.web", "aiogram.webhook", "aiosqlite", "numpy")
+
+CHECK_LAZY = (
+    "import sys, test_bot_main; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("API_TOKEN", "123456:cold-start")
+    env.setdefault("ENVIRONMENT", "development")
+    return env
+
+
+def run_once(importtime: bool = False) -> Tuple[float, str]:
+    """Один холодный старт: (секунды, вывод importtime)."""
+    flags = ["-X", "importtime"] if importtime else []
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", "import test_bot_main"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - start, result.stderr
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Строки importtime → (модуль, собственное мкс, кумулятивное мкс)."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def is_project_module(name: str) -> bool:
+    return name.split(".")[0] in PROJECT_PACKAGES
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Сравнение с baseline.
+    
+    Returns:
+        Описания показателей с замедлением больше threshold процентов
+    """
+    regressions = []
+    print(f"\n{'показатель':<24}{'baseline, мс':>14}{'сейчас, мс':>14}{'изменение':>12}")
+    for name, current in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<24}{'—':>14}{current:>14.1f}{'новый':>12}")
+            continue
+        change = (current / base - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(f"{name} {change:+.0f}%")
+            flag = "  ❌ регрессия"
+        elif change < -threshold:
+            flag = "  ✅ ускорение"
+        print(f"{name:<24}{base:>14.1f}{current:>14.1f}{change:>+11.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодный старт и профиль импорта")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile-runs", type=int, default=3, help="Прогонов с -X importtime")
+    parser.add_argument("--top", type=int, default=15, help="Сколько модулей показать")
+    parser.add_argument("--output", type=Path, help="Сохранить результаты как JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Сравнить с JSON baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Порог регрессии, %%")
+    parser.add_argument("--target-ms", type=float, help="Абсолютный порог медианы старта")
+    parser.add_argument("--own-target-ms", type=float, help="Абсолютный порог собственного времени проекта")
+    args = parser.parse_args()
+    
+    timings = [run_once()[0] * 1000 for _ in range(args.runs)]
+    
+    profiles = [parse_importtime(run_once(importtime=True)[1]) for _ in range(args.profile_runs)]
+    own_ms = statistics.median(
+        sum(row[1] for row in rows if is_project_module(row[0])) / 1000 for rows in profiles
+    )
+    rows = profiles[0]
+    print(f"{'модуль':<48}{'собств., мс':>12}{'кумул., мс':>12}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{name:<48}{self_us / 1000:>12.1f}{cumulative_us / 1000:>12.1f}")
+    
+    print(f"\n{'модуль проекта':<48}{'собств., мс':>12}")
+    own = [row for row in rows if is_project_module(row[0])]
+    for name, self_us, _ in sorted(own, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{name:<48}{self_us / 1000:>12.1f}")
+    
+    loaded = subprocess.run(
+        [sys.executable, "-c", CHECK_LAZY],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    ).stdout.strip()
+    
+    median = statistics.median(timings)
+    print(
+        f"\nХолодный старт: медиана {median:.0f} мс "
+        f"(мин {min(timings):.0f}, макс {max(timings):.0f}, прогонов {args.runs})"
+    )
+    print(f"Собственное время модулей проекта: {own_ms:.1f} мс (медиана {args.profile_runs} прогонов)")
+    results = {"start_ms": median, "own_ms": own_ms}
+    
+    if args.output:
+        payload = {
+            "meta": {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform()
+            },
+            "results": results
+        }
+        args.output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 Baseline сохранён: {args.output}")
+    
+    failures = []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            failures.append(f"регрессии (> {args.threshold:.0f}%): {', '.join(regressions)}")
+    if args.target_ms is not None and median > args.target_ms:
+        failures.append(f"старт {median:.0f} мс > {args.target_ms:.0f} мс")
+    if args.own_target_ms is not None and own_ms > args.own_target_ms:
+        failures.append(f"модули проекта {own_ms:.1f} мс > {args.own_target_ms:.0f} мс")
+    if loaded:
+        failures.append(f"загружены при импорте: {loaded}")
+    
+    if failures:
+        print("❌ " + "; ".join(failures))
+        sys.exit(1)
+    print("✅ Цели холодного старта выполнены")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Показанные вопросы (library.exposure): повторы между попытками и стоимость.
+
+1. Повторы: пользователь проходит тест подряд --attempts раз. Сравниваются
+   прежняя выборка (seed = user_id — каждый раз те же вопросы), случайная без
+   истории и выборка с картой показанных: доля вопросов, уже встречавшихся
+   пользователю, и сколько разных вопросов банка он увидел.
+2. Стоимость выбора вопросов на тест при разном заполнении карты.
+3. Пакетная запись: --users изменённых карт одним flush во временную БД.
+
+Запуск: python -m benchmarks.bench_exposure [--bank 300] [--test 30] [--users 10000]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from library.exposure import ExposureStore, SeenQuestions
+from library.stats import StatsManager
+
+
+def repeats(bank: int, test: int, attempts: int, users: int = 200):
+    def seeded(user_id):
+        return lambda: random.Random(user_id).sample(range(bank), test)
+    
+    def unseeded(user_id):
+        rng = random.Random(user_id)
+        return lambda: rng.sample(range(bank), test)
+    
+    def exposure(user_id):
+        rng = random.Random(user_id)
+        seen = SeenQuestions((user_id, "bench"), bank)
+        return lambda: seen.sample(test, rng)
+    
+    print(f"Банк {bank} вопросов, тест {test}, попыток подряд {attempts} ({users} пользователей)")
+    print(f"{'выборка':<22}{'повторов':>10}{'разных вопросов':>17}")
+    for name, factory in (("seed = user_id", seeded), ("случайная", unseeded), ("карта показанных", exposure)):
+        repeated = shown = distinct = 0
+        for user_id in range(1, users + 1):
+            draw = factory(user_id)
+            history = set()
+            for _ in range(attempts):
+                picks = draw()
+                repeated += sum(p in history for p in picks)
+                shown += len(picks)
+                history.update(picks)
+            distinct += len(history)
+        print(f"{name:<22}{repeated / shown:>9.0%}{distinct / users:>17.0f}")
+
+
+def sample_cost(sizes, test: int):
+    print(f"\n{'вопросов':>9}{'заполнение':>12}{'выбор теста':>14}")
+    rng = random.Random(5)
+    for size in sizes:
+        for share in (0.0, 0.5, 0.9):
+            seen = SeenQuestions((0, "bench"), size)
+            for position in rng.sample(range(size), int(size * share)):
+                seen.mark(position)
+            bits, count = bytes(seen.bits), seen.seen
+            runs = 200
+            elapsed = 0.0
+            for _ in range(runs):
+                seen.bits[:], seen.seen = bits, count
+                start = time.perf_counter()
+                seen.sample(test, rng)
+                elapsed += time.perf_counter() - start
+            print(f"{size:>9}{share:>11.0%}{elapsed / runs * 1e6:>11.1f} мкс")
+
+
+async def flush_cost(users: int, bank: int, test: int):
+    stats = StatsManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        stats.db_path = Path(tmp) / "stats.db"
+        await stats.init_db()
+        store = ExposureStore(stats.connect, cache_size=users)
+        for user_id in range(users):
+            entry = await store.get(user_id, "bench", bank)
+            entry.sample(test)
+            store.touch(entry)
+        start = time.perf_counter()
+        written = await store.flush()
+        elapsed = time.perf_counter() - start
+    print(
+        f"\nflush: {written} карт по {(bank + 7) // 8} байт за {elapsed * 1000:.0f} мс "
+        f"({elapsed / written * 1e6:.1f} мкс на карту)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Показанные вопросы: повторы и стоимость")
+    parser.add_argument("--bank", type=int, default=300, help="Вопросов в банке")
+    parser.add_argument("--test", type=int, default=30, help="Вопросов в тесте")
+    parser.add_argument("--attempts", type=int, default=10)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[300, 10_000, 100_000])
+    parser.add_argument("--users", type=int, default=10_000, help="Карт в пакетной записи")
+    args = parser.parse_args()
+    
+    repeats(args.bank, args.test, args.attempts)
+    sample_cost(args.sizes, args.test)
+    asyncio.run(flush_cost(args.users, args.bank, args.test))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Пропускная способность импорта CSV/XLSX на синтетической таблице.
+
+Генерирует таблицу из --rows строк (~2% некорректных, ~2% дубликатов) в CSV
+и XLSX, импортирует каждую во временную папку банков и сообщает строки/с,
+прирост пикового RSS на этапе импорта и время сборки .qbank.
+
+Запуск: python -m benchmarks.bench_import [--rows 100000]
+"""
+import argparse
+import csv
+import random
+import resource
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from config.settings import settings
+from library.bank_import import import_bank
+from library.question_loader import compile_bank
+
+HEADER = ["Вопрос", "Вариант 1", "Вариант 2", "Вариант 3", "Вариант 4", "Вариант 5", "Вариант 6", "Правильные"]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_rows(count: int):
+    """Строки таблицы: каждая 50-я некорректна, каждая 50-я (со сдвигом) — дубликат предыдущей."""
+    rng = random.Random(7)
+    yield HEADER
+    previous = HEADER
+    for i in range(count):
+        if i % 50 == 25:
+            yield previous
+            continue
+        n = rng.randint(3, 6)
+        options = [f"Вариант {j} к вопросу {i}" for j in range(1, n + 1)]
+        correct = ",".join(map(str, sorted(rng.sample(range(1, n + 1), rng.randint(1, 2)))))
+        if i % 50 == 0:
+            correct = str(n + 1)  # номер вне диапазона
+        previous = [f"Вопрос {i}: текст формулировки вопроса"] + options + [""] * (6 - n) + [correct]
+        yield previous
+
+
+def write_csv(path: Path, count: int):
+    with path.open("w", encoding="utf-8", newline="") as f:
+        csv.writer(f, delimiter=";").writerows(make_rows(count))
+
+
+def write_xlsx(path: Path, count: int):
+    """Минимальная книга XLSX с inline-строками (потоковая запись листа)."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ))
+        with book.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8"?><worksheet '
+                    b'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            for number, row in enumerate(make_rows(count), start=1):
+                cells = "".join(
+                    f'<c t="inlineStr"><is><t>{escape(value)}</t></is></c>' for value in row
+                )
+                f.write(f'<row r="{number}">{cells}</row>'.encode("utf-8"))
+            f.write(b"</sheetData></worksheet>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность импорта CSV/XLSX")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix="bench_import_") as tmp:
+        tmp = Path(tmp)
+        settings.questions_dir = tmp
+        settings.compiled_banks_dir = tmp / "banks"
+        
+        print(f"{'формат':<8}{'файл, МБ':>10}{'строк/с':>12}{'принято':>10}{'дубл.':>8}{'откл.':>8}{'ΔRSS пик, МБ':>15}")
+        for name, writer in (("csv", write_csv), ("xlsx", write_xlsx)):
+            source = tmp / f"bank.{name}"
+            writer(source, args.rows)
+            rss_before = peak_rss_mb()
+            report = import_bank(source, "oupds")
+            print(
+                f"{name:<8}{source.stat().st_size / 1024 / 1024:>10.1f}{report.rows_per_second:>12,.0f}"
+                f"{report.imported:>10}{report.duplicates:>8}{report.rejected:>8}"
+                f"{peak_rss_mb() - rss_before:>15.1f}"
+            )
+        
+        start = time.perf_counter()
+        bank = compile_bank("oupds")
+        print(f"\nСборка .qbank: {len(bank)} вопросов за {time.perf_counter() - start:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
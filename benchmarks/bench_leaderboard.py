@@ -0,0 +1,175 @@
+"""
+Рейтинги (library.leaderboard): GROUP BY по test_results против рейтингов в памяти.
+
+1. Временная БД статистики: --results результатов --users сотрудников
+   (--departments подразделений) по всем специализациям и уровням.
+2. Запрос /top (топ-10 сотрудников + место пользователя) для одного рейтинга:
+   два GROUP BY по test_results против Ranking.top / Ranking.rank.
+3. Загрузка рейтингов при старте (первый запуск — пересчёт по test_results,
+   дальше — из leaderboard_entries), учёт одного результата (record) и запись
+   изменённых записей (snapshot).
+4. Проверка: топ и места совпадают с GROUP BY.
+
+Запуск: python -m benchmarks.bench_leaderboard [--results 300000] [--users 20000]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from config.settings import settings
+from library.enum import Difficulty
+from library.leaderboard import ALL_TIME, LeaderboardStore, score_bucket
+from library.models import CurrentTestState
+from library.stats import StatsManager
+
+LEVELS = [d.value for d in Difficulty if d not in (Difficulty.ADAPTIVE, Difficulty.TRAINING)]
+
+TOP_SQL = """
+    SELECT user_id, MAX(percentage) AS best FROM test_results
+    WHERE specialization = ? AND difficulty = ?
+    GROUP BY user_id ORDER BY best DESC LIMIT ?
+"""
+RANK_SQL = """
+    SELECT COUNT(*) + 1 FROM (
+        SELECT MAX(percentage) AS best FROM test_results
+        WHERE specialization = ? AND difficulty = ?
+        GROUP BY user_id
+    ) WHERE best >= (
+        SELECT MAX(percentage) FROM test_results
+        WHERE specialization = ? AND difficulty = ? AND user_id = ?
+    ) + 0.05
+"""
+
+
+async def populate(stats: StatsManager, results: int, users: int, departments: int):
+    rng = random.Random(3)
+    specializations = settings.specializations
+    rows = []
+    for _ in range(results):
+        user_id = rng.randrange(users)
+        total = 30
+        correct = min(total, max(0, round(rng.gauss(22, 4))))
+        rows.append((
+            user_id, f"Сотрудник {user_id}", "инспектор", f"ОСП №{user_id % departments}",
+            specializations[user_id % len(specializations)], rng.choice(LEVELS), "-",
+            correct, total, correct / total * 100, "10:00"
+        ))
+    async with stats.connect() as db:
+        await db.executemany("""
+            INSERT INTO test_results (
+                user_id, full_name, position, department, specialization, difficulty, grade,
+                correct_count, total_questions, percentage, elapsed_time
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await db.commit()
+
+
+def timed(runs, call):
+    start = time.perf_counter()
+    for _ in range(runs):
+        call()
+    return (time.perf_counter() - start) / runs
+
+
+async def atimed(runs, call):
+    start = time.perf_counter()
+    for _ in range(runs):
+        await call()
+    return (time.perf_counter() - start) / runs
+
+
+async def run(args):
+    settings.workers = 1
+    stats = StatsManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        stats.db_path = Path(tmp) / "stats.db"
+        await stats.init_db()
+        await populate(stats, args.results, args.users, args.departments)
+        print(f"test_results: {args.results} результатов, {args.users} сотрудников, {args.departments} подразделений")
+        
+        store = LeaderboardStore(stats.connect)
+        start = time.perf_counter()
+        entries = await store.load()
+        load = time.perf_counter() - start
+        print(f"Загрузка (пересчёт по test_results): {entries} записей, {len(store.boards)} рейтингов за {load * 1000:.0f} мс")
+        
+        specialization, difficulty = settings.specializations[0], LEVELS[1]
+        board = store.board(specialization, difficulty, ALL_TIME)
+        user_id = next(iter(board.entries))
+        
+        async with stats.connect() as db:
+            async def group_by():
+                cursor = await db.execute(TOP_SQL, (specialization, difficulty, args.top))
+                await cursor.fetchall()
+                cursor = await db.execute(RANK_SQL, (specialization, difficulty) * 2 + (user_id,))
+                await cursor.fetchone()
+            
+            sql = await atimed(args.runs, group_by)
+            
+            cursor = await db.execute(TOP_SQL, (specialization, difficulty, len(board.entries)))
+            expected = await cursor.fetchall()
+        
+        memory = timed(args.runs, lambda: (board.people.top(args.top), board.people.rank(user_id)))
+        print(
+            f"\n/top ({len(board.entries)} сотрудников в рейтинге): GROUP BY {sql * 1000:.2f} мс, "
+            f"в памяти {memory * 1e6:.1f} мкс ({sql / memory:.0f}×)"
+        )
+        
+        # Топ по корзинам баллов совпадает с GROUP BY
+        best = {uid: score for uid, score in expected}
+        ranks_ok = all(
+            board.people.rank(uid) == 1 + sum(score_bucket(s) > score_bucket(score) for s in best.values())
+            for uid, score in expected[:200]
+        )
+        top_ok = [score_bucket(best[key]) for _, key in board.people.top(args.top)] == [
+            score_bucket(score) for _, score in expected[:args.top]
+        ]
+        print(f"{'✅' if ranks_ok and top_ok else '❌'} Места и топ совпадают с GROUP BY")
+        
+        rng = random.Random(7)
+        states = []
+        for _ in range(args.records):
+            state = CurrentTestState(
+                specialization=rng.choice(settings.specializations),
+                difficulty=Difficulty(rng.choice(LEVELS)),
+                full_name="Сотрудник", position="инспектор",
+                department=f"ОСП №{rng.randrange(args.departments)}", questions=[]
+            )
+            state.percentage = rng.randrange(31) / 30 * 100
+            states.append((rng.randrange(args.users), state))
+        await store.snapshot()
+        start = time.perf_counter()
+        await store.load()
+        print(f"Загрузка из leaderboard_entries: {(time.perf_counter() - start) * 1000:.0f} мс")
+        start = time.perf_counter()
+        for uid, state in states:
+            store.record(uid, state)
+        record = (time.perf_counter() - start) / len(states)
+        start = time.perf_counter()
+        written = await store.snapshot()
+        snapshot = time.perf_counter() - start
+        print(
+            f"\nrecord: {record * 1e6:.1f} мкс на результат; "
+            f"snapshot: {written} записей за {snapshot * 1000:.0f} мс"
+        )
+        return 0 if ranks_ok and top_ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Рейтинги: GROUP BY против рейтингов в памяти")
+    parser.add_argument("--results", type=int, default=300_000, help="Результатов в test_results")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--departments", type=int, default=300)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20, help="Повторов запроса /top")
+    parser.add_argument("--records", type=int, default=10_000, help="Результатов для замера record")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Взвешенный выбор вопросов (library.sampling): проверка распределения и скорость.
+
+1. Статистическая проверка (χ² согласия, уровень значимости --alpha):
+   - draw(): частоты позиций против w_i / Σw;
+   - то же после инкрементального update() части весов;
+   - sample() с исключёнными позициями: частоты первой выбранной позиции
+     против весов допустимых позиций.
+2. Скорость выбора вопросов на тест: WeightedSampler.sample против
+   random.choices (с пересчётом накопленных весов на каждый тест и с заранее
+   посчитанными cum_weights), для банков разного размера.
+3. Обновление весов: один вес / 5% весов против полной перестройки.
+
+Код выхода 1, если хотя бы одна проверка распределения не прошла.
+
+Запуск: python -m benchmarks.bench_sampling [--draws 1000000] [--items 1000]
+"""
+import argparse
+import itertools
+import math
+import random
+import sys
+import time
+from statistics import NormalDist
+
+from library.sampling import WeightedSampler
+
+
+def chi2_critical(df: int, alpha: float) -> float:
+    """Критическое значение χ² (приближение Уилсона–Хилферти)."""
+    z = NormalDist().inv_cdf(1 - alpha)
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+
+def chi2_check(name: str, counts, weights, alpha: float) -> bool:
+    """χ² согласия наблюдаемых частот с весами (позиции с нулевым весом не должны встречаться)."""
+    total = sum(counts)
+    mass = math.fsum(weights)
+    statistic = 0.0
+    df = -1
+    impossible = 0
+    for observed, weight in zip(counts, weights):
+        if weight <= 0:
+            impossible += observed
+            continue
+        expected = total * weight / mass
+        statistic += (observed - expected) ** 2 / expected
+        df += 1
+    critical = chi2_critical(df, alpha)
+    passed = statistic <= critical and not impossible
+    print(
+        f"{'✅' if passed else '❌'} {name:<38} χ² = {statistic:>9.1f}  "
+        f"(df {df}, критическое {critical:.1f}){f', недопустимых {impossible}' if impossible else ''}"
+    )
+    return passed
+
+
+def distribution(items: int, draws: int, alpha: float) -> bool:
+    rng = random.Random(11)
+    weights = [rng.lognormvariate(0, 1) for _ in range(items)]
+    for i in rng.sample(range(items), items // 20):
+        weights[i] = 0.0
+    sampler = WeightedSampler(weights, block=64)
+    
+    counts = [0] * items
+    for _ in range(draws):
+        counts[sampler.draw(rng)] += 1
+    passed = chi2_check("draw()", counts, weights, alpha)
+    
+    changes = {i: rng.lognormvariate(1, 1) for i in rng.sample(range(items), items // 20)}
+    sampler.update(changes)
+    for i, weight in changes.items():
+        weights[i] = weight
+    counts = [0] * items
+    for _ in range(draws):
+        counts[sampler.draw(rng)] += 1
+    passed &= chi2_check(f"draw() после update() {len(changes)} весов", counts, weights, alpha)
+    
+    excluded = set(rng.sample(range(items), items // 2))
+    allowed = [0.0 if i in excluded else w for i, w in enumerate(weights)]
+    counts = [0] * items
+    for _ in range(draws // 10):
+        counts[sampler.sample(5, rng, excluded=excluded.__contains__)[0]] += 1
+    passed &= chi2_check("sample() с исключёнными, первая", counts, allowed, alpha)
+    return passed
+
+
+def speed(sizes, test: int):
+    print(f"\n{'вопросов':>9}{'alias':>12}{'choices':>14}{'cum_weights':>14}")
+    rng = random.Random(13)
+    for size in sizes:
+        weights = [rng.lognormvariate(0, 1) for _ in range(size)]
+        sampler = WeightedSampler(weights)
+        population = range(size)
+        cum_weights = list(itertools.accumulate(weights))
+        
+        def timed(pick, runs):
+            start = time.perf_counter()
+            for _ in range(runs):
+                pick()
+            return (time.perf_counter() - start) / runs * 1e6
+        
+        def naive(cum=None):
+            picks = set()
+            while len(picks) < test:
+                if cum is None:
+                    picks.add(rng.choices(population, weights)[0])
+                else:
+                    picks.add(rng.choices(population, cum_weights=cum)[0])
+            return picks
+        
+        alias = timed(lambda: sampler.sample(test, rng), 2000)
+        choices = timed(naive, max(2, 200_000 // size))
+        cumulative = timed(lambda: naive(cum_weights), 2000)
+        print(f"{size:>9}{alias:>8.1f} мкс{choices:>10.0f} мкс{cumulative:>10.1f} мкс")
+
+
+def updates(size: int):
+    rng = random.Random(17)
+    weights = [rng.lognormvariate(0, 1) for _ in range(size)]
+    sampler = WeightedSampler(weights)
+    
+    start = time.perf_counter()
+    WeightedSampler(weights)
+    full = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    runs = 200
+    for _ in range(runs):
+        sampler.update({rng.randrange(size): rng.lognormvariate(0, 1)})
+    single = (time.perf_counter() - start) / runs
+    
+    changes = {i: rng.lognormvariate(0, 1) for i in rng.sample(range(size), size // 20)}
+    start = time.perf_counter()
+    blocks = sampler.update(changes)
+    bulk = time.perf_counter() - start
+    print(
+        f"\nОбновление весов, {size} вопросов: полная перестройка {full * 1000:.1f} мс, "
+        f"один вес {single * 1000:.2f} мс, 5% весов {bulk * 1000:.1f} мс "
+        f"({blocks} из {len(sampler.blocks)} блоков)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Взвешенный выбор: таблицы псевдонимов против random.choices")
+    parser.add_argument("--items", type=int, default=1000, help="Вопросов в статистической проверке")
+    parser.add_argument("--draws", type=int, default=1_000_000)
+    parser.add_argument("--alpha", type=float, default=0.001)
+    parser.add_argument("--test", type=int, default=30, help="Вопросов в тесте")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    
+    passed = distribution(args.items, args.draws, args.alpha)
+    speed(args.sizes, args.test)
+    updates(max(args.sizes))
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Пропускная способность многопроцессного режима: 1/2/4/8 worker'ов.
+
+Updates (/start и «Помощь» от разных пользователей) раздаются через
+WorkerPool.dispatch с шардированием по user_id; worker'ы отвечают в фейковый
+Bot API на localhost. Пропускная способность = updates / время до последнего ответа.
+
+Запуск: python -m benchmarks.bench_sharded_workers [--updates N] [--workers 1 2 4 8]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fake_bot_api import (
+    FakeBotAPI,
+    FAKE_TOKEN,
+    make_message_update,
+    make_callback_update
+)
+
+# Полностью офлайн: фейковый токен и development-окружение до импорта settings
+os.environ.setdefault("API_TOKEN", FAKE_TOKEN)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from library.callbacks import MenuCallback, MenuAction
+from library.sharding import WorkerPool
+from test_bot_main import create_bot, create_dispatcher
+
+RESPONSE_METHODS = {"sendMessage", "editMessageText"}
+
+
+def make_updates(count: int, users: int) -> list[dict]:
+    """Поровну /start и нажатий «Помощь» от `users` пользователей."""
+    help_data = MenuCallback(action=MenuAction.HELP).pack()
+    updates = []
+    for i in range(count):
+        user_id = 200000 + i % users
+        if i % 2:
+            updates.append(make_callback_update(user_id, help_data, update_id=i + 1))
+        else:
+            updates.append(make_message_update(user_id, "/start", update_id=i + 1))
+    return updates
+
+
+async def measure(api: FakeBotAPI, workers: int, updates: list[dict]) -> tuple[float, list[int]]:
+    """Время обработки всех updates пулом из `workers` процессов."""
+    done = asyncio.Event()
+    responses = 0
+
+    def on_call(method, params):
+        nonlocal responses
+        if method in RESPONSE_METHODS:
+            responses += 1
+            if responses >= len(updates):
+                done.set()
+
+    api.listeners[:] = [on_call]
+    pool = WorkerPool(workers, create_dispatcher, create_bot)
+    pool.start()
+    await pool.wait_ready()
+
+    start = time.perf_counter()
+    for update in updates:
+        pool.dispatch(update)
+    await asyncio.wait_for(done.wait(), timeout=300)
+    elapsed = time.perf_counter() - start
+
+    await asyncio.get_running_loop().run_in_executor(None, pool.stop)
+    return elapsed, pool.dispatched
+
+
+async def run(args):
+    api = FakeBotAPI(latency=args.api_latency_ms / 1000)
+    base_url = await api.start()
+
+    # worker'ы (spawn) читают настройки из окружения при импорте
+    os.environ.update({
+        "API_TOKEN": FAKE_TOKEN,
+        "ENVIRONMENT": "development",
+        "TELEGRAM_API_BASE": base_url,
+        "USE_FILE_LOGGING": "false",
+        "LOG_LEVEL": "WARNING"
+    })
+
+    updates = make_updates(args.updates, args.users)
+    print(f"{'worker-ов':<10}{'время, с':>10}{'updates/с':>12}{'ускорение':>11}  распределение")
+    baseline = None
+    for workers in args.workers:
+        elapsed, dispatched = await measure(api, workers, updates)
+        throughput = len(updates) / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:<10}{elapsed:>10.2f}{throughput:>12.1f}{throughput / baseline:>10.2f}x  {dispatched}")
+
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность по числу worker'ов")
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Сравнение задержки обработки updates: webhook (aiohttp) против long polling.
+Оба режима используют реальный диспетчер бота и фейковый Bot API на localhost.
+
+Задержка update = время от доставки (POST на webhook / появление в getUpdates)
+до первого ответного вызова Bot API (sendMessage, answerCallbackQuery и т.д.).
+
+Запуск:
+    python -m benchmarks.bench_webhook_latency [--updates N] [--api-latency-ms MS]
+    python -m benchmarks.bench_webhook_latency --updates-file captured.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.fake_bot_api import FAKE_TOKEN, FakeBotAPI, make_message_update, chat_id_of, dumps
+
+# Полностью офлайн: фейковый токен и development-окружение до импорта settings
+os.environ.setdefault("API_TOKEN", FAKE_TOKEN)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from config.settings import settings, initialize
+from library.webhook import create_webhook_app
+from test_bot_main import create_dispatcher
+
+WEBHOOK_SECRET = "bench-secret-token"
+
+
+class LatencyTracker:
+    """Сопоставление доставленных updates с ответными вызовами API."""
+
+    def __init__(self):
+        self.pending: Dict[Any, deque] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.expected = 0
+        self.done = asyncio.Event()
+
+    @staticmethod
+    def key_of(update: Dict[str, Any]) -> Any:
+        """Ключ update: id callback_query или chat_id сообщения."""
+        if "callback_query" in update:
+            return update["callback_query"]["id"]
+        return update["message"]["chat"]["id"]
+
+    def delivered(self, update: Dict[str, Any]):
+        self.expected += 1
+        self.pending[self.key_of(update)].append(time.perf_counter())
+
+    def on_api_call(self, method: str, params: Dict[str, Any]):
+        key = params.get("callback_query_id") if method == "answerCallbackQuery" else chat_id_of(params)
+        queue = self.pending.get(key)
+        if queue:
+            self.latencies.append(time.perf_counter() - queue.popleft())
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+
+
+def load_updates(path: Path | None, count: int) -> List[Dict[str, Any]]:
+    """Захваченные updates из JSONL или синтетические /start от разных пользователей."""
+    if path:
+        with path.open("r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return [make_message_update(100000 + i, "/start") for i in range(count)]
+
+
+async def run_polling(dp, updates, api_latency: float, interval: float) -> tuple[List[float], float]:
+    """Прогон через dp.start_polling и getUpdates фейкового API."""
+    api = FakeBotAPI(latency=api_latency)
+    await api.start()
+    tracker = LatencyTracker()
+    api.listeners.append(tracker.on_api_call)
+
+    bot = api.create_bot()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+    while api.calls["getUpdates"] == 0:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    for update in updates:
+        tracker.delivered(update)
+        api.push_update(update)
+        if interval:
+            await asyncio.sleep(interval)
+    await asyncio.wait_for(tracker.done.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    await dp.stop_polling()
+    await polling
+    await api.stop()
+    return tracker.latencies, elapsed
+
+
+async def run_webhook(dp, updates, api_latency: float, interval: float) -> tuple[List[float], float]:
+    """Прогон через aiohttp webhook-приложение бота."""
+    api = FakeBotAPI(latency=api_latency)
+    await api.start()
+    tracker = LatencyTracker()
+    api.listeners.append(tracker.on_api_call)
+
+    bot = api.create_bot()
+    app = create_webhook_app(dp, bot, secret_token=WEBHOOK_SECRET)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    url = f"http://{host}:{port}{settings.webhook_path}"
+
+    headers = {
+        "X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET,
+        "Content-Type": "application/json"
+    }
+    async with aiohttp.ClientSession() as session:
+        # Проверка секретного токена
+        async with session.post(url, data="{}", headers={"Content-Type": "application/json"}) as resp:
+            assert resp.status == 401, f"Webhook без секрета должен вернуть 401, получено {resp.status}"
+
+        start = time.perf_counter()
+        for update in updates:
+            update = {**update, "update_id": api.next_update_id()}
+            tracker.delivered(update)
+            async with session.post(url, data=dumps(update), headers=headers) as resp:
+                resp.raise_for_status()
+            if interval:
+                await asyncio.sleep(interval)
+        await asyncio.wait_for(tracker.done.wait(), timeout=120)
+        elapsed = time.perf_counter() - start
+
+    await runner.cleanup()
+    await api.stop()
+    return tracker.latencies, elapsed
+
+
+def summarize(name: str, latencies: List[float], elapsed: float):
+    """Печать p50/p99 и пропускной способности."""
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    print(
+        f"{name:<10}{len(ms):>8}{statistics.mean(ms):>10.2f}{q[49]:>10.2f}"
+        f"{q[98]:>10.2f}{ms[-1]:>10.2f}{len(ms) / elapsed:>12.1f}"
+    )
+
+
+async def run(args):
+    updates = load_updates(args.updates_file, args.updates)
+    dp = create_dispatcher()
+    api_latency = args.api_latency_ms / 1000
+    interval = args.interval_ms / 1000
+
+    print(f"{'Режим':<10}{'updates':>8}{'mean,мс':>10}{'p50,мс':>10}{'p99,мс':>10}{'max,мс':>10}{'updates/с':>12}")
+    summarize("polling", *await run_polling(dp, updates, api_latency, interval))
+    summarize("webhook", *await run_webhook(dp, updates, api_latency, interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка webhook против long polling")
+    parser.add_argument("--updates", type=int, default=500, help="Количество синтетических /start")
+    parser.add_argument("--updates-file", type=Path, default=None, help="JSONL с захваченными updates")
+    parser.add_argument("--api-latency-ms", type=float, default=5.0, help="Задержка фейкового API")
+    parser.add_argument("--interval-ms", type=float, default=1.0, help="Интервал между updates")
+    args = parser.parse_args()
+    initialize()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Локальный фейковый Telegram Bot API на aiohttp для офлайн-бенчмарков.
+Поддерживает getUpdates (long polling), setWebhook и ответные методы бота;
+каждый вызов API фиксируется и передаётся подписчикам.
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+
+FAKE_TOKEN = "123456:FAKE-token-for-offline-benchmarks"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+# Методы, которые возвращают Message
+MESSAGE_METHODS = {"sendMessage", "editMessageText", "sendDocument"}
+
+ApiListener = Callable[[str, Dict[str, Any]], None]
+
+
+class FakeBotAPI:
+    """Фейковый сервер Bot API."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        Args:
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+            latency: Искусственная задержка ответа на каждый вызов (секунды)
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.base_url = ""
+        self.calls: Counter = Counter()
+        self.listeners: List[ApiListener] = []
+        self.webhook: Dict[str, Any] = {}
+        self._updates: List[Dict[str, Any]] = []
+        self._update_id = 0
+        self._message_id = 0
+        self._new_updates = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> str:
+        """Запустить сервер, вернуть базовый URL."""
+        app = web.Application()
+        app.router.add_route("POST", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        """Остановить сервер."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def create_bot(self) -> Bot:
+        """Bot, направленный на этот сервер."""
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.base_url))
+        return Bot(
+            token=FAKE_TOKEN,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        )
+
+    def push_update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Поставить update в очередь getUpdates (update_id назначается автоматически)."""
+        self._update_id += 1
+        update = {**update, "update_id": self._update_id}
+        self._updates.append(update)
+        self._new_updates.set()
+        return update
+
+    def next_update_id(self) -> int:
+        """Назначить update_id без постановки в очередь (для webhook)."""
+        self._update_id += 1
+        return self._update_id
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.calls[method] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getUpdates":
+            result = await self._get_updates(params)
+        else:
+            result = self._result_for(method, params)
+            for listener in self.listeners:
+                listener(method, params)
+
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset", 0) or 0)
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(
+                    self._new_updates.wait(),
+                    timeout=float(params.get("timeout", 0) or 0) or 0.01
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        limit = int(params.get("limit", 100) or 100)
+        return self._updates[:limit]
+
+    def _result_for(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getMe":
+            return BOT_USER
+        if method == "setWebhook":
+            self.webhook = params
+            return True
+        if method == "getWebhookInfo":
+            return {
+                "url": self.webhook.get("url", ""),
+                "has_custom_certificate": False,
+                "pending_update_count": 0
+            }
+        if method in MESSAGE_METHODS:
+            self._message_id += 1
+            chat_id = int(params.get("chat_id", 0) or 0)
+            message = {
+                "message_id": int(params.get("message_id", 0) or 0) or self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", "")
+            }
+            if method == "sendDocument":
+                message["document"] = {"file_id": f"doc{self._message_id}", "file_unique_id": f"u{self._message_id}"}
+            return message
+        return True
+
+
+def make_user(user_id: int) -> Dict[str, Any]:
+    """Пользователь Telegram для update."""
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+
+def make_message_update(user_id: int, text: str, update_id: int = 0) -> Dict[str, Any]:
+    """Update с текстовым сообщением пользователя."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": make_user(user_id),
+            "text": text
+        }
+    }
+
+
+def make_callback_update(user_id: int, data: str, message_id: int = 1, update_id: int = 0) -> Dict[str, Any]:
+    """Update с нажатием inline-кнопки."""
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": f"{user_id}-{time.monotonic_ns()}",
+            "from": make_user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "..."
+            }
+        }
+    }
+
+
+def chat_id_of(params: Dict[str, Any]) -> int | None:
+    """chat_id из параметров вызова API (или None)."""
+    chat_id = params.get("chat_id")
+    return int(chat_id) if chat_id not in (None, "") else None
+
+
+def dumps(update: Dict[str, Any]) -> str:
+    """Сериализация update для POST на webhook."""
+    return json.dumps(update, ensure_ascii=False)
@@ -0,0 +1,377 @@
+"""
+Сквозной нагрузочный тест: виртуальные экзаменуемые против реального диспетчера.
+
+Каждый виртуальный пользователь проходит полный сценарий:
+/start → специализация → ФИО → должность → подразделение → сложность →
+(N нажатий ответов + «Далее») × вопросы → результаты → сертификат.
+С --training после каждого экзамена — тренировка по его ошибкам
+(«Повторить тест» → анкета → «тренировка» → вопросы → итог).
+
+Бот работает в этом же процессе (polling или webhook), Bot API — фейковый
+сервер на localhost (benchmarks/fake_bot_api.py), всё офлайн. Шаг считается
+выполненным, когда бот ответил: sendMessage на сообщение, answerCallbackQuery
+на нажатие кнопки, sendDocument на запрос сертификата.
+
+Отчёт: пропускная способность, p50/p99 по шагам, вызовы API на экзамен,
+прирост памяти процесса.
+
+Запуск:
+    python -m benchmarks.load_simulator [--users 50] [--exams 1] [--difficulty резерв]
+    python -m benchmarks.load_simulator --mode webhook --toggles 2 --think-ms 200
+    python -m benchmarks.load_simulator --users 20 --training
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.fake_bot_api import (
+    FAKE_TOKEN,
+    FakeBotAPI,
+    make_message_update,
+    make_callback_update,
+    chat_id_of,
+    dumps
+)
+
+# Полностью офлайн: фейковый токен и development-окружение до импорта settings
+os.environ.setdefault("API_TOKEN", FAKE_TOKEN)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from config.settings import settings, initialize
+from library import (
+    Difficulty,
+    SpecCallback,
+    DifficultyCallback,
+    AnswerCallback,
+    MenuCallback,
+    MenuAction,
+    stats_manager
+)
+from library.webhook import create_webhook_app
+from test_bot_main import create_dispatcher
+
+WEBHOOK_SECRET = "load-simulator-secret"
+STEP_TIMEOUT = 60.0
+# Признак ответа AntiSpam (шаг повторяется после паузы)
+REJECT_PREFIX = "⏳"
+# Текст экрана результатов (finish_test)
+FINISH_MARKER = "Тест завершён"
+# Текст итога тренировки (finish_training) и заголовок вопроса (show_question)
+TRAINING_MARKER = "Тренировка завершена"
+QUESTION_MARKER = "Вопрос 1/"
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса (МБ); без /proc — пиковый."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResponseWaiter:
+    """Сопоставление ответных вызовов API с ожидающими шагами пользователей."""
+    
+    def __init__(self):
+        self.waiting: Dict[Tuple[str, Any], asyncio.Future] = {}
+        self.last_edit: Dict[int, str] = {}
+    
+    def expect(self, method: str, key: Any) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[(method, key)] = future
+        return future
+    
+    def cancel(self, method: str, key: Any):
+        self.waiting.pop((method, key), None)
+    
+    def on_api_call(self, method: str, params: Dict[str, Any]):
+        key = params.get("callback_query_id") if method == "answerCallbackQuery" else chat_id_of(params)
+        text = str(params.get("text", ""))
+        rejected = text.startswith(REJECT_PREFIX)
+        if method == "editMessageText":
+            self.last_edit[key] = text
+        future = self.waiting.pop((method, key), None)
+        if future and not future.done():
+            future.set_result(not rejected)
+
+
+class Transport:
+    """Доставка updates боту: очередь getUpdates или POST на webhook."""
+    
+    def __init__(self, api: FakeBotAPI, mode: str):
+        self.api = api
+        self.mode = mode
+        self.url = ""
+        self.session: aiohttp.ClientSession | None = None
+        self._headers = {
+            "X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET,
+            "Content-Type": "application/json"
+        }
+    
+    async def send(self, update: Dict[str, Any]):
+        if self.mode == "polling":
+            self.api.push_update(update)
+            return
+        update = {**update, "update_id": self.api.next_update_id()}
+        async with self.session.post(self.url, data=dumps(update), headers=self._headers) as resp:
+            resp.raise_for_status()
+
+
+class VirtualUser:
+    """Сценарий одного экзаменуемого."""
+    
+    def __init__(self, user_id: int, args, transport: Transport, waiter: ResponseWaiter, report: "Report"):
+        self.user_id = user_id
+        self.args = args
+        self.transport = transport
+        self.waiter = waiter
+        self.report = report
+        self.rng = random.Random(user_id)
+    
+    async def step(self, name: str, update: Dict[str, Any], method: str):
+        """Отправить update и дождаться ответа бота (повтор при отказе AntiSpam)."""
+        while True:
+            start = time.perf_counter()
+            accepted = await self._send_and_wait(name, update, method)
+            if accepted:
+                self.report.latencies[name].append(time.perf_counter() - start)
+                break
+            self.report.rejected += 1
+            await asyncio.sleep(self.args.think_ms / 1000 * 2)
+            update = self._refresh(update)
+        
+        if self.args.think_ms:
+            await asyncio.sleep(self.args.think_ms / 1000 * self.rng.uniform(0.5, 1.5))
+    
+    async def _send_and_wait(self, name: str, update: Dict[str, Any], method: str) -> bool:
+        """
+        Returns:
+            True - бот выполнил шаг, False - отказ AntiSpam
+        """
+        callback_id = update["callback_query"]["id"] if "callback_query" in update else None
+        key = callback_id if method == "answerCallbackQuery" else self.user_id
+        target = self.waiter.expect(method, key)
+        # Для нажатия с другим ответным методом отказ приходит через answerCallbackQuery
+        answer = None
+        if callback_id and method != "answerCallbackQuery":
+            answer = self.waiter.expect("answerCallbackQuery", callback_id)
+        
+        await self.transport.send(update)
+        deadline = time.perf_counter() + STEP_TIMEOUT
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {target} if answer is None else {target, answer},
+                    timeout=max(0.0, deadline - time.perf_counter()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise RuntimeError(f"пользователь {self.user_id}: нет ответа на шаг {name}")
+                if target.done():
+                    return target.result()
+                if not answer.result():
+                    return False
+                # Обычный answerCallbackQuery («Генерация...») — ждём основной ответ
+                answer = None
+        finally:
+            self.waiter.cancel(method, key)
+            if callback_id and method != "answerCallbackQuery":
+                self.waiter.cancel("answerCallbackQuery", callback_id)
+    
+    def _refresh(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Повторное нажатие — новый callback_query.id."""
+        if "callback_query" in update:
+            return make_callback_update(self.user_id, update["callback_query"]["data"])
+        return update
+    
+    def message(self, text: str) -> Dict[str, Any]:
+        return make_message_update(self.user_id, text)
+    
+    def press(self, callback_data) -> Dict[str, Any]:
+        return make_callback_update(self.user_id, callback_data.pack())
+    
+    def finished(self, marker: str = FINISH_MARKER) -> bool:
+        """Бот показал результаты теста (или итог тренировки)."""
+        return marker in self.waiter.last_edit.get(self.user_id, "")
+    
+    async def answer_questions(self, marker: str = FINISH_MARKER):
+        """Число вопросов зависит от банка: отвечаем до экрана результатов."""
+        while not self.finished(marker):
+            for _ in range(self.args.toggles):
+                # Минимум вариантов в вопросе — 3
+                num = self.rng.randint(1, 3)
+                await self.step("toggle", self.press(AnswerCallback(num=num)), "answerCallbackQuery")
+            await self.step("next", self.press(MenuCallback(action=MenuAction.NEXT)), "answerCallbackQuery")
+    
+    async def fill_profile(self):
+        await self.step("name", self.message(f"Пользователь {self.user_id}"), "sendMessage")
+        await self.step("position", self.message("Судебный пристав"), "sendMessage")
+        await self.step("department", self.message("Отдел нагрузочного тестирования"), "sendMessage")
+    
+    async def run_exam(self):
+        """Один полный экзамен до получения сертификата."""
+        await self.step("start", self.message("/start"), "sendMessage")
+        await self.step("spec", self.press(SpecCallback(spec=self.args.spec)), "answerCallbackQuery")
+        await self.fill_profile()
+        await self.step("difficulty", self.press(DifficultyCallback(level=self.args.level)), "answerCallbackQuery")
+        await self.answer_questions()
+        await self.step("certificate", self.press(MenuCallback(action=MenuAction.GENERATE_CERT)), "sendDocument")
+        self.report.exams += 1
+    
+    async def run_training(self):
+        """Тренировка по ошибкам только что пройденного экзамена."""
+        await self.step("repeat", self.press(MenuCallback(action=MenuAction.REPEAT_TEST)), "answerCallbackQuery")
+        await self.fill_profile()
+        await self.step(
+            "training", self.press(DifficultyCallback(level=Difficulty.TRAINING)), "answerCallbackQuery"
+        )
+        if QUESTION_MARKER not in self.waiter.last_edit.get(self.user_id, ""):
+            return  # Ошибок не было — повторять нечего
+        await self.answer_questions(TRAINING_MARKER)
+        self.report.trainings += 1
+    
+    async def run(self):
+        # Разнесённый старт, чтобы не стартовать всех в одну миллисекунду
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_s))
+        for _ in range(self.args.exams):
+            await self.run_exam()
+            if self.args.training:
+                await self.run_training()
+
+
+class Report:
+    """Накопленные результаты прогона."""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.exams = 0
+        self.trainings = 0
+        self.rejected = 0
+        self.errors: List[str] = []
+    
+    def print(self, elapsed: float, api_calls: Counter, rss_before: float, rss_after: float):
+        steps = sum(len(v) for v in self.latencies.values())
+        print(
+            f"\nЭкзаменов: {self.exams}, тренировок: {self.trainings}, "
+            f"ошибок: {len(self.errors)}, отказов AntiSpam: {self.rejected}"
+        )
+        print(f"Время: {elapsed:.1f} с, экзаменов/с: {self.exams / elapsed:.2f}, шагов/с: {steps / elapsed:.1f}")
+        
+        print(f"\n{'шаг':<13}{'кол-во':>8}{'p50,мс':>10}{'p99,мс':>10}{'max,мс':>10}")
+        for name, values in self.latencies.items():
+            ms = sorted(v * 1000 for v in values)
+            q = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+            print(f"{name:<13}{len(ms):>8}{q[49]:>10.1f}{q[98]:>10.1f}{ms[-1]:>10.1f}")
+        
+        exams = self.exams or 1
+        print("\nВызовы API на экзамен:")
+        for method, count in api_calls.most_common():
+            if method != "getUpdates":
+                print(f"  {method:<22}{count / exams:>8.1f}")
+        print(f"  {'всего':<22}{(sum(api_calls.values()) - api_calls['getUpdates']) / exams:>8.1f}")
+        
+        print(
+            f"\nПамять (RSS): {rss_before:.1f} → {rss_after:.1f} МБ "
+            f"(+{rss_after - rss_before:.1f} МБ, {(rss_after - rss_before) * 1024 / exams:.1f} КБ на экзамен)"
+        )
+        for error in self.errors[:5]:
+            print(f"❌ {error}")
+
+
+async def run(args):
+    # Статистика и сертификаты — во временный каталог, рабочие данные не трогаем
+    tmp = Path(tempfile.mkdtemp(prefix="load_simulator_"))
+    stats_manager.db_path = tmp / "stats.db"
+    settings.certs_dir = tmp / "certificates"
+    if args.training:
+        settings.review_relearn_minutes = 0  # Ошибки экзамена — к повторению сразу
+    await stats_manager.init_db()
+    
+    api = FakeBotAPI(latency=args.api_latency_ms / 1000)
+    await api.start()
+    waiter = ResponseWaiter()
+    api.listeners.append(waiter.on_api_call)
+    
+    dp = create_dispatcher()
+    bot = api.create_bot()
+    transport = Transport(api, args.mode)
+    
+    if args.mode == "polling":
+        background = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+        while api.calls["getUpdates"] == 0:
+            await asyncio.sleep(0.01)
+    else:
+        await dp.emit_startup(bot=bot)
+        runner = web.AppRunner(create_webhook_app(dp, bot, secret_token=WEBHOOK_SECRET))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        transport.url = f"http://{host}:{port}{settings.webhook_path}"
+        transport.session = aiohttp.ClientSession()
+    
+    report = Report()
+    users = [
+        VirtualUser(300000 + i, args, transport, waiter, report)
+        for i in range(args.users)
+    ]
+    
+    api.calls.clear()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(user.run() for user in users), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    rss_after = rss_mb()
+    report.errors = [str(r) for r in results if isinstance(r, Exception)]
+    
+    if args.mode == "polling":
+        await dp.stop_polling()
+        await background
+    else:
+        await transport.session.close()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+    await api.stop()
+    
+    report.print(elapsed, api.calls, rss_before, rss_after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный тест с фейковым Bot API")
+    parser.add_argument("--users", type=int, default=50, help="Одновременных экзаменуемых")
+    parser.add_argument("--exams", type=int, default=1, help="Экзаменов на пользователя")
+    parser.add_argument("--spec", default="oupds", choices=settings.specializations)
+    parser.add_argument(
+        "--difficulty", default=Difficulty.RESERVE.value,
+        choices=[d.value for d in Difficulty], help="Уровень сложности"
+    )
+    parser.add_argument("--training", action="store_true", help="Тренировка по ошибкам после каждого экзамена")
+    parser.add_argument("--toggles", type=int, default=1, help="Нажатий ответов на вопрос")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Пауза между действиями (AntiSpam: 3 за 0.5 с)")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="Разброс старта пользователей")
+    parser.add_argument("--mode", choices=["polling", "webhook"], default="polling")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Задержка фейкового API")
+    args = parser.parse_args()
+    args.level = Difficulty(args.difficulty)
+    
+    initialize()
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
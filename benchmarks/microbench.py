@@ -0,0 +1,264 @@
+"""
+Микробенчмарки горячих путей библиотеки с JSON baseline и сравнением.
+
+Каждый случай калибруется (циклов на прогон, чтобы прогон длился не меньше
+--min-time), затем выполняется --runs прогонов; в отчёт идёт медиана, минимум
+и разброс времени одного вызова.
+
+Запуск:
+    python -m benchmarks.microbench                               # таблица
+    python -m benchmarks.microbench --output baseline.json        # сохранить baseline
+    python -m benchmarks.microbench --compare baseline.json       # сравнить (код 1 при регрессии)
+    python -m benchmarks.microbench --compare baseline.json --threshold 15 --filter keyboard
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from config.settings import settings
+from library.enum import Difficulty
+from library.keyboards import get_test_keyboard
+from library.library import format_question_text
+from library.middlewares import AntiSpamMiddleware
+from library.models import CurrentTestState
+from library.question_loader import load_questions_for_specialization
+from library.stats import StatsManager
+
+# name -> async setup(tmp_dir) -> функция/корутина одного вызова
+Setup = Callable[[Path], Awaitable[Callable[[], Any]]]
+CASES: Dict[str, Setup] = {}
+
+
+def case(name: str):
+    """Регистрация случая бенчмарка."""
+    def decorator(setup: Setup) -> Setup:
+        CASES[name] = setup
+        return setup
+    return decorator
+
+
+def make_test_state(answered: bool = True) -> CurrentTestState:
+    """Состояние теста ООУПДС базового уровня (с ответами на все вопросы)."""
+    questions = load_questions_for_specialization("oupds", Difficulty.BASIC)
+    test_state = CurrentTestState(
+        questions=questions,
+        specialization="oupds",
+        difficulty=Difficulty.BASIC,
+        full_name="Иванов Иван Иванович",
+        position="Судебный пристав",
+        department="Отдел микробенчмарков"
+    )
+    if answered:
+        for idx, question in enumerate(questions):
+            test_state.answers_history[idx] = set(question.correct_answers) if idx % 3 else {1}
+    return test_state
+
+
+@case("load_questions")
+async def setup_load_questions(tmp: Path):
+    return lambda: load_questions_for_specialization("oupds", Difficulty.BASIC)
+
+
+@case("format_question_text")
+async def setup_format_question_text(tmp: Path):
+    test_state = make_test_state(answered=False)
+    test_state.current_index = len(test_state.questions) // 2
+    test_state.selected_answers = {1, 3}
+    return lambda: format_question_text(test_state)
+
+
+@case("get_test_keyboard")
+async def setup_get_test_keyboard(tmp: Path):
+    selected = {2, 4}
+    return lambda: get_test_keyboard(5, selected)
+
+
+@case("calculate_results")
+async def setup_calculate_results(tmp: Path):
+    test_state = make_test_state()
+    return test_state.calculate_results
+
+
+@case("antispam_call")
+async def setup_antispam_call(tmp: Path):
+    class FakeUser:
+        __slots__ = ("id",)
+    
+    class FakeEvent:
+        __slots__ = ("from_user",)
+        
+        async def answer(self, *args, **kwargs):
+            pass
+    
+    # 10000 пользователей по кругу; лимит с запасом — замеряется путь пропуска
+    events = []
+    for user_id in range(10000):
+        event = FakeEvent()
+        event.from_user = FakeUser()
+        event.from_user.id = user_id
+        events.append(event)
+    
+    middleware = AntiSpamMiddleware(max_requests=1_000_000)
+    data: Dict[str, Any] = {}
+    counter = iter(range(sys.maxsize))
+    
+    async def handler(event, data):
+        return None
+    
+    async def call():
+        await middleware(handler, events[next(counter) % 10000], data)
+    return call
+
+
+@case("stats_save_result")
+async def setup_stats_save_result(tmp: Path):
+    manager = StatsManager()
+    manager.db_path = tmp / "stats_save.db"
+    await manager.init_db()
+    test_state = make_test_state()
+    test_state.calculate_results()
+    counter = iter(range(sys.maxsize))
+    
+    async def call():
+        await manager.save_result(next(counter) % 1000, test_state)
+    return call
+
+
+@case("stats_get_user_stats")
+async def setup_stats_get_user_stats(tmp: Path):
+    manager = StatsManager()
+    manager.db_path = tmp / "stats_read.db"
+    await manager.init_db()
+    test_state = make_test_state()
+    test_state.calculate_results()
+    for i in range(2000):
+        await manager.save_result(i % 200, test_state)
+    
+    async def call():
+        await manager.get_user_stats(42)
+    return call
+
+
+@case("generate_certificate")
+async def setup_generate_certificate(tmp: Path):
+    from library.certificates import generate_certificate
+    
+    settings.certs_dir = tmp / "certificates"
+    test_state = make_test_state()
+    test_state.calculate_results()
+    
+    async def call():
+        await generate_certificate(test_state, 1)
+    return call
+
+
+async def measure(func: Callable[[], Any], runs: int, min_time: float) -> Dict[str, Any]:
+    """Калибровка и прогоны: время одного вызова в микросекундах."""
+    is_async = asyncio.iscoroutinefunction(func)
+    
+    async def run(loops: int) -> float:
+        start = time.perf_counter()
+        if is_async:
+            for _ in range(loops):
+                await func()
+        else:
+            for _ in range(loops):
+                func()
+        return time.perf_counter() - start
+    
+    # Прогрев и калибровка: удваиваем циклы, пока прогон короче min_time
+    loops = 1
+    while await run(loops) < min_time and loops < 10_000_000:
+        loops *= 2
+    
+    samples = [await run(loops) / loops * 1e6 for _ in range(runs)]
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "runs": runs
+    }
+
+
+async def run_suite(names: List[str], runs: int, min_time: float) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="microbench_") as tmp:
+        for name in names:
+            func = await CASES[name](Path(tmp))
+            results[name] = await measure(func, runs, min_time)
+            r = results[name]
+            print(f"{name:<24}{r['median_us']:>14.2f}{r['min_us']:>14.2f}{r['stdev_us']:>12.2f}{r['loops']:>10}")
+    return results
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Сравнение медиан с baseline.
+    
+    Returns:
+        Имена случаев с замедлением больше threshold процентов
+    """
+    regressions = []
+    print(f"\n{'случай':<24}{'baseline, мкс':>14}{'сейчас, мкс':>14}{'изменение':>12}")
+    for name, current in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<24}{'—':>14}{current['median_us']:>14.2f}{'новый':>12}")
+            continue
+        change = (current["median_us"] / base["median_us"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌ регрессия"
+        elif change < -threshold:
+            flag = "  ✅ ускорение"
+        print(f"{name:<24}{base['median_us']:>14.2f}{current['median_us']:>14.2f}{change:>+11.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячих путей библиотеки")
+    parser.add_argument("--output", type=Path, help="Сохранить результаты как JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Сравнить с JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Порог регрессии, %%")
+    parser.add_argument("--filter", default="", help="Подстрока имени случая")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Минимальная длительность прогона, с")
+    args = parser.parse_args()
+    
+    names = [name for name in CASES if args.filter in name]
+    print(f"{'случай':<24}{'медиана, мкс':>14}{'минимум, мкс':>14}{'σ, мкс':>12}{'циклов':>10}")
+    results = asyncio.run(run_suite(names, args.runs, args.min_time))
+    
+    if args.output:
+        payload = {
+            "meta": {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform()
+            },
+            "results": results
+        }
+        args.output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 Baseline сохранён: {args.output}")
+    
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n❌ Регрессии (> {args.threshold:.0f}%): {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ Регрессий нет (порог {args.threshold:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
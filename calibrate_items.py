@@ -0,0 +1,51 @@
+"""
+Калибровка вопросов по сохранённым ответам: дискриминация, надёжность, 2PL IRT.
+
+Результаты пишутся в item_calibration (по вопросу) и bank_calibration
+(по специализации). Нужен NumPy: pip install numpy.
+
+Запуск:
+    python calibrate_items.py                 # все специализации
+    python calibrate_items.py oupds --show 10 # + 10 наименее дискриминирующих вопросов
+"""
+import argparse
+import asyncio
+import sys
+
+from config.settings import settings
+from library.calibration import MIN_RESPONSES, calibrate_specialization
+from library.stats import stats_manager
+
+
+def main(args) -> int:
+    asyncio.run(stats_manager.init_db())
+    for specialization in args.specializations or settings.specializations:
+        result, saved = calibrate_specialization(stats_manager.db_path, specialization, args.iterations)
+        if not result.attempts:
+            print(f"ℹ️ {specialization}: ответов нет")
+            continue
+        print(
+            f"📐 {specialization}: попыток {result.attempts}, вопросов {len(result.uids)} "
+            f"(записано {saved}, ≥ {MIN_RESPONSES} ответов), KR-20 α = {result.alpha:.3f}, "
+            f"итераций 2PL {result.iterations}, {result.elapsed:.2f} с"
+        )
+        weakest = sorted(range(len(result.uids)), key=lambda i: result.point_biserial[i])[:args.show]
+        for i in weakest:
+            print(
+                f"   uid {result.uids[i]:>20}  ответов {int(result.responses[i]):>6}  "
+                f"p {result.p_value[i]:.2f}  r_pb {result.point_biserial[i]:+.2f}  "
+                f"a {result.a[i]:.2f}  b {result.b[i]:+.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Калибровка вопросов (NumPy)")
+    parser.add_argument("specializations", nargs="*", metavar="spec")
+    parser.add_argument("--iterations", type=int, default=20, help="Максимум итераций 2PL")
+    parser.add_argument("--show", type=int, default=0, help="Показать N вопросов с наименьшей r_pb")
+    args = parser.parse_args()
+    unknown = set(args.specializations) - set(settings.specializations)
+    if unknown:
+        parser.error(f"неизвестные специализации: {', '.join(sorted(unknown))}")
+    sys.exit(main(args))
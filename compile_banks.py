@@ -0,0 +1,39 @@
+"""
+Компиляция банков вопросов questions/*.json в бинарный формат .qbank.
+
+JSON остаётся исходным (редактируемым) форматом; бот использует .qbank,
+пока mtime и размер JSON совпадают с записанными при компиляции,
+иначе возвращается к разбору JSON.
+
+Запуск:
+    python compile_banks.py              # все специализации
+    python compile_banks.py oupds prof   # выбранные
+"""
+import sys
+import time
+
+from config.settings import settings
+from library.question_loader import BankError, compile_bank, compiled_bank_path
+
+
+def main(names):
+    failed = 0
+    for spec_id in names or settings.specializations:
+        start = time.perf_counter()
+        try:
+            bank = compile_bank(spec_id)
+        except BankError as e:
+            print(f"❌ {spec_id}: {e}")
+            failed += 1
+            continue
+        path = compiled_bank_path(spec_id)
+        print(
+            f"✅ {spec_id}: {len(bank)} вопросов (пропущено {bank.skipped}), "
+            f"{bank.source.stat().st_size} → {path.stat().st_size} байт, "
+            f"{(time.perf_counter() - start) * 1000:.0f} мс → {path}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,7 @@
 """
 Пакет конфигурации.
-Автоматический импорт настроек.
+Автоматический импорт настроек; initialize() — явная инициализация при запуске.
 """
-from .settings import settings, Settings
+from .settings import settings, Settings, initialize
 
-__all__ = ["settings", "Settings"]
+__all__ = ["settings", "Settings", "initialize"]
@@ -0,0 +1,206 @@
+"""
+Неблокирующее логирование: QueueHandler в event loop, запись в фоновом потоке.
+
+Хэндлеры (консоль, файл с ротацией) вызываются только из потока QueueListener.
+Запись в файл пакетная: listener забирает из очереди всё накопившееся
+(до batch_size записей) и делает один flush на пакет.
+
+Форматирование сообщения (msg % args, traceback) откладывается до потока
+записи: QueueHandler передаёт запись как есть, без prepare()/format().
+Поэтому в горячих местах используется ленивый стиль logger.debug("... %s", x) —
+если уровень отключён, строка не собирается вовсе.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional["BatchingQueueListener"] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Структурированный вывод: одна JSON-строка на запись."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке.
+    
+    Стандартный prepare() выполняет format() (msg % args и traceback) прямо
+    в event loop. Здесь запись уходит в очередь как есть: listener работает
+    в том же процессе, объекты args и exc_info остаются доступны.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _BatchingMixin:
+    """Отключение flush на каждую запись: flush делает listener на пакет."""
+    
+    def flush(self):
+        pass
+    
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchingRotatingFileHandler(_BatchingMixin, logging.handlers.RotatingFileHandler):
+    """Ротация по размеру, flush пакетами."""
+
+
+class BatchingTimedRotatingFileHandler(_BatchingMixin, logging.handlers.TimedRotatingFileHandler):
+    """Ротация по времени, flush пакетами."""
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener, обрабатывающий записи пакетами с одним flush на пакет."""
+    
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int = 256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+    
+    def _flush(self):
+        for handler in self.handlers:
+            flush = getattr(handler, "flush_batch", handler.flush)
+            try:
+                flush()
+            except Exception:
+                pass
+    
+    def _monitor(self):
+        """Цикл потока записи: блокирующее ожидание, затем выборка пакета."""
+        q = self.queue
+        while True:
+            record = q.get()
+            stop = record is self._sentinel
+            if not stop:
+                self.handle(record)
+                for _ in range(self.batch_size - 1):
+                    try:
+                        record = q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is self._sentinel:
+                        stop = True
+                        break
+                    self.handle(record)
+            self._flush()
+            if stop:
+                return
+
+
+def _file_handler(
+    path: Path,
+    max_bytes: int,
+    backup_count: int,
+    rotate_when: str
+) -> logging.Handler:
+    """Файловый хэндлер: ротация по времени (rotate_when) или по размеру."""
+    if rotate_when:
+        return BatchingTimedRotatingFileHandler(
+            path, when=rotate_when, backupCount=backup_count, encoding="utf-8"
+        )
+    return BatchingRotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    log_file: Optional[Path] = None,
+    json_format: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotate_when: str = "",
+    batch_size: int = 256
+) -> List[str]:
+    """
+    Настроить корневой логгер: QueueHandler + фоновый BatchingQueueListener.
+    Повторный вызов заменяет предыдущую конфигурацию.
+    
+    Args:
+        level: Уровень корневого логгера
+        log_file: Путь к файлу лога (None - только консоль)
+        json_format: JSON-строки вместо текстового формата
+        max_bytes: Размер файла для ротации по размеру
+        backup_count: Количество архивных файлов
+        rotate_when: Ротация по времени ("midnight", "H", ...); пусто - по размеру
+        batch_size: Максимум записей на один flush
+    
+    Returns:
+        Предупреждения настройки (выводятся после запуска конвейера)
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+    
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    warnings = []
+    
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    handlers: List[logging.Handler] = [console]
+    
+    if log_file:
+        try:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = _file_handler(log_file, max_bytes, backup_count, rotate_when)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except (OSError, PermissionError) as e:
+            warnings.append(
+                f"⚠️ Не удалось создать логирование в файл ({e}). "
+                "Используется только консольное логирование."
+            )
+    
+    log_queue: queue.Queue = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(log_queue)
+    
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    
+    _listener = BatchingQueueListener(log_queue, *handlers, batch_size=batch_size)
+    _listener.start()
+    return warnings
+
+
+def shutdown_logging():
+    """Остановить поток записи, дописав очередь (вызывается и через atexit)."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        listener, _listener = _listener, None
+        if listener._thread is not None and listener._thread is not threading.current_thread():
+            listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown_logging)
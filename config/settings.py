@@ -6,11 +6,13 @@ import os
 import sys
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
+from .logging_setup import configure_logging
+
 
 class Settings(BaseSettings):
     """Настройки бота с поддержкой Bothost.ru."""
@@ -26,13 +28,16 @@ class Settings(BaseSettings):
     data_dir: Path = base_dir / "data"
     logs_dir: Path = base_dir / "logs"
     certs_dir: Path = base_dir / "data" / "certificates"
+    compiled_banks_dir: Path = base_dir / "data" / "banks"  # .qbank (compile_banks.py)
     
     # === ТАЙМИНГИ УРОВНЕЙ СЛОЖНОСТИ (в минутах) ===
     difficulty_times: Dict[str, int] = {
         "резерв": 35,
         "базовый": 25,
         "стандартный": 20,
-        "продвинутый": 20
+        "продвинутый": 20,
+        "адаптивный": 25,
+        "тренировка": 30
     }
     
     # === КОЛИЧЕСТВО ВОПРОСОВ ПО УРОВНЯМ ===
@@ -40,7 +45,33 @@ class Settings(BaseSettings):
         "резерв": 20,
         "базовый": 30,
         "стандартный": 40,
-        "продвинутый": 50
+        "продвинутый": 50,
+        "адаптивный": 30,  # Максимум; обычно тест заканчивается раньше
+        "тренировка": 20  # Максимум карточек к повторению за тренировку
+    }
+    
+    # === ПЛАНЫ ЭКЗАМЕНОВ (метка вопроса → число вопросов, по уровням) ===
+    # Метка — тема (topic) или тег (tags) вопроса в JSON банка; остаток теста
+    # добирается из всего банка. Пример:
+    #   {"продвинутый": {"исполнительное производство": 10, "алименты": 5}}
+    exam_blueprints: Dict[str, Dict[str, int]] = {}
+    
+    # === СОСТАВ ТЕСТА ПО СЛОЖНОСТИ ВОПРОСОВ (поле difficulty в JSON банка) ===
+    # Уровень теста → доли вопросов из пулов сложности (после плана экзамена).
+    # Нехватку пула добирают пулы difficulty_fallback по порядку ("" — вопросы
+    # без сложности), затем весь банк. Банк без размеченной сложности и уровень
+    # без состава — весь тест из всего банка.
+    difficulty_mix: Dict[str, Dict[str, float]] = {
+        "резерв": {"резерв": 0.8, "базовый": 0.2},
+        "базовый": {"базовый": 0.7, "резерв": 0.15, "стандартный": 0.15},
+        "стандартный": {"стандартный": 0.7, "базовый": 0.15, "продвинутый": 0.15},
+        "продвинутый": {"продвинутый": 0.7, "стандартный": 0.3}
+    }
+    difficulty_fallback: Dict[str, List[str]] = {
+        "резерв": ["", "базовый", "стандартный"],
+        "базовый": ["", "резерв", "стандартный"],
+        "стандартный": ["", "базовый", "продвинутый"],
+        "продвинутый": ["", "стандартный", "базовый"]
     }
     
     # === ПОРОГИ ОЦЕНОК (в процентах) ===
@@ -51,16 +82,96 @@ class Settings(BaseSettings):
         "отлично": 100.0
     }
     
+    # === БАНКИ ВОПРОСОВ (прогрев при старте) ===
+    bank_preload_workers: int = 4  # Потоков для параллельной загрузки банков
+    bank_fail_fast: bool = True  # production: не запускаться, если банк не прошёл проверку
+    bank_compiled: bool = True  # Использовать актуальный .qbank вместо разбора JSON
+    bank_watch_enabled: bool = True  # Горячая перезагрузка банков при изменении JSON
+    bank_watch_inotify: bool = True  # inotify (Linux); иначе опрос файлов
+    bank_watch_interval: float = 2.0  # Период опроса файлов без inotify (секунды)
+    bank_watch_debounce: float = 0.5  # Пауза после последнего изменения перед перезагрузкой
+    bank_audit_on_startup: bool = True  # Поиск дубликатов вопросов (MinHash/LSH) после старта
+    bank_audit_threshold: float = 0.8  # Сходство Жаккара для почти-дубликатов
+    
+    # === АДАПТИВНЫЙ РЕЖИМ (CAT по калибровке calibrate_items.py) ===
+    adaptive_enabled: bool = True  # Уровень «адаптивный» в меню сложности
+    adaptive_target_se: float = 0.3  # Остановка при стандартной ошибке θ не выше (≈ надёжность 0.91)
+    adaptive_min_questions: int = 10  # Не заканчивать раньше
+    adaptive_randomesque: int = 5  # Случайный из k самых информативных (экспозиция вопросов)
+    adaptive_min_calibrated: int = 60  # Меньше откалиброванных вопросов — обычный тест
+    
+    # === ТРЕНИРОВКА (интервальное повторение ошибок, SM-2, library.review) ===
+    training_enabled: bool = True  # Режим «тренировка» в меню сложности
+    review_relearn_minutes: int = 10  # Ошибка → вопрос снова к повторению через столько минут
+    review_first_interval: float = 1.0  # Интервал после первого верного повторения, дни
+    review_second_interval: float = 6.0  # После второго подряд, дни (дальше — интервал × лёгкость)
+    review_initial_ease: float = 2.5  # Начальный коэффициент лёгкости SM-2
+    review_min_ease: float = 1.3  # Нижняя граница коэффициента лёгкости
+    
+    # === ПОКАЗАННЫЕ ВОПРОСЫ (не повторять вопросы между попытками) ===
+    exposure_enabled: bool = True  # Сначала вопросы, которые пользователь ещё не видел
+    exposure_flush_interval: float = 5.0  # Период пакетной записи в БД, секунды
+    exposure_cache_size: int = 10_000  # Карт (пользователь, специализация) в памяти
+    
+    # === РЕЙТИНГИ (library.leaderboard, команда /top) ===
+    leaderboard_enabled: bool = True  # Рейтинги сотрудников и подразделений в памяти
+    leaderboard_snapshot_interval: float = 30.0  # Период пакетной записи в БД, секунды
+    leaderboard_top: int = 10  # Строк в топе сотрудников и подразделений
+    
+    # === ВЗВЕШЕННЫЙ ВЫБОР ВОПРОСОВ (library.sampling, таблицы псевдонимов) ===
+    sampling_weights_enabled: bool = True  # Веса по экспозиции и качеству вопросов
+    sampling_exposure_power: float = 1.0  # Вес ∝ (средние показы / показы вопроса)^power; 0 — без учёта
+    sampling_min_discrimination: float = 0.1  # r_pb ниже — вопрос выбирается реже
+    sampling_low_quality_weight: float = 0.25  # Множитель веса таких вопросов
+    sampling_weights_refresh: float = 300.0  # Пересчёт весов из БД статистики не чаще, секунды
+    
     # === СПЕЦИАЛИЗАЦИИ ===
     specializations: list[str] = [
         "oupds", "ispolniteli", "aliment", "doznanie", "rozyisk",
         "prof", "oko", "informatika", "kadry", "bezopasnost", "upravlenie"
     ]
     
+    # === РЕЖИМ ПОЛУЧЕНИЯ UPDATES (polling / webhook) ===
+    run_mode: str = "polling"
+    webhook_base_url: str = ""  # Публичный HTTPS адрес, например https://bot.example.ru
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""  # X-Telegram-Bot-Api-Secret-Token (пусто - генерируется при старте)
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_max_connections: int = 40  # setWebhook max_connections (1-100)
+    webhook_concurrency: int = 64  # Одновременно обрабатываемых updates
+    telegram_api_base: str = ""  # Свой Bot API сервер (пусто - api.telegram.org)
+    
+    # === ПЛАНИРОВЩИК UPDATES (UpdateSchedulerMiddleware) ===
+    max_concurrent_updates: int = 64  # Одновременно выполняемых хэндлеров
+    max_pending_updates: int = 1000  # Порог сброса нагрузки (в обработке + в ожидании)
+    max_chat_queue: int = 10  # Максимум updates в очереди одного чата
+    
+    # === МЕТРИКИ (Prometheus, /metrics) ===
+    metrics_enabled: bool = True
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9100  # worker'ы: metrics_port + 1 + worker_id
+    
+    # === МОНИТОР EVENT LOOP (задержка планирования, зависания) ===
+    loop_monitor_enabled: bool = True
+    loop_lag_interval: float = 0.5  # Период замера задержки, секунды
+    loop_stall_threshold: float = 0.25  # Порог предупреждения/снимка стека, секунды
+    loop_summary_interval: float = 300.0  # Период сводки в лог, секунды
+    loop_debug: bool = False  # asyncio debug: отчёт о медленных callback'ах (накладные расходы)
+    
+    # === МНОГОПРОЦЕССНЫЙ РЕЖИМ (supervisor + worker'ы) ===
+    workers: int = Field(default=1, ge=1)  # >1 - шардирование updates по user_id
+    worker_concurrency: int = 64  # Одновременно обрабатываемых updates в worker'е
+    
     # === ПАРАМЕТРЫ ЛОГИРОВАНИЯ И ВЫВОДА ===
     answers_show_time: int = 60
     log_level: str = "INFO"
     use_file_logging: bool = True
+    log_format: str = "text"  # text / json (одна JSON-строка на запись)
+    log_max_bytes: int = 10 * 1024 * 1024  # Ротация по размеру
+    log_backup_count: int = 5
+    log_rotate_when: str = ""  # Ротация по времени: midnight, H, ... (пусто - по размеру)
+    log_batch_size: int = 256  # Записей на один flush фонового потока
     
     model_config = {"case_sensitive": False}
     
@@ -87,6 +198,20 @@ class Settings(BaseSettings):
     def validate_environment(cls, v):
         """Установка окружения из переменной окружения."""
         return (v or os.getenv("ENVIRONMENT", "production")).lower()
+    
+    @field_validator("run_mode", mode="before")
+    @classmethod
+    def validate_run_mode(cls, v):
+        """Режим получения updates: polling или webhook."""
+        mode = (v or "polling").strip().lower()
+        if mode not in ("polling", "webhook"):
+            raise ValueError(f"RUN_MODE должен быть polling или webhook, получено: {v}")
+        return mode
+    
+    @property
+    def webhook_url(self) -> str:
+        """Полный URL webhook для setWebhook."""
+        return self.webhook_base_url.rstrip("/") + self.webhook_path
 
 
 # === ИНИЦИАЛИЗАЦИЯ И СОЗДАНИЕ ДИРЕКТОРИЙ ===
@@ -95,35 +220,27 @@ logger = logging.getLogger(__name__)
 
 
 def setup_logging():
-    """Настройка логирования с поддержкой Bothost.ru."""
+    """
+    Настройка логирования с поддержкой Bothost.ru.
+    Единственная точка конфигурации: консоль и файл пишет фоновый поток
+    (см. config/logging_setup.py), event loop только кладёт записи в очередь.
+    """
     log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
+    log_file = settings.logs_dir / "bot.log" if settings.use_file_logging else None
     
-    # Базовая конфигурация для консоли (всегда активна)
-    logging.basicConfig(
+    warnings = configure_logging(
         level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout)]
+        log_file=log_file,
+        json_format=settings.log_format.lower() == "json",
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+        rotate_when=settings.log_rotate_when,
+        batch_size=settings.log_batch_size
     )
-    
-    # Логирование в файл (если разрешено и возможно)
-    if settings.use_file_logging:
-        try:
-            settings.logs_dir.mkdir(parents=True, exist_ok=True)
-            file_handler = logging.FileHandler(
-                settings.logs_dir / "bot.log",
-                encoding="utf-8"
-            )
-            formatter = logging.Formatter(
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            )
-            file_handler.setFormatter(formatter)
-            logging.getLogger().addHandler(file_handler)
-            logger.info("✅ Логирование в файл активировано")
-        except (OSError, PermissionError) as e:
-            logger.warning(
-                f"⚠️ Не удалось создать логирование в файл ({e}). "
-                "Используется только консольное логирование."
-            )
+    for warning in warnings:
+        logger.warning(warning)
+    if log_file and not warnings:
+        logger.info("✅ Логирование в файл активировано")
 
 
 def ensure_directories_exist():
@@ -163,6 +280,13 @@ def validate_environment():
         if settings.environment == "production":
             raise ValueError(error_msg)
     
+    # Проверка webhook-режима
+    if settings.run_mode == "webhook" and not settings.webhook_base_url:
+        error_msg = "❌ RUN_MODE=webhook, но WEBHOOK_BASE_URL не установлен"
+        logger.error(error_msg)
+        if settings.environment == "production":
+            raise ValueError(error_msg)
+    
     # Проверка структуры данных
     if len(settings.specializations) != 11:
         logger.warning(
@@ -172,13 +296,18 @@ def validate_environment():
     logger.info("✅ Конфигурация валидна")
 
 
-# === ИНИЦИАЛИЗАЦИЯ ПРИ ИМПОРТЕ ===
-try:
-    setup_logging()
-    ensure_directories_exist()
-    validate_environment()
-    logger.info("✅ Настройки загружены успешно")
-except Exception as e:
-    logger.critical(f"❌ Критическая ошибка при инициализации: {e}")
-    if settings.environment == "production":
-        raise
+def initialize():
+    """
+    Инициализация при запуске процесса: логирование, директории, проверка конфигурации.
+    Вызывается явно из точки входа (и в каждом worker-процессе), импорт
+    config.settings побочных эффектов не имеет.
+    """
+    try:
+        setup_logging()
+        ensure_directories_exist()
+        validate_environment()
+        logger.info("✅ Настройки загружены успешно")
+    except Exception as e:
+        logger.critical(f"❌ Критическая ошибка при инициализации: {e}")
+        if settings.environment == "production":
+            raise
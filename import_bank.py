@@ -0,0 +1,62 @@
+"""
+Импорт банка вопросов из таблицы CSV/XLSX в questions/<spec>.json (+ .qbank).
+
+Запуск:
+    python import_bank.py questions.xlsx oupds                   # заменить банк
+    python import_bank.py new.csv oupds --append                 # добавить к банку
+    python import_bank.py new.csv oupds --rejects rejects.csv    # отклонённые строки в CSV
+    python import_bank.py new.csv oupds --dry-run                # только проверка
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from config.settings import settings
+from library.bank_import import BankImportError, import_bank
+from library.question_loader import BankError, compile_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт банка вопросов из CSV/XLSX")
+    parser.add_argument("source", type=Path, help="Файл .csv или .xlsx")
+    parser.add_argument("specialization", choices=settings.specializations)
+    parser.add_argument("--append", action="store_true", help="Добавить к текущему банку")
+    parser.add_argument("--rejects", type=Path, help="CSV с отклонёнными строками")
+    parser.add_argument("--dry-run", action="store_true", help="Проверить без записи банка")
+    parser.add_argument("--no-compile", action="store_true", help="Не собирать .qbank")
+    args = parser.parse_args()
+    
+    try:
+        report = import_bank(args.source, args.specialization, args.append, args.rejects, args.dry_run)
+    except (BankImportError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    
+    print(
+        f"📥 {report.source.name}: строк {report.rows}, принято {report.imported}, "
+        f"дубликатов {report.duplicates}, отклонено {report.rejected}"
+        + (f", сохранено из банка {report.kept}" if report.kept else "")
+    )
+    print(f"⏱ {report.elapsed:.2f} с ({report.rows_per_second:,.0f} строк/с)")
+    for reason, count in report.reasons.most_common(10):
+        print(f"   {count:>7}  {reason}")
+    if args.rejects:
+        print(f"📄 Отклонённые строки: {args.rejects}")
+    
+    if args.dry_run:
+        print("ℹ️ Проверка без записи (--dry-run)")
+        return 0
+    print(f"💾 {report.output}")
+    
+    if not args.no_compile:
+        try:
+            bank = compile_bank(args.specialization)
+        except BankError as e:
+            print(f"❌ .qbank не собран: {e}")
+            return 1
+        print(f"✅ .qbank собран: {len(bank)} вопросов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
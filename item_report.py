@@ -0,0 +1,67 @@
+"""
+Отчёт по вопросам специализации: трудность (p-value) и дистракторы.
+
+Флаги: слишком лёгкий (p > 0.95), слишком трудный (p < 0.2),
+нерабочие дистракторы (выбираются < 5% отвечавших).
+
+Запуск:
+    python item_report.py oupds                  # вопросы с ≥ 20 показами
+    python item_report.py oupds --min-shown 5
+    python item_report.py --rebuild              # пересобрать счётчики из ответов
+"""
+import argparse
+import asyncio
+import sys
+
+from config.settings import settings
+from library.item_analytics import DISTRACTOR_MIN_SHARE
+from library.stats import item_analytics, stats_manager
+
+
+async def report(specialization: str, min_shown: int) -> int:
+    items = await item_analytics.get_items(specialization, min_shown)
+    if not items:
+        print(f"ℹ️ {specialization}: нет вопросов с ≥ {min_shown} показами")
+        return 0
+    
+    flagged = 0
+    print(f"{'p':>6}{'показов':>9}{'ДЭ':>6}  дистракторы (доля)        вопрос")
+    for item in sorted(items, key=lambda i: i.p_value):
+        flags = []
+        if item.p_value > 0.95:
+            flags.append("лёгкий")
+        elif item.p_value < 0.2:
+            flags.append("трудный")
+        weak = [option for option, share in item.distractor_shares() if share < DISTRACTOR_MIN_SHARE]
+        if weak:
+            flags.append(f"нерабочие: {', '.join(map(str, weak))}")
+        flagged += bool(flags)
+        shares = " ".join(f"{option}:{share:.0%}" for option, share in item.distractor_shares())
+        print(
+            f"{item.p_value:>6.2f}{item.shown:>9}{item.distractor_efficiency:>6.0%}  {shares:<26}"
+            f"{item.question[:60]}" + (f"  ⚠️ {'; '.join(flags)}" if flags else "")
+        )
+    print(f"\n📊 {specialization}: вопросов {len(items)}, с замечаниями {flagged}")
+    return 0
+
+
+async def main(args) -> int:
+    await stats_manager.init_db()
+    if args.rebuild:
+        attempts = await item_analytics.rebuild()
+        print(f"✅ Счётчики вопросов пересобраны из {attempts} попыток")
+    for specialization in args.specializations:
+        await report(specialization, args.min_shown)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Аналитика вопросов")
+    parser.add_argument("specializations", nargs="*", metavar="spec")
+    parser.add_argument("--min-shown", type=int, default=20)
+    parser.add_argument("--rebuild", action="store_true", help="Пересобрать item_stats из test_responses")
+    args = parser.parse_args()
+    unknown = set(args.specializations) - set(settings.specializations)
+    if unknown:
+        parser.error(f"неизвестные специализации: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(args)))
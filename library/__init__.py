@@ -1,7 +1,11 @@
 """
 library/__init__.py: Централизованный экспорт всех модулей библиотеки.
 Production-ready для использования в test_bot_main и specializations.
+
+Webhook и многопроцессный режим (aiohttp.web, aiogram.webhook) загружаются
+при первом обращении к их именам (PEP 562), а не при импорте library.
 """
+import importlib
 
 # Базовые модели и enum
 from .enum import Difficulty
@@ -9,39 +13,122 @@ from .models import Question, CurrentTestState
 from .states import TestStates
 
 # Загрузка вопросов
-from .question_loader import load_questions_for_specialization
+from .question_loader import (
+    load_questions_for_specialization,
+    QuestionBank,
+    BankError,
+    get_bank,
+    compile_bank,
+    preload_question_banks,
+    setup_question_banks
+)
+from .bank_format import CompiledQuestions, CompiledBankError
 
 # Таймер
 from .timers import TestTimer, create_timer
 
+# Typed callback_data и таблица маршрутов
+from .callbacks import (
+    MenuAction,
+    SpecCallback,
+    DifficultyCallback,
+    AnswerCallback,
+    MenuCallback,
+    CallbackDispatcher,
+    callback_dispatcher
+)
+
 # Клавиатуры
 from .keyboards import (
     get_main_keyboard,
     get_difficulty_keyboard,
     get_test_keyboard,
-    get_finish_keyboard
+    get_finish_keyboard,
+    get_training_finish_keyboard
 )
 
 # Основная логика
 from .library import (
+    format_question_text,
     show_question,
     handle_answer_toggle,
     handle_next_question,
-    finish_test
+    finish_test,
+    finish_training
 )
 
 # Middlewares
-from .middlewares import AntiSpamMiddleware, ErrorHandlerMiddleware
+from .middlewares import (
+    AntiSpamMiddleware,
+    ErrorHandlerMiddleware,
+    CallbackDispatchMiddleware,
+    UpdateSchedulerMiddleware,
+    MetricsMiddleware,
+    ApiMetricsMiddleware
+)
+
+# Метрики (Prometheus /metrics)
+from .metrics import registry, setup_metrics, start_metrics_server
+
+# Монитор event loop
+from .loop_monitor import LoopMonitor, setup_loop_monitor
+
+# Горячая перезагрузка банков вопросов
+from .bank_watcher import BankWatcher, setup_bank_watcher
+from .bank_audit import audit_banks, setup_bank_audit
 
 # Сертификаты
 from .certificates import generate_certificate
 
 # Статистика
-from .stats import stats_manager, StatsManager
+from .stats import (
+    stats_manager,
+    StatsManager,
+    item_analytics,
+    exposure_store,
+    review_store,
+    leaderboard_store
+)
+from .item_analytics import ItemAnalytics, ItemStats
+
+# Показанные вопросы (без повторов между попытками)
+from .exposure import ExposureStore, SeenQuestions, setup_exposure
+
+# Взвешенный выбор вопросов (таблицы псевдонимов)
+from .sampling import AliasTable, WeightedSampler, get_question_weights
+
+# Адаптивный режим
+from .adaptive import AdaptiveIndex, AdaptiveSession, start_adaptive_session
+
+# Тренировка (интервальное повторение ошибок)
+from .review import Card, ReviewStore, TrainingSession, start_training_session
+
+# Рейтинги сотрудников и подразделений
+from .leaderboard import LeaderboardStore, Ranking, leaderboard_text, setup_leaderboard
 
 # Напоминания
 from .reminders import ReminderService
 
+# Webhook-режим, многопроцессный режим и калибровка (NumPy) — ленивый импорт
+_LAZY_EXPORTS = {
+    "create_webhook_app": ".webhook",
+    "run_webhook": ".webhook",
+    "WorkerPool": ".sharding",
+    "run_supervisor": ".sharding",
+    "calibrate_specialization": ".calibration",
+    "CalibrationResult": ".calibration",
+}
+
+
+def __getattr__(name: str):
+    """Загрузка модуля режима запуска при первом обращении к имени."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 __all__ = [
     # Enum и модели
     "Difficulty",
@@ -51,34 +138,118 @@ __all__ = [
     
     # Загрузка вопросов
     "load_questions_for_specialization",
+    "QuestionBank",
+    "BankError",
+    "get_bank",
+    "compile_bank",
+    "preload_question_banks",
+    "setup_question_banks",
+    "CompiledQuestions",
+    "CompiledBankError",
     
     # Таймер
     "TestTimer",
     "create_timer",
     
+    # Callback data
+    "MenuAction",
+    "SpecCallback",
+    "DifficultyCallback",
+    "AnswerCallback",
+    "MenuCallback",
+    "CallbackDispatcher",
+    "callback_dispatcher",
+    
     # Клавиатуры
     "get_main_keyboard",
     "get_difficulty_keyboard",
     "get_test_keyboard",
     "get_finish_keyboard",
+    "get_training_finish_keyboard",
     
     # Логика теста
+    "format_question_text",
     "show_question",
     "handle_answer_toggle",
     "handle_next_question",
     "finish_test",
+    "finish_training",
     
     # Middlewares
     "AntiSpamMiddleware",
     "ErrorHandlerMiddleware",
+    "CallbackDispatchMiddleware",
+    "UpdateSchedulerMiddleware",
+    "MetricsMiddleware",
+    "ApiMetricsMiddleware",
+    
+    # Метрики
+    "registry",
+    "setup_metrics",
+    "start_metrics_server",
+    
+    # Монитор event loop
+    "LoopMonitor",
+    "setup_loop_monitor",
+    
+    # Горячая перезагрузка банков вопросов
+    "BankWatcher",
+    "setup_bank_watcher",
+    "audit_banks",
+    "setup_bank_audit",
     
     # Сертификаты
     "generate_certificate",
     
     # Статистика
     "stats_manager",
+    "item_analytics",
+    "ItemAnalytics",
+    "ItemStats",
     "StatsManager",
     
+    # Показанные вопросы
+    "exposure_store",
+    "ExposureStore",
+    "SeenQuestions",
+    "setup_exposure",
+    
+    # Взвешенный выбор вопросов
+    "AliasTable",
+    "WeightedSampler",
+    "get_question_weights",
+    
+    # Адаптивный режим
+    "AdaptiveIndex",
+    "AdaptiveSession",
+    "start_adaptive_session",
+    
+    # Тренировка
+    "review_store",
+    "Card",
+    "ReviewStore",
+    "TrainingSession",
+    "start_training_session",
+    
+    # Рейтинги
+    "leaderboard_store",
+    "LeaderboardStore",
+    "Ranking",
+    "leaderboard_text",
+    "setup_leaderboard",
+    
     # Напоминания
     "ReminderService",
+    
+    # Webhook
+    "create_webhook_app",
+    "run_webhook",
+    
+    # Многопроцессный режим
+    "WorkerPool",
+    "run_supervisor",
+    
+    # Калибровка вопросов
+    "calibrate_specialization",
+    "CalibrationResult",
 ]
@@ -0,0 +1,247 @@
+"""
+Адаптивный режим (CAT): следующий вопрос — самый информативный при текущей оценке θ.
+
+Параметры 2PL (a, b) берутся из калибровки (calibrate_items.py → item_calibration).
+Для версии банка один раз строится индекс информации (AdaptiveIndex): шкала θ
+разбита на корзины, в каждой откалиброванные вопросы отсортированы по убыванию
+информации Фишера I(θ) = a²·P·(1 - P) в центре корзины. Выбор вопроса — поиск
+корзины бинарным поиском O(log G) и первые непоказанные вопросы её списка, без
+обхода банка. Для контроля экспозиции вопрос берётся случайно из
+adaptive_randomesque самых информативных.
+
+θ оценивается EAP (апостериорное среднее) на сетке с априорным N(0, 1) — без
+NumPy, O(сетки) на ответ. Тест заканчивается, когда стандартная ошибка θ
+не больше adaptive_target_se (но не раньше adaptive_min_questions) или после
+difficulty_questions["адаптивный"] вопросов. Процент для оценки — ожидаемая
+доля верных ответов по всему откалиброванному банку при итоговом θ.
+"""
+import asyncio
+import logging
+import math
+import random
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from config.settings import settings
+from .enum import Difficulty
+from .models import Question, question_uid
+from .question_loader import QuestionBank
+from .stats import item_analytics
+
+logger = logging.getLogger(__name__)
+
+# Центры корзин индекса информации
+BUCKETS = tuple(-3.0 + 0.25 * i for i in range(25))
+# Границы между соседними корзинами (для bisect)
+BUCKET_EDGES = tuple((left + right) / 2 for left, right in zip(BUCKETS, BUCKETS[1:]))
+# Сетка EAP и логарифм априорной плотности N(0, 1)
+QUADRATURE = tuple(-4.0 + 0.2 * i for i in range(41))
+LOG_PRIOR = tuple(-x * x / 2 for x in QUADRATURE)
+
+
+def probability(a: float, b: float, theta: float) -> float:
+    """P(верно | θ) в модели 2PL."""
+    return 1 / (1 + math.exp(-a * (theta - b)))
+
+
+def information(a: float, b: float, theta: float) -> float:
+    """Информация Фишера вопроса 2PL при θ."""
+    p = probability(a, b, theta)
+    return a * a * p * (1 - p)
+
+
+class AdaptiveIndex:
+    """Откалиброванные вопросы версии банка и их ранжирование по корзинам θ."""
+    
+    __slots__ = ("specialization", "bank_version", "stamp", "positions", "uids", "a", "b", "ranked", "tcc")
+    
+    def __init__(self, bank: QuestionBank, params: Mapping[int, Tuple[float, float]], stamp: str = ""):
+        """
+        Args:
+            bank: Версия банка
+            params: uid → (a, b) из item_calibration
+            stamp: Время калибровки (для проверки актуальности кэша)
+        """
+        self.specialization = bank.specialization
+        self.bank_version = bank.version
+        self.stamp = stamp
+        self.positions = array("I")  # Позиция вопроса в банке
+        self.uids = array("q")
+        self.a = array("d")
+        self.b = array("d")
+        
+        for position, question in enumerate(bank.questions):
+            uid = question_uid(question.question, question.options)
+            item = params.get(uid)
+            if item is None:
+                continue
+            self.positions.append(position)
+            self.uids.append(uid)
+            self.a.append(item[0])
+            self.b.append(item[1])
+        
+        count = len(self.positions)
+        self.ranked: List[array] = []
+        self.tcc: List[float] = []  # Ожидаемая доля верных по банку в центрах корзин
+        for theta in BUCKETS:
+            info = [information(self.a[k], self.b[k], theta) for k in range(count)]
+            self.ranked.append(array("I", sorted(range(count), key=info.__getitem__, reverse=True)))
+            self.tcc.append(
+                sum(probability(self.a[k], self.b[k], theta) for k in range(count)) / count if count else 0.0
+            )
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def select(self, theta: float, used: Set[int], randomesque: int = 1) -> Optional[int]:
+        """
+        Самый информативный непоказанный вопрос при θ.
+        
+        Args:
+            theta: Текущая оценка θ
+            used: Уже показанные вопросы (номера в индексе)
+            randomesque: Выбор случайно из стольких лучших
+        
+        Returns:
+            Номер вопроса в индексе; None, если вопросы закончились
+        """
+        candidates = []
+        for k in self.ranked[bisect_right(BUCKET_EDGES, theta)]:
+            if k not in used:
+                candidates.append(k)
+                if len(candidates) >= randomesque:
+                    break
+        return random.choice(candidates) if candidates else None
+    
+    def domain_score(self, theta: float) -> float:
+        """Ожидаемая доля верных по всему банку при θ (линейная интерполяция по корзинам)."""
+        if theta <= BUCKETS[0]:
+            return self.tcc[0]
+        if theta >= BUCKETS[-1]:
+            return self.tcc[-1]
+        i = bisect_right(BUCKETS, theta) - 1
+        share = (theta - BUCKETS[i]) / (BUCKETS[i + 1] - BUCKETS[i])
+        return self.tcc[i] + (self.tcc[i + 1] - self.tcc[i]) * share
+
+
+class AdaptiveSession:
+    """Ход адаптивного теста: показанные вопросы и апостериорное распределение θ."""
+    
+    def __init__(
+        self,
+        index: AdaptiveIndex,
+        bank: QuestionBank,
+        max_questions: int,
+        min_questions: int,
+        target_se: float,
+        randomesque: int = 1
+    ):
+        self.index = index
+        self.bank = bank
+        self.max_questions = max_questions
+        self.min_questions = min_questions
+        self.target_se = target_se
+        self.randomesque = randomesque
+        
+        self.items: List[int] = []  # Номера показанных вопросов в индексе (по порядку)
+        self.used: Set[int] = set()
+        self.log_posterior = list(LOG_PRIOR)
+        self.theta = 0.0
+        self.se = 1.0
+    
+    def _estimate(self):
+        """EAP: θ — апостериорное среднее, se — апостериорное стандартное отклонение."""
+        peak = max(self.log_posterior)
+        weights = [math.exp(value - peak) for value in self.log_posterior]
+        total = sum(weights)
+        mean = sum(w * x for w, x in zip(weights, QUADRATURE)) / total
+        variance = sum(w * (x - mean) ** 2 for w, x in zip(weights, QUADRATURE)) / total
+        self.theta, self.se = mean, math.sqrt(variance)
+    
+    def next_question(self) -> Optional[Question]:
+        """Выбрать следующий вопрос при текущем θ (None — вопросы закончились)."""
+        k = self.index.select(self.theta, self.used, self.randomesque)
+        if k is None:
+            return None
+        self.items.append(k)
+        self.used.add(k)
+        question = self.bank.questions[self.index.positions[k]]
+        return question.model_copy(update={"uid": self.index.uids[k]})
+    
+    def finished(self) -> bool:
+        answered = len(self.items)
+        return answered >= self.max_questions or (answered >= self.min_questions and self.se <= self.target_se)
+    
+    def record(self, k: int, correct: bool):
+        """Обновить апостериорное распределение θ ответом на вопрос k индекса."""
+        a, b = self.index.a[k], self.index.b[k]
+        for i, theta in enumerate(QUADRATURE):
+            p = probability(a, b, theta)
+            self.log_posterior[i] += math.log(max(p if correct else 1 - p, 1e-12))
+        self._estimate()
+    
+    def answer(self, correct: bool) -> Optional[Question]:
+        """
+        Учесть ответ на последний показанный вопрос.
+        
+        Returns:
+            Следующий вопрос; None — тест окончен
+        """
+        self.record(self.items[-1], correct)
+        return None if self.finished() else self.next_question()
+    
+    def domain_score(self) -> float:
+        return self.index.domain_score(self.theta)
+
+
+# Индексы по специализациям (последняя версия банка и калибровки)
+_indexes: Dict[str, AdaptiveIndex] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def get_adaptive_index(bank: QuestionBank) -> Optional[AdaptiveIndex]:
+    """
+    Индекс информации для версии банка; строится в пуле потоков при смене
+    версии банка или калибровки.
+    
+    Returns:
+        None, если откалиброванных вопросов меньше adaptive_min_calibrated
+    """
+    specialization = bank.specialization
+    stamp = await item_analytics.get_calibration_stamp(specialization)
+    if stamp is None:
+        return None
+    
+    async with _locks.setdefault(specialization, asyncio.Lock()):
+        index = _indexes.get(specialization)
+        if index is None or index.bank_version != bank.version or index.stamp != stamp:
+            params = await item_analytics.get_calibration(specialization)
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(None, AdaptiveIndex, bank, params, stamp)
+            _indexes[specialization] = index
+            logger.info(
+                f"🎯 Индекс адаптивного режима {specialization}: {len(index)} из {len(bank)} "
+                f"вопросов откалиброваны (банк v{bank.version}, калибровка {stamp})"
+            )
+    return index if len(index) >= settings.adaptive_min_calibrated else None
+
+
+async def start_adaptive_session(bank: QuestionBank) -> Optional[AdaptiveSession]:
+    """
+    Новый адаптивный тест (первый вопрос — session.next_question()).
+    
+    Returns:
+        None, если банк не откалиброван для адаптивного режима
+    """
+    index = await get_adaptive_index(bank)
+    if index is None:
+        return None
+    return AdaptiveSession(
+        index,
+        bank,
+        max_questions=min(settings.difficulty_questions.get(Difficulty.ADAPTIVE.value, 30), len(index)),
+        min_questions=settings.adaptive_min_questions,
+        target_se=settings.adaptive_target_se,
+        randomesque=settings.adaptive_randomesque
+    )
@@ -0,0 +1,267 @@
+"""
+Аудит банков вопросов: точные и почти-дубликаты внутри и между специализациями.
+
+Попарное сравнение всех вопросов — O(N²), поэтому:
+    1. точные дубликаты — по отпечатку нормализованного текста (bank_import.fingerprint);
+    2. для уникальных вопросов — MinHash-сигнатура по символьным 5-граммам
+       (one permutation hashing: один хэш на шингл, 64 корзины + уплотнение пустых);
+    3. LSH: сигнатура делится на полосы, вопросы с одинаковой полосой — кандидаты.
+       В каждой полосе вопрос сравнивается только с первым вопросом своей корзины,
+       поэтому проход по полосе — O(N) по времени и памяти;
+    4. кандидаты проверяются оценкой сходства Жаккара по сигнатурам и
+       объединяются в группы (union-find).
+
+Используется из audit_banks.py (CLI) и при старте (предупреждение в лог).
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+from .bank_import import fingerprint
+from .question_loader import QuestionBank, get_bank
+
+logger = logging.getLogger(__name__)
+
+BINS = 64
+BIN_SHIFT = 58  # Старшие 6 бит 64-битного хэша — номер корзины
+VALUE_MASK = 0xFFFFFFFF
+EMPTY = VALUE_MASK + 1
+ROTATION = 0x9E3779B1  # Смещение при заимствовании значения соседней корзины
+SHINGLE = 5
+
+# (специализация, индекс вопроса в банке)
+Member = Tuple[str, int]
+
+
+class DuplicateGroup:
+    """Группа совпадающих или похожих вопросов."""
+    
+    __slots__ = ("members", "exact", "similarity", "sample")
+    
+    def __init__(self, members: List[Member], exact: bool, similarity: float, sample: str = ""):
+        self.members = members
+        self.exact = exact
+        self.similarity = similarity  # Минимальная оценка сходства внутри группы
+        self.sample = sample  # Текст первого вопроса группы
+    
+    @property
+    def specializations(self) -> Set[str]:
+        return {spec for spec, _ in self.members}
+    
+    @property
+    def cross_spec(self) -> bool:
+        return len(self.specializations) > 1
+    
+    def describe(self, limit: int = 8) -> str:
+        kind = "точные" if self.exact else f"похожие (≥{self.similarity:.2f})"
+        members = ", ".join(f"{spec}#{index + 1}" for spec, index in self.members[:limit])
+        more = f" и ещё {len(self.members) - limit}" if len(self.members) > limit else ""
+        return f"{kind}: «{self.sample[:80]}» — {members}{more}"
+
+
+class AuditReport:
+    """Итоги аудита банков."""
+    
+    __slots__ = ("groups", "questions", "unique", "candidates", "elapsed")
+    
+    def __init__(self, groups: List[DuplicateGroup], questions: int, unique: int, candidates: int, elapsed: float):
+        self.groups = groups
+        self.questions = questions
+        self.unique = unique
+        self.candidates = candidates
+        self.elapsed = elapsed
+    
+    @property
+    def exact_groups(self) -> List[DuplicateGroup]:
+        return [g for g in self.groups if g.exact]
+    
+    @property
+    def near_groups(self) -> List[DuplicateGroup]:
+        return [g for g in self.groups if not g.exact]
+    
+    def summary(self) -> str:
+        exact, near = self.exact_groups, self.near_groups
+        return (
+            f"вопросов {self.questions} (уникальных {self.unique}); "
+            f"точных дубликатов: {len(exact)} групп / {sum(len(g.members) for g in exact)} вопросов, "
+            f"похожих: {len(near)} групп / {sum(len(g.members) for g in near)} вопросов, "
+            f"между специализациями: {sum(g.cross_spec for g in self.groups)} групп"
+        )
+
+
+def question_text(question) -> str:
+    """Нормализованный текст для шинглов: вопрос + варианты в порядке сортировки."""
+    parts = [question.question, *sorted(question.options)]
+    return " ".join(" ".join(parts).split()).casefold()
+
+
+def minhash(text: str) -> array:
+    """
+    MinHash-сигнатура из BINS значений (one permutation hashing).
+    
+    Пустые корзины (короткий текст) заполняются значением ближайшей
+    непустой корзины справа со смещением по расстоянию — одинаково
+    для одинаковых наборов шинглов, поэтому оценка сходства сохраняется.
+    """
+    shingles = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)} or {text}
+    signature = [EMPTY] * BINS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        b = h >> BIN_SHIFT
+        value = (h >> 26) & VALUE_MASK
+        if value < signature[b]:
+            signature[b] = value
+    
+    if EMPTY in signature:
+        # Обход справа налево по двум кругам: next_filled — ближайшая непустая справа
+        raw = signature[:]
+        next_filled = 0
+        for i in range(2 * BINS - 1, -1, -1):
+            if raw[i % BINS] != EMPTY:
+                next_filled = i
+            elif i < BINS:
+                distance = next_filled - i
+                signature[i] = (raw[next_filled % BINS] + distance * ROTATION) & VALUE_MASK
+    return array("I", signature)
+
+
+def estimate_similarity(signatures: array, a: int, b: int) -> float:
+    """Оценка сходства Жаккара: доля совпавших корзин."""
+    sa = signatures[a * BINS:(a + 1) * BINS]
+    sb = signatures[b * BINS:(b + 1) * BINS]
+    return sum(x == y for x, y in zip(sa, sb)) / BINS
+
+
+def audit_banks(
+    banks: Iterable[QuestionBank],
+    threshold: float = 0.8,
+    bands: int = 16
+) -> AuditReport:
+    """
+    Найти точные и почти-дубликаты во всех банках.
+    
+    Args:
+        banks: Банки специализаций
+        threshold: Минимальная оценка сходства Жаккара для почти-дубликатов
+        bands: Число полос LSH (BINS / bands значений в полосе)
+    
+    Returns:
+        AuditReport с группами дубликатов
+    """
+    start = time.perf_counter()
+    rows = BINS // bands
+    
+    # 1. Точные дубликаты: отпечаток → представитель
+    exact: Dict[bytes, int] = {}
+    copies: List[List[Member]] = []  # представитель → все его копии
+    texts: List[str] = []
+    samples: List[str] = []
+    total = 0
+    for bank in banks:
+        for index, question in enumerate(bank.questions):
+            total += 1
+            key = fingerprint(question.question, question.options)
+            rep = exact.get(key)
+            if rep is None:
+                rep = exact[key] = len(copies)
+                copies.append([])
+                texts.append(question_text(question))
+                samples.append(question.question)
+            copies[rep].append((bank.specialization, index))
+    del exact
+    
+    # 2. Сигнатуры представителей одним плоским массивом
+    n = len(texts)
+    signatures = array("I")
+    for text in texts:
+        signatures.extend(minhash(text))
+    del texts
+    
+    # 3-4. LSH по полосам + проверка кандидатов, union-find
+    parent = list(range(n))
+    similarity = [1.0] * n  # Минимальное сходство рёбер группы (по корню)
+    
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    checked: Set[Tuple[int, int]] = set()
+    candidates = 0
+    for band in range(bands):
+        anchors: Dict[bytes, int] = {}
+        offset = band * rows
+        for doc in range(n):
+            base = doc * BINS + offset
+            anchor = anchors.setdefault(signatures[base:base + rows].tobytes(), doc)
+            if anchor == doc or (anchor, doc) in checked:
+                continue
+            checked.add((anchor, doc))
+            candidates += 1
+            score = estimate_similarity(signatures, anchor, doc)
+            if score < threshold:
+                continue
+            ra, rd = find(anchor), find(doc)
+            if ra != rd:
+                parent[rd] = ra
+                similarity[ra] = min(similarity[ra], similarity[rd], score)
+            else:
+                similarity[ra] = min(similarity[ra], score)
+    
+    clusters: Dict[int, List[int]] = {}
+    for doc in range(n):
+        clusters.setdefault(find(doc), []).append(doc)
+    
+    groups = []
+    for root, docs in clusters.items():
+        members = [member for doc in docs for member in copies[doc]]
+        if len(members) < 2:
+            continue
+        is_exact = len(docs) == 1
+        groups.append(DuplicateGroup(
+            members, is_exact, 1.0 if is_exact else similarity[root], samples[docs[0]]
+        ))
+    groups.sort(key=lambda g: (not g.exact, -len(g.members)))
+    
+    return AuditReport(groups, total, n, candidates, time.perf_counter() - start)
+
+
+def setup_bank_audit(dispatcher: Dispatcher):
+    """
+    Аудит дубликатов после прогрева банков (регистрировать после setup_question_banks).
+    Выполняется в фоне в пуле потоков и не задерживает старт; итог — предупреждение в лог.
+    """
+    if not settings.bank_audit_on_startup:
+        return
+    
+    task: Dict[str, Optional[asyncio.Task]] = {"audit": None}
+    
+    async def run_audit():
+        banks = [bank for bank in map(get_bank, settings.specializations) if bank is not None]
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(None, audit_banks, banks, settings.bank_audit_threshold)
+        if not report.groups:
+            logger.info(f"✅ Аудит банков: дубликатов нет ({report.questions} вопросов, {report.elapsed:.1f} с)")
+            return
+        logger.warning(f"⚠️ Аудит банков: {report.summary()} ({report.elapsed:.1f} с)")
+        for group in report.groups[:5]:
+            logger.warning(f"⚠️   {group.describe()}")
+        if len(report.groups) > 5:
+            logger.warning("⚠️   полный список: python audit_banks.py")
+    
+    async def on_startup():
+        task["audit"] = asyncio.create_task(run_audit())
+    
+    async def on_shutdown():
+        if task["audit"] and not task["audit"].done():
+            task["audit"].cancel()
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
@@ -0,0 +1,286 @@
+"""
+Скомпилированный бинарный формат банка вопросов (.qbank) и его загрузка через mmap.
+
+Исходный формат банков — JSON (questions/<spec>.json); compile_banks.py
+собирает из него .qbank. Файл открывается через mmap только на чтение:
+страницы берутся из page cache и общие для всех процессов-воркеров,
+вопрос декодируется лишь при обращении по индексу.
+
+Раскладка файла (little-endian):
+    заголовок   HEADER (40 байт): magic, версия, флаги, число вопросов, число строк,
+                пропущено при компиляции, mtime_ns и размер исходного JSON
+    записи      RECORD × count: id строки вопроса, id первого варианта,
+                число вариантов, битовая маска правильных ответов, код сложности
+                (индекс в DIFFICULTY_LEVELS, 0 — не размечена), id строки меток (тема и теги через \x1f; NO_LABELS — меток нет)
+    смещения    u32 × (strings + 1): начало каждой строки в таблице строк
+    строки      UTF-8 без разделителей (одинаковые строки хранятся один раз)
+
+Варианты вопроса лежат в таблице строк подряд: first_option .. first_option + n - 1.
+Бит i маски (0-based) означает, что вариант i + 1 правильный.
+Строка меток: первая — тема (может быть пустой), дальше теги; одинаковые
+наборы меток хранятся один раз, индекс меток строится без декодирования вопросов.
+Коды сложности читаются из записей так же, без декодирования (level_codes).
+Файлы без флага FLAG_DIFFICULTY (собранные до разметки сложности) читаются
+как банки без сложности: поле кода в них всегда 0.
+"""
+import mmap
+import os
+import struct
+from pathlib import Path
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, overload
+
+from .enum import Difficulty
+from .models import Question, question_labels
+
+MAGIC = b"QBNK"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHHIIIqQ4x")
+RECORD = struct.Struct("<IIBBHI")
+NO_LABELS = 0xFFFFFFFF
+# Флаги заголовка
+FLAG_LABELS = 0x1  # Есть вопросы с метками
+FLAG_DIFFICULTY = 0x2  # Есть вопросы с размеченной сложностью
+# Код сложности в записи → уровень (0 — сложность не размечена)
+DIFFICULTY_LEVELS = (None, Difficulty.RESERVE, Difficulty.BASIC, Difficulty.STANDARD, Difficulty.ADVANCED)
+DIFFICULTY_CODES = {level: code for code, level in enumerate(DIFFICULTY_LEVELS)}
+LABEL_SEPARATOR = "\x1f"
+OFFSET = struct.Struct("<I")
+OFFSET_PAIR = struct.Struct("<II")
+
+
+class CompiledBankError(ValueError):
+    """Файл .qbank повреждён, другой версии или устарел относительно JSON."""
+
+
+def write_compiled_bank(
+    path: Path,
+    questions: Sequence[Question],
+    source: Path,
+    skipped: int = 0
+) -> int:
+    """
+    Записать банк в формате .qbank (атомарно: временный файл + os.replace).
+    
+    Уже открытые mmap старого файла продолжают работать: они ссылаются
+    на прежний inode.
+    
+    Args:
+        path: Путь к файлу .qbank
+        questions: Проверенные вопросы банка
+        source: Исходный JSON (его mtime и размер пишутся в заголовок)
+        skipped: Сколько некорректных вопросов пропущено при разборе JSON
+    
+    Returns:
+        Размер записанного файла в байтах
+    """
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+    
+    def intern(value: str) -> int:
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return sid
+    
+    records = bytearray()
+    flags = 0
+    for question in questions:
+        text_id = intern(question.question)
+        # Варианты должны идти подряд, поэтому не дедуплицируются
+        first_option = len(strings)
+        for option in question.options:
+            strings.append(option.encode("utf-8"))
+        mask = 0
+        for answer in question.correct_answers:
+            mask |= 1 << (answer - 1)
+        labels_id = NO_LABELS
+        if question.topic or question.tags:
+            labels_id = intern(LABEL_SEPARATOR.join([question.topic, *question.tags]))
+            flags |= FLAG_LABELS
+        level = DIFFICULTY_CODES[question.difficulty]
+        if level:
+            flags |= FLAG_DIFFICULTY
+        records += RECORD.pack(text_id, first_option, len(question.options), mask, level, labels_id)
+    
+    offsets = bytearray()
+    position = 0
+    for data in strings:
+        offsets += OFFSET.pack(position)
+        position += len(data)
+    offsets += OFFSET.pack(position)
+    
+    stat = source.stat()
+    header = HEADER.pack(
+        MAGIC, VERSION, flags, len(questions), len(strings), skipped,
+        stat.st_mtime_ns, stat.st_size
+    )
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(header)
+        f.write(records)
+        f.write(offsets)
+        f.writelines(strings)
+    os.replace(tmp_path, path)
+    return HEADER.size + len(records) + len(offsets) + position
+
+
+class CompiledQuestions(Sequence[Question]):
+    """
+    Вопросы банка .qbank поверх mmap: декодирование по индексу при обращении.
+    
+    Неизменяемая последовательность; файл остаётся отображённым, пока жив объект.
+    """
+    
+    __slots__ = ("path", "skipped", "source_mtime_ns", "source_size", "flags",
+                 "_mmap", "_view", "_count", "_records", "_offsets", "_strings")
+    
+    def __init__(self, path: Path):
+        """
+        Открыть и проверить файл .qbank.
+        
+        Raises:
+            CompiledBankError: неверный magic/версия или размеры секций
+        """
+        self.path = path
+        with path.open("rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # пустой файл
+                raise CompiledBankError(f"Пустой файл {path}") from e
+        
+        if len(self._mmap) < HEADER.size:
+            raise CompiledBankError(f"Файл {path} короче заголовка")
+        magic, version, flags, count, string_count, skipped, mtime_ns, size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise CompiledBankError(f"{path}: неподдерживаемый формат {magic!r} v{version}")
+        
+        self._count = count
+        self.flags = flags
+        self.skipped = skipped
+        self.source_mtime_ns = mtime_ns
+        self.source_size = size
+        self._records = HEADER.size
+        self._offsets = self._records + count * RECORD.size
+        self._strings = self._offsets + (string_count + 1) * OFFSET.size
+        
+        if len(self._mmap) < self._strings:
+            raise CompiledBankError(f"{path}: файл обрезан")
+        (strings_size,) = OFFSET.unpack_from(self._mmap, self._strings - OFFSET.size)
+        if len(self._mmap) != self._strings + strings_size:
+            raise CompiledBankError(f"{path}: размер таблицы строк не совпадает")
+        
+        self._view = memoryview(self._mmap)
+    
+    def is_fresh(self, source: Path) -> bool:
+        """Совпадают ли mtime и размер исходного JSON с записанными при компиляции."""
+        try:
+            stat = source.stat()
+        except OSError:
+            return False
+        return stat.st_mtime_ns == self.source_mtime_ns and stat.st_size == self.source_size
+    
+    def _string(self, sid: int) -> str:
+        start, end = OFFSET_PAIR.unpack_from(self._mmap, self._offsets + sid * OFFSET.size)
+        # Декодирование прямо из отображённых страниц, без промежуточного bytes
+        return str(self._view[self._strings + start:self._strings + end], "utf-8")
+    
+    def _decode(self, index: int) -> Question:
+        text_id, first_option, n_options, mask, level, labels_id = RECORD.unpack_from(
+            self._mmap, self._records + index * RECORD.size
+        )
+        topic, tags = "", []
+        if labels_id != NO_LABELS:
+            topic, *tags = self._string(labels_id).split(LABEL_SEPARATOR)
+        # Вопросы проверены при компиляции — повторная валидация не нужна
+        return Question.model_construct(
+            question=self._string(text_id),
+            options=[self._string(first_option + i) for i in range(n_options)],
+            correct_answers={i + 1 for i in range(n_options) if mask >> i & 1},
+            difficulty=DIFFICULTY_LEVELS[level],
+            topic=topic,
+            tags=tags
+        )
+    
+    def tag_index(self) -> Dict[str, array]:
+        """
+        Метка → позиции вопросов (по записям, без декодирования вопросов;
+        каждая различная строка меток декодируется один раз).
+        """
+        if not self.flags & FLAG_LABELS:
+            return {}
+        by_labels: Dict[int, array] = {}
+        records = self._view[self._records:self._offsets]
+        for position, record in enumerate(RECORD.iter_unpack(records)):
+            labels_id = record[5]
+            if labels_id != NO_LABELS:
+                by_labels.setdefault(labels_id, array("I")).append(position)
+        
+        index: Dict[str, array] = {}
+        for labels_id, positions in by_labels.items():
+            topic, *tags = self._string(labels_id).split(LABEL_SEPARATOR)
+            for label in question_labels(topic, tags):
+                index.setdefault(label, array("I")).extend(positions)
+        return index
+    
+    def level_codes(self) -> Optional[bytes]:
+        """
+        Коды сложности всех вопросов по позициям (по записям, без декодирования);
+        None — в банке нет вопросов с размеченной сложностью.
+        
+        Raises:
+            CompiledBankError: код вне DIFFICULTY_LEVELS
+        """
+        if not self.flags & FLAG_DIFFICULTY:
+            return None
+        records = self._view[self._records:self._offsets]
+        codes = bytes(record[4] for record in RECORD.iter_unpack(records))
+        if max(codes, default=0) >= len(DIFFICULTY_LEVELS):
+            raise CompiledBankError(f"{self.path}: неизвестный код сложности {max(codes)}")
+        return codes
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @overload
+    def __getitem__(self, index: int) -> Question: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> List[Question]: ...
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("индекс вопроса вне банка")
+        return self._decode(index)
+    
+    def __iter__(self) -> Iterator[Question]:
+        for i in range(self._count):
+            yield self._decode(i)
+    
+    @property
+    def nbytes(self) -> int:
+        """Размер отображённого файла."""
+        return len(self._mmap)
+
+
+def open_compiled_bank(path: Path, source: Path) -> Tuple[CompiledQuestions, bool]:
+    """
+    Открыть .qbank и проверить актуальность относительно JSON.
+    
+    Returns:
+        (вопросы, актуален ли файл)
+    
+    Raises:
+        CompiledBankError: файл повреждён
+        OSError: файл не читается
+    """
+    questions = CompiledQuestions(path)
+    return questions, questions.is_fresh(source)
@@ -0,0 +1,440 @@
+"""
+Потоковый импорт банков вопросов из CSV/XLSX (таблицы методистов).
+
+Строки читаются по одной (csv.reader / iterparse листа XLSX), проверяются
+моделью Question, дубликаты отбрасываются по 16-байтному отпечатку
+нормализованного текста, принятые вопросы сразу дописываются в JSON.
+В памяти — только отпечатки уникальных вопросов, не строки таблицы.
+
+Формат таблицы: первая строка — заголовки (регистр не важен):
+    вопрос | question                           текст вопроса
+    вариант 1..6 | option_1..option_6           варианты ответа (пустые пропускаются)
+    правильные | correct | correct_answers      номера правильных: "1,3" / "1;3" / "1 3"
+    тема | topic (необязательно)                тема вопроса для планов экзамена
+    теги | tags (необязательно)                 метки через запятую или «;»
+    сложность | difficulty (необязательно)      резерв / базовый / стандартный / продвинутый
+
+XLSX читается без сторонних библиотек (zipfile + xml.etree.iterparse):
+первый лист книги, общие строки (sharedStrings) и inline-строки.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+from pydantic import ValidationError
+
+from config.settings import settings
+from .models import Question
+
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+HEADER_ALIASES = {
+    "question": "question",
+    "вопрос": "question",
+    "текст вопроса": "question",
+    "correct": "correct",
+    "correct_answers": "correct",
+    "правильные": "correct",
+    "правильные ответы": "correct",
+    "ответ": "correct",
+    "topic": "topic",
+    "тема": "topic",
+    "раздел": "topic",
+    "tags": "tags",
+    "теги": "tags",
+    "метки": "tags",
+    "difficulty": "difficulty",
+    "сложность": "difficulty",
+    "уровень": "difficulty",
+}
+OPTION_HEADER = re.compile(r"^(?:option|вариант)[ _]?([1-6])$")
+ANSWER_SPLIT = re.compile(r"[,;\s]+")
+TAG_SPLIT = re.compile(r"[,;]")
+WHITESPACE = re.compile(r"\s+")
+
+Row = Tuple[int, List[str]]
+# Поля элемента JSON банка, которые пишутся без json.dumps
+REQUIRED_FIELDS = frozenset(("question", "options", "correct_answers"))
+OPTIONAL_FIELDS = frozenset(("topic", "tags", "difficulty"))
+# (вопрос, варианты по порядку, правильные, тема, теги, сложность); -1 — столбца нет
+Columns = Tuple[int, List[int], int, int, int, int]
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class BankImportError(ValueError):
+    """Таблица не читается или в ней нет нужных столбцов."""
+
+
+class ImportReport:
+    """Итоги импорта: счётчики строк и причины отказов."""
+    
+    __slots__ = ("source", "output", "rows", "imported", "kept", "duplicates", "reasons", "elapsed")
+    
+    def __init__(self, source: Path, output: Path):
+        self.source = source
+        self.output = output
+        self.rows = 0
+        self.imported = 0
+        self.kept = 0  # Вопросы прежнего банка (--append)
+        self.duplicates = 0
+        self.reasons: Counter = Counter()
+        self.elapsed = 0.0
+    
+    @property
+    def rejected(self) -> int:
+        return sum(self.reasons.values())
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+# === ЧТЕНИЕ ТАБЛИЦ ===
+
+def iter_csv_rows(path: Path) -> Iterator[Row]:
+    """Строки CSV (кодировка UTF-8, разделитель определяется по началу файла)."""
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for number, row in enumerate(csv.reader(f, dialect), start=1):
+            yield number, row
+
+
+def _column_index(ref: str) -> int:
+    """Номер столбца по ссылке ячейки: "AB12" → 27 (0-based)."""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _read_shared_strings(book: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in book.namelist():
+        return []
+    strings = []
+    with book.open("xl/sharedStrings.xml") as f:
+        for _, elem in iterparse(f):
+            if elem.tag == f"{XLSX_NS}si":
+                strings.append("".join(t.text or "" for t in elem.iter(f"{XLSX_NS}t")))
+                elem.clear()
+    return strings
+
+
+def _first_sheet(book: zipfile.ZipFile) -> str:
+    sheets = sorted(
+        name for name in book.namelist()
+        if name.startswith("xl/worksheets/") and name.endswith(".xml")
+    )
+    if "xl/worksheets/sheet1.xml" in sheets:
+        return "xl/worksheets/sheet1.xml"
+    if not sheets:
+        raise BankImportError("В книге XLSX нет листов")
+    return sheets[0]
+
+
+def iter_xlsx_rows(path: Path) -> Iterator[Row]:
+    """Строки первого листа XLSX; обработанные элементы сразу освобождаются."""
+    try:
+        book = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise BankImportError(f"{path.name}: не XLSX ({e})") from e
+    
+    with book:
+        shared = _read_shared_strings(book)
+        with book.open(_first_sheet(book)) as f:
+            sheet_data = None
+            number = 0
+            for event, elem in iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == f"{XLSX_NS}sheetData":
+                        sheet_data = elem
+                    continue
+                if elem.tag != f"{XLSX_NS}row":
+                    continue
+                
+                cells: List[str] = []
+                for cell in elem.iter(f"{XLSX_NS}c"):
+                    kind = cell.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(f"{XLSX_NS}t"))
+                    else:
+                        raw = cell.findtext(f"{XLSX_NS}v") or ""
+                        value = shared[int(raw)] if kind == "s" and raw else raw
+                    ref = cell.get("r")
+                    column = _column_index(ref) if ref else len(cells)
+                    if column >= len(cells):
+                        cells.extend([""] * (column - len(cells) + 1))
+                    cells[column] = value
+                
+                # Атрибут r необязателен: без него строка следует за предыдущей
+                number = int(elem.get("r") or number + 1)
+                yield number, cells
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+def iter_rows(path: Path) -> Iterator[Row]:
+    """Строки таблицы по расширению файла (.csv / .xlsx)."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return iter_csv_rows(path)
+    if suffix == ".xlsx":
+        return iter_xlsx_rows(path)
+    raise BankImportError(f"Неподдерживаемый формат {path.name}: нужен .csv или .xlsx")
+
+
+# === РАЗБОР СТРОК ===
+
+def map_header(header: List[str]) -> Columns:
+    """
+    Номера столбцов по строке заголовков.
+    
+    Returns:
+        (столбец вопроса, столбцы вариантов по порядку, столбец правильных ответов,
+        столбец темы, столбец тегов, столбец сложности); необязательных столбцов нет — -1
+    
+    Raises:
+        BankImportError: нет столбца вопроса, правильных ответов или вариантов
+    """
+    question = correct = topic = tags = difficulty = -1
+    options: Dict[int, int] = {}
+    for column, title in enumerate(header):
+        title = WHITESPACE.sub(" ", title.strip().lower())
+        field = HEADER_ALIASES.get(title)
+        if field == "question":
+            question = column
+        elif field == "correct":
+            correct = column
+        elif field == "topic":
+            topic = column
+        elif field == "tags":
+            tags = column
+        elif field == "difficulty":
+            difficulty = column
+        else:
+            match = OPTION_HEADER.match(title)
+            if match:
+                options[int(match.group(1))] = column
+    
+    if question < 0 or correct < 0 or len(options) < 3:
+        raise BankImportError(
+            "Не найдены столбцы: нужны «вопрос», «вариант 1..6» (не меньше трёх) и «правильные»"
+        )
+    return question, [options[n] for n in sorted(options)], correct, topic, tags, difficulty
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def fingerprint(question: str, options: List[str]) -> bytes:
+    """Отпечаток вопроса для дедупликации: регистр, пробелы и порядок вариантов не важны."""
+    key = "\x1f".join([_normalize(question), *sorted(_normalize(o) for o in options)])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+def parse_row(cells: List[str], columns: Columns) -> Tuple[Optional[dict], str]:
+    """
+    Строка таблицы → элемент JSON банка.
+    
+    Returns:
+        (элемент, "") или (None, причина отказа)
+    """
+    question_col, option_cols, correct_col, topic_col, tags_col, difficulty_col = columns
+    
+    def cell(column: int) -> str:
+        return cells[column].strip() if 0 <= column < len(cells) else ""
+    
+    text = cell(question_col)
+    options = [value for value in map(cell, option_cols) if value]
+    raw_correct = cell(correct_col)
+    
+    if not text:
+        return None, "нет текста вопроса"
+    if len(options) < 3:
+        return None, "меньше трёх вариантов"
+    
+    correct = set()
+    for part in ANSWER_SPLIT.split(raw_correct):
+        if part:
+            # Числовые ячейки XLSX приходят как "2" или "2.0"
+            number = part[:-2] if part.endswith(".0") else part
+            if not number.isdigit():
+                return None, f"неверный номер ответа «{part}»"
+            correct.add(int(number))
+    if not correct:
+        return None, "нет правильных ответов"
+    
+    topic = cell(topic_col)
+    tags = [tag.strip() for tag in TAG_SPLIT.split(cell(tags_col)) if tag.strip()]
+    
+    try:
+        parsed = Question(
+            question=text, options=options, correct_answers=correct,
+            difficulty=cell(difficulty_col), topic=topic, tags=tags
+        )
+    except ValidationError as e:
+        error = e.errors()[0]
+        return None, f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+    
+    item = {
+        "question": text,
+        "options": options,
+        "correct_answers": ",".join(map(str, sorted(correct)))
+    }
+    if topic:
+        item["topic"] = topic
+    if tags:
+        item["tags"] = tags
+    if parsed.difficulty:
+        item["difficulty"] = parsed.difficulty.value
+    return item, ""
+
+
+# === ИМПОРТ ===
+
+class _JsonArrayWriter:
+    """
+    Потоковая запись JSON-массива в стиле файлов questions/*.json (отступ 2).
+    
+    Раскладка элемента задана явно: json.dumps с indent переключается на
+    медленный кодировщик на Python, а строки кодируются C-кодировщиком.
+    """
+    
+    def __init__(self, f):
+        self._f = f
+        self._first = True
+        f.write("[")
+    
+    def write(self, item: dict):
+        if REQUIRED_FIELDS <= item.keys() <= REQUIRED_FIELDS | OPTIONAL_FIELDS:
+            options = ",\n      ".join(map(_encode, item["options"]))
+            text = (
+                f'{{\n    "question": {_encode(item["question"])},'
+                f'\n    "options": [\n      {options}\n    ],'
+                f'\n    "correct_answers": {_encode(item["correct_answers"])}'
+            )
+            if "topic" in item:
+                text += f',\n    "topic": {_encode(item["topic"])}'
+            if "tags" in item:
+                text += f',\n    "tags": {_encode(item["tags"])}'
+            if "difficulty" in item:
+                text += f',\n    "difficulty": {_encode(item["difficulty"])}'
+            text += "\n  }"
+        else:
+            # Элементы прежнего банка (--append) могут содержать другие поля
+            text = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        self._f.write(("\n  " if self._first else ",\n  ") + text)
+        self._first = False
+    
+    def close(self):
+        self._f.write("\n]\n")
+
+
+def import_bank(
+    source: Path,
+    specialization: str,
+    append: bool = False,
+    rejects_path: Optional[Path] = None,
+    dry_run: bool = False
+) -> ImportReport:
+    """
+    Импорт таблицы в questions/<specialization>.json.
+    
+    JSON пишется во временный файл и подменяется атомарно (os.replace),
+    поэтому наблюдатель банков увидит только готовый файл.
+    
+    Args:
+        source: Файл .csv или .xlsx
+        specialization: Специализация (имя JSON банка)
+        append: Сохранить вопросы текущего банка и добавить новые
+        rejects_path: CSV с отклонёнными строками (номер строки, причина)
+        dry_run: Только проверка, без записи банка
+    
+    Returns:
+        ImportReport
+    
+    Raises:
+        BankImportError: таблица не читается, нет нужных столбцов или корректных строк
+    """
+    start = time.perf_counter()
+    output = settings.questions_dir / f"{specialization}.json"
+    report = ImportReport(source, output)
+    seen: Dict[bytes, int] = {}
+    
+    rows = iter_rows(source)
+    header = next(rows, None)
+    if header is None:
+        raise BankImportError(f"{source.name}: пустая таблица")
+    columns = map_header(header[1])
+    
+    tmp_path = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    out = open(os.devnull if dry_run else tmp_path, "w", encoding="utf-8")
+    rejects = rejects_path.open("w", encoding="utf-8", newline="") if rejects_path else None
+    try:
+        writer = _JsonArrayWriter(out)
+        rejects_writer = csv.writer(rejects) if rejects else None
+        if rejects_writer:
+            rejects_writer.writerow(["строка", "причина"])
+        
+        if append and output.exists():
+            with output.open("r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    seen.setdefault(fingerprint(item.get("question", ""), item.get("options", [])), 0)
+                    writer.write(item)
+                    report.kept += 1
+        
+        for number, cells in rows:
+            if not any(value.strip() for value in cells):
+                continue
+            report.rows += 1
+            item, reason = parse_row(cells, columns)
+            if item is not None:
+                key = fingerprint(item["question"], item["options"])
+                first = seen.setdefault(key, number)
+                if first != number:
+                    report.duplicates += 1
+                    reason = f"дубликат строки {first}" if first else "дубликат вопроса банка"
+                    item = None
+            if item is None:
+                if not reason.startswith("дубликат"):
+                    report.reasons[reason.split(":")[0]] += 1
+                if rejects_writer:
+                    rejects_writer.writerow([number, reason])
+                continue
+            writer.write(item)
+            report.imported += 1
+        writer.close()
+    except BaseException:
+        out.close()
+        if not dry_run:
+            tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if rejects:
+            rejects.close()
+    
+    out.close()
+    if not report.imported and not report.kept:
+        if not dry_run:
+            tmp_path.unlink(missing_ok=True)
+        raise BankImportError(f"{source.name}: нет ни одной корректной строки, банк не изменён")
+    if not dry_run:
+        os.replace(tmp_path, output)
+    report.elapsed = time.perf_counter() - start
+    return report
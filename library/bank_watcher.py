@@ -0,0 +1,259 @@
+"""
+Горячая перезагрузка банков вопросов: слежение за questions/*.json и атомарная подмена.
+
+Изменения файлов отслеживаются через inotify (Linux, через ctypes и
+loop.add_reader — без потоков и зависимостей); если inotify недоступен,
+раз в bank_watch_interval сравниваются mtime/размер файлов.
+
+После изменения (с задержкой bank_watch_debounce — редакторы пишут файл
+в несколько приёмов) банк разбирается в пуле потоков, проверяется и
+подменяется в кэше одним присваиванием в event loop. Банки неизменяемы:
+начатые тесты держат свою версию (CurrentTestState.bank), старая версия
+освобождается сборщиком мусора вместе с последним таким тестом.
+"""
+import asyncio
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+from .metrics import BANK_RELOADS
+from .question_loader import BankError, live_bank_versions, reload_bank, swap_bank, validate_bank
+
+logger = logging.getLogger(__name__)
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct("iIII")
+
+Signature = Tuple[int, int]
+
+
+def _signature(path: Path) -> Optional[Signature]:
+    """(mtime_ns, размер) файла; None, если файла нет."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class BankWatcher:
+    """Слежение за JSON банками и подмена версий в кэше question_loader."""
+    
+    def __init__(
+        self,
+        questions_dir: Path,
+        specializations: list,
+        interval: float = 2.0,
+        debounce: float = 0.5,
+        use_inotify: bool = True
+    ):
+        """
+        Инициализация наблюдателя.
+        
+        Args:
+            questions_dir: Папка с JSON банками
+            specializations: Отслеживаемые специализации
+            interval: Период опроса файлов без inotify (секунды)
+            debounce: Задержка перед перезагрузкой после последнего изменения
+            use_inotify: Пробовать inotify (иначе только опрос)
+        """
+        self.questions_dir = questions_dir
+        self.specializations = list(specializations)
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        
+        self.reloads = 0
+        self._signatures: Dict[str, Optional[Signature]] = {}
+        self._failed: Dict[str, Signature] = {}  # Версия файла, которую не удалось разобрать
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: set = set()
+        self._inotify_fd: Optional[int] = None
+        self._poll_task: Optional[asyncio.Task] = None
+    
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify_fd is not None else "polling"
+    
+    def _path(self, spec: str) -> Path:
+        return self.questions_dir / f"{spec}.json"
+    
+    async def start(self):
+        """Запомнить текущие версии файлов и начать слежение."""
+        self._signatures = {spec: _signature(self._path(spec)) for spec in self.specializations}
+        if self.use_inotify:
+            self._inotify_fd = self._open_inotify()
+        if self._inotify_fd is None:
+            self._poll_task = asyncio.create_task(self._poll())
+        logger.info(
+            f"👀 Наблюдение за банками вопросов ({self.mode}): {self.questions_dir}"
+        )
+    
+    async def stop(self):
+        """Остановить слежение и дождаться начатых перезагрузок."""
+        if self._inotify_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify_fd)
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+        if self._poll_task:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    def _open_inotify(self) -> Optional[int]:
+        """inotify на папку банков; None, если недоступен (не Linux, лимит watch'ей)."""
+        import ctypes
+        import ctypes.util
+        
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if libc.inotify_add_watch(fd, os.fsencode(self.questions_dir), mask) < 0:
+            logger.warning(
+                f"⚠️ inotify_add_watch: {os.strerror(ctypes.get_errno())}, "
+                f"используется опрос файлов"
+            )
+            os.close(fd)
+            return None
+        
+        asyncio.get_running_loop().add_reader(fd, self._on_inotify)
+        return fd
+    
+    def _on_inotify(self):
+        """Чтение пачки событий inotify (вызывается event loop'ом)."""
+        try:
+            data = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            _, _, _, name_len = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + name_len].rstrip(b"\0")
+            offset += EVENT.size + name_len
+            spec, _, ext = os.fsdecode(name).rpartition(".")
+            if ext == "json" and spec in self._signatures:
+                self._schedule(spec)
+    
+    async def _poll(self):
+        """Запасной режим: сравнение mtime/размера файлов."""
+        while True:
+            await asyncio.sleep(self.interval)
+            for spec, known in self._signatures.items():
+                if _signature(self._path(spec)) != known:
+                    self._schedule(spec)
+    
+    def _schedule(self, spec: str):
+        """Перезагрузка через debounce после последнего события по файлу."""
+        handle = self._timers.pop(spec, None)
+        if handle:
+            handle.cancel()
+        self._timers[spec] = asyncio.get_running_loop().call_later(
+            self.debounce, self._start_reload, spec
+        )
+    
+    def _start_reload(self, spec: str):
+        self._timers.pop(spec, None)
+        task = asyncio.create_task(self.reload(spec))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def reload(self, spec: str) -> bool:
+        """
+        Разобрать новую версию банка в пуле потоков и подменить её в кэше.
+        
+        Returns:
+            True, если версия подменена
+        """
+        lock = self._locks.setdefault(spec, asyncio.Lock())
+        async with lock:
+            signature = _signature(self._path(spec))
+            if signature is None or signature == self._signatures.get(spec):
+                return False
+            
+            loop = asyncio.get_running_loop()
+            try:
+                bank = await loop.run_in_executor(None, reload_bank, spec)
+            except (BankError, OSError) as e:
+                # Версия файла не запоминается: повтор при следующем событии или опросе
+                # (ошибка в лог — один раз на версию файла)
+                BANK_RELOADS.labels(spec, "error").inc()
+                if self._failed.get(spec) != signature:
+                    self._failed[spec] = signature
+                    logger.error(f"❌ Банк {spec} не перезагружен, остаётся прежняя версия: {e}")
+                return False
+            self._signatures[spec] = signature
+            self._failed.pop(spec, None)
+            
+            problems = validate_bank(bank)
+            for problem in problems:
+                logger.warning(f"⚠️ {problem}")
+            if problems and settings.environment == "production" and settings.bank_fail_fast:
+                BANK_RELOADS.labels(spec, "rejected").inc()
+                logger.error(f"❌ Банк {spec} не прошёл проверку, остаётся прежняя версия")
+                return False
+            
+            old = swap_bank(bank)
+            self.reloads += 1
+            BANK_RELOADS.labels(spec, "ok").inc()
+            logger.info(
+                f"🔄 Банк {spec} перезагружен: версия {old.version if old else '—'} → {bank.version}, "
+                f"{len(bank)} вопросов, {bank.load_ms:.1f} мс ({bank.source.name}); "
+                f"версий в памяти: {live_bank_versions(spec)}"
+            )
+            return True
+
+
+def setup_bank_watcher(dispatcher: Dispatcher):
+    """
+    Подключить наблюдатель банков к жизненному циклу диспетчера
+    (регистрировать после setup_question_banks: сначала прогрев кэша).
+    
+    Args:
+        dispatcher: Dispatcher бота (наблюдатель доступен как dispatcher["bank_watcher"])
+    """
+    if not settings.bank_watch_enabled:
+        return
+    
+    watcher = BankWatcher(
+        settings.questions_dir,
+        settings.specializations,
+        interval=settings.bank_watch_interval,
+        debounce=settings.bank_watch_debounce,
+        use_inotify=settings.bank_watch_inotify
+    )
+    dispatcher["bank_watcher"] = watcher
+    
+    async def on_startup():
+        await watcher.start()
+    
+    async def on_shutdown():
+        await watcher.stop()
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
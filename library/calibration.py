@@ -0,0 +1,299 @@
+"""
+Калибровка вопросов по сохранённым ответам (NumPy, векторно).
+
+Ответы специализации (test_responses) разворачиваются в разреженную матрицу
+попытки × вопросы: плоские массивы (вопрос, верно) с ответами попытки подряд —
+каждая попытка видит лишь часть банка, поэтому плотная матрица не строится;
+суммы по попыткам — np.add.reduceat, по вопросам — np.bincount. Вычисляются:
+    - p-value и точечно-бисериальная корреляция вопроса с остальным баллом;
+    - надёжность KR-20 (α Кронбаха для дихотомических заданий) для средней
+      длины теста;
+    - параметры 2PL IRT P(θ) = 1 / (1 + exp(-a(θ - b))) — совместное
+      максимальное правдоподобие (JML): чередующиеся шаги Ньютона по
+      вопросам и попыткам, шкала θ нормируется на каждой итерации.
+      Оценки a у JML слегка завышены на коротких тестах — для ранжирования
+      и адаптивного отбора вопросов это несущественно.
+
+Результаты пишутся в item_calibration / bank_calibration (схема в item_analytics).
+NumPy — необязательная зависимость: нужен только для этой задачи
+(python calibrate_items.py), бот без него работает.
+"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from .item_analytics import BLOB_VERSION, RESPONSE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MIN_RESPONSES = 20  # Меньше ответов на вопрос — параметры не пишутся
+A_BOUNDS = (0.05, 4.0)
+B_BOUNDS = (-5.0, 5.0)
+THETA_BOUNDS = (-4.0, 4.0)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError("Для калибровки нужен NumPy: pip install numpy") from e
+    return numpy
+
+
+class CalibrationResult:
+    """Параметры вопросов специализации (массивы по порядку uids)."""
+    
+    __slots__ = ("specialization", "uids", "responses", "p_value", "point_biserial",
+                 "a", "b", "alpha", "attempts", "iterations", "elapsed")
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+
+def load_responses(conn: sqlite3.Connection, specialization: str) -> Tuple["np.ndarray", ...]:
+    """
+    Ответы специализации: плоские массивы, ответы одной попытки идут подряд.
+    
+    Returns:
+        (item, correct, lengths, uids): номер вопроса и 1/0 «верно» на каждый
+        ответ, число ответов каждой попытки, uid вопросов по номеру
+    """
+    np = _numpy()
+    record = np.dtype([("uid", "<i8"), ("selected", "u1"), ("correct", "u1")])
+    assert record.itemsize == RESPONSE.size
+    
+    chunks = []
+    lengths = []
+    for (blob,) in conn.execute(
+        "SELECT data FROM test_responses WHERE specialization = ?", (specialization,)
+    ):
+        if blob and blob[0] == BLOB_VERSION and len(blob) > RESPONSE.size:
+            chunks.append(blob[1:])
+            lengths.append((len(blob) - 1) // RESPONSE.size)
+    
+    records = np.frombuffer(b"".join(chunks), dtype=record)
+    uids, item = np.unique(records["uid"], return_inverse=True)
+    correct = (records["selected"] == records["correct"]).astype(np.float64)
+    return item.astype(np.intp), correct, np.array(lengths, dtype=np.intp), uids
+
+
+def _item_sums(item: "np.ndarray", weights: "np.ndarray", n_items: int) -> "np.ndarray":
+    """Суммы по вопросам (ответы не упорядочены по вопросу — bincount)."""
+    return _numpy().bincount(item, weights=weights, minlength=n_items)
+
+
+def _attempt_sums(values: "np.ndarray", starts: "np.ndarray") -> "np.ndarray":
+    """Суммы по попыткам: ответы попытки идут подряд, reduceat в разы быстрее bincount."""
+    return _numpy().add.reduceat(values, starts)
+
+
+def item_statistics(item, correct, lengths, n_items: int):
+    """
+    Классические показатели: (ответов на вопрос, p-value, точечно-бисериальная r, KR-20).
+    
+    Балл попытки — доля верных (попытки видят разное число вопросов);
+    корреляция считается с баллом без самого вопроса.
+    """
+    np = _numpy()
+    starts = np.cumsum(lengths) - lengths
+    total = _attempt_sums(correct, starts)
+    
+    # Балл по остальным вопросам попытки
+    others = np.repeat(lengths - 1, lengths).astype(np.float64)
+    rest = np.divide(np.repeat(total, lengths) - correct, others, out=np.zeros_like(correct), where=others > 0)
+    
+    n = np.bincount(item, minlength=n_items).astype(np.float64)
+    safe_n = np.maximum(n, 1)
+    p = _item_sums(item, correct, n_items) / safe_n
+    mean_rest = _item_sums(item, rest, n_items) / safe_n
+    cov = _item_sums(item, correct * rest, n_items) / safe_n - p * mean_rest
+    var_rest = _item_sums(item, rest * rest, n_items) / safe_n - mean_rest ** 2
+    denominator = np.sqrt(np.maximum(p * (1 - p) * var_rest, 0))
+    r_pb = np.divide(cov, denominator, out=np.zeros(n_items), where=denominator > 1e-12)
+    
+    # KR-20 для теста средней длины k: α = k/(k-1) · (1 - Σ p·q / σ²(сумма))
+    k = lengths.mean() if len(lengths) else 0.0
+    var_total = np.var(total) if len(total) else 0.0
+    alpha = (k / (k - 1)) * (1 - k * np.mean(p * (1 - p)) / var_total) if k > 1 and var_total > 0 else 0.0
+    return n, p, r_pb, float(alpha)
+
+
+def _probabilities(a_rep, b_rep, theta_rep, delta, prob):
+    """P = 1 / (1 + exp(-a(θ - b))) на месте в буферах delta и prob (без аллокаций на каждый ответ)."""
+    np = _numpy()
+    np.subtract(theta_rep, b_rep, out=delta)
+    np.multiply(a_rep, delta, out=prob)
+    np.negative(prob, out=prob)
+    np.exp(prob, out=prob)
+    prob += 1
+    np.reciprocal(prob, out=prob)
+
+
+def _newton_step(numerator: "np.ndarray", denominator: "np.ndarray") -> "np.ndarray":
+    np = _numpy()
+    return np.clip(numerator.astype(np.float64) / np.maximum(denominator, 1e-9), -1, 1)
+
+
+def fit_2pl(item, correct, lengths, n_items: int, iterations: int = 20, tolerance: float = 0.05):
+    """
+    2PL IRT методом JML: шаги Ньютона (диагональный гессиан).
+    
+    Итерация: шаг по a и b всех вопросов при фиксированных θ, затем шаг по θ
+    всех попыток с новыми a и b (одновременный шаг расходится), затем
+    нормировка шкалы θ ~ (0, 1). Шаги ограничены ±1 и границами *_BOUNDS
+    (θ при всех верных/неверных ответах иначе уходит в бесконечность).
+    Остановка — когда a и b после нормировки меняются меньше tolerance.
+    
+    Ответы держатся в float32 в двух порядках: по попыткам (как пришли) и
+    копия, отсортированная по вопросам, — суммы для обоих шагов считаются
+    np.add.reduceat по непрерывным отрезкам, без bincount и float64-буферов.
+    Каждый вопрос и каждая попытка должны иметь хотя бы один ответ
+    (так строит load_responses).
+    
+    Returns:
+        (a, b, theta, выполнено итераций)
+    """
+    np = _numpy()
+    f32 = np.float32
+    size = len(item)
+    
+    # Порядок по попыткам
+    starts = np.cumsum(lengths) - lengths
+    correct = correct.astype(f32)
+    # Порядок по вопросам
+    order = np.argsort(item, kind="stable")
+    counts = np.bincount(item, minlength=n_items)
+    item_starts = np.cumsum(counts) - counts
+    attempt_by_item = np.repeat(np.arange(len(lengths)), lengths)[order]
+    correct_by_item = correct[order]
+    del order
+    
+    # Начальные значения: θ — логит доли верных, b — минус логит p, a = 1
+    total = np.add.reduceat(correct, starts, dtype=np.float64)
+    share = np.clip((total + 0.5) / (lengths + 1), 0.01, 0.99)
+    theta = np.log(share / (1 - share))
+    theta = (theta - theta.mean()) / (theta.std() or 1.0)
+    p = np.clip(np.add.reduceat(correct_by_item, item_starts, dtype=np.float64) / counts, 0.01, 0.99)
+    a, b = np.ones(n_items), -np.log(p / (1 - p))
+    
+    # mode="clip" в np.take — без проверки границ, в 2-3 раза быстрее (индексы заведомо верны)
+    theta_rep, a_rep, b_rep, delta, prob, residual, weight = (np.empty(size, dtype=f32) for _ in range(7))
+    
+    done = 0
+    for done in range(1, iterations + 1):
+        previous_a, previous_b = a, b
+        
+        # Вопросы: a и b при фиксированных θ (порядок по вопросам)
+        np.take(theta.astype(f32), attempt_by_item, out=theta_rep, mode="clip")
+        _probabilities(np.repeat(a.astype(f32), counts), np.repeat(b.astype(f32), counts), theta_rep, delta, prob)
+        np.subtract(correct_by_item, prob, out=residual)
+        np.subtract(1, prob, out=weight)
+        weight *= prob
+        sum_weight = np.add.reduceat(weight, item_starts)
+        sum_residual = np.add.reduceat(residual, item_starts)
+        residual *= delta
+        weight *= delta
+        weight *= delta
+        a = np.clip(a + _newton_step(np.add.reduceat(residual, item_starts), np.add.reduceat(weight, item_starts)), *A_BOUNDS)
+        b = np.clip(b + _newton_step(-sum_residual, a * sum_weight), *B_BOUNDS)
+        
+        # Попытки: θ при новых a и b (порядок по попыткам)
+        np.take(a.astype(f32), item, out=a_rep, mode="clip")
+        np.take(b.astype(f32), item, out=b_rep, mode="clip")
+        _probabilities(a_rep, b_rep, np.repeat(theta.astype(f32), lengths), delta, prob)
+        np.subtract(correct, prob, out=residual)
+        np.subtract(1, prob, out=weight)
+        weight *= prob
+        residual *= a_rep
+        weight *= a_rep
+        weight *= a_rep
+        theta = np.clip(theta + _newton_step(np.add.reduceat(residual, starts), np.add.reduceat(weight, starts)), *THETA_BOUNDS)
+        
+        # Нормировка шкалы: θ ~ (0, 1), параметры вопросов пересчитываются
+        mean, std = theta.mean(), theta.std() or 1.0
+        theta = (theta - mean) / std
+        b = np.clip((b - mean) / std, *B_BOUNDS)
+        a = np.clip(a * std, *A_BOUNDS)
+        
+        if max(np.abs(a - previous_a).max(), np.abs(b - previous_b).max()) < tolerance:
+            break
+    return a, b, theta, done
+
+
+def calibrate_arrays(item, correct, lengths, uids, specialization: str = "", iterations: int = 20) -> CalibrationResult:
+    """Все показатели по ответам в формате load_responses."""
+    start = time.perf_counter()
+    if not len(lengths):
+        empty = _numpy().zeros(0)
+        return CalibrationResult(
+            specialization=specialization, uids=uids, responses=empty, p_value=empty, point_biserial=empty,
+            a=empty, b=empty, alpha=0.0, attempts=0, iterations=0, elapsed=0.0
+        )
+    n, p, r_pb, alpha = item_statistics(item, correct, lengths, len(uids))
+    a, b, _, done = fit_2pl(item, correct, lengths, len(uids), iterations)
+    return CalibrationResult(
+        specialization=specialization, uids=uids, responses=n, p_value=p, point_biserial=r_pb,
+        a=a, b=b, alpha=alpha, attempts=len(lengths), iterations=done,
+        elapsed=time.perf_counter() - start
+    )
+
+
+def save_calibration(conn: sqlite3.Connection, result: CalibrationResult) -> int:
+    """
+    Записать параметры вопросов (с ответами ≥ MIN_RESPONSES) и показатели банка.
+    
+    Returns:
+        Число записанных вопросов
+    """
+    rows = [
+        (result.specialization, int(uid), int(n), float(p), float(r), float(a), float(b))
+        for uid, n, p, r, a, b in zip(
+            result.uids, result.responses, result.p_value, result.point_biserial, result.a, result.b
+        )
+        if n >= MIN_RESPONSES
+    ]
+    with conn:
+        conn.execute("DELETE FROM item_calibration WHERE specialization = ?", (result.specialization,))
+        conn.executemany("""
+            INSERT INTO item_calibration (
+                specialization, uid, responses, p_value, point_biserial, irt_a, irt_b, calibrated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, rows)
+        conn.execute("""
+            INSERT OR REPLACE INTO bank_calibration (specialization, attempts, items, alpha, calibrated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (result.specialization, result.attempts, len(rows), result.alpha))
+    return len(rows)
+
+
+def calibrate_specialization(db_path: Path, specialization: str, iterations: int = 20) -> Tuple[CalibrationResult, int]:
+    """
+    Калибровка специализации: чтение ответов, расчёт, запись результатов.
+    
+    Returns:
+        (результат, записано вопросов)
+    """
+    conn = sqlite3.connect(db_path, timeout=10.0)
+    try:
+        item, correct, lengths, uids = load_responses(conn, specialization)
+        result = calibrate_arrays(item, correct, lengths, uids, specialization, iterations)
+        return result, save_calibration(conn, result) if result.attempts else 0
+    finally:
+        conn.close()
+
+
+def calibration_summary(result: CalibrationResult) -> Dict[str, float]:
+    """Сводка для отчёта CLI/бенчмарка."""
+    np = _numpy()
+    return {
+        "attempts": result.attempts,
+        "items": len(result.uids),
+        "alpha": result.alpha,
+        "mean_p": float(np.mean(result.p_value)) if len(result.uids) else 0.0,
+        "mean_r_pb": float(np.mean(result.point_biserial)) if len(result.uids) else 0.0,
+        "iterations": result.iterations,
+        "seconds": result.elapsed,
+    }
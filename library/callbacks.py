@@ -0,0 +1,149 @@
+"""
+Типизированные callback_data (aiogram CallbackData) и таблица маршрутов.
+callback.data разбирается один раз, хэндлер ищется по словарю за O(1).
+"""
+import logging
+from enum import Enum
+from typing import Any, Callable, Dict, NamedTuple, Optional, Type
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from .enum import Difficulty
+
+logger = logging.getLogger(__name__)
+
+
+class MenuAction(str, Enum):
+    """Действия кнопок без параметров (навигация и меню результатов)."""
+    NEXT = "next"
+    SHOW_ANSWERS = "show_answers"
+    GENERATE_CERT = "generate_cert"
+    REPEAT_TEST = "repeat_test"
+    MY_STATS = "my_stats"
+    MAIN_MENU = "main_menu"
+    HELP = "help"
+
+
+class SpecCallback(CallbackData, prefix="spec"):
+    """Выбор специализации: spec:oupds."""
+    spec: str
+
+
+class DifficultyCallback(CallbackData, prefix="diff"):
+    """Выбор уровня сложности: diff:базовый."""
+    level: Difficulty
+
+
+class AnswerCallback(CallbackData, prefix="ans"):
+    """Toggle варианта ответа (1-based): ans:3."""
+    num: int
+
+
+class MenuCallback(CallbackData, prefix="menu"):
+    """Кнопки навигации: menu:next, menu:help и т.д."""
+    action: MenuAction
+
+
+class CallbackRoute(NamedTuple):
+    """Запись таблицы маршрутов."""
+    handler: CallableObject
+    factory: Type[CallbackData]
+    state: Optional[str]
+
+
+class CallbackDispatcher:
+    """
+    Таблица маршрутов callback_data.
+    
+    Поиск хэндлера: сначала точный ключ (spec:oupds, menu:next),
+    затем префикс (diff, ans). Оба поиска — обращение к словарю,
+    поэтому стоимость не зависит от количества зарегистрированных действий.
+    """
+    
+    def __init__(self, name: str = "callback_dispatch"):
+        self.routes: Dict[str, CallbackRoute] = {}
+        self.router = Router(name=name)
+        self.router.callback_query.register(self._dispatch, self._has_route)
+    
+    def route(self, target: Type[CallbackData] | CallbackData, state: State | None = None):
+        """
+        Декоратор регистрации хэндлера.
+        
+        Args:
+            target: Класс CallbackData (маршрут по префиксу)
+                или его экземпляр (маршрут по точному значению)
+            state: Требуемое состояние FSM (None - любое)
+        """
+        if isinstance(target, CallbackData):
+            factory = type(target)
+            key = target.pack()
+        else:
+            factory = target
+            key = target.__prefix__
+        
+        def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+            if key in self.routes:
+                raise ValueError(f"Маршрут callback '{key}' уже зарегистрирован")
+            self.routes[key] = CallbackRoute(
+                handler=CallableObject(handler),
+                factory=factory,
+                state=state.state if state else None
+            )
+            return handler
+        
+        return decorator
+    
+    def resolve(
+        self,
+        data: str,
+        raw_state: str | None = None
+    ) -> tuple[CallbackRoute, CallbackData] | None:
+        """
+        Найти маршрут и разобрать callback_data.
+        
+        Args:
+            data: Строка callback.data
+            raw_state: Текущее состояние FSM
+        
+        Returns:
+            (маршрут, распакованные данные) или None
+        """
+        route = self.routes.get(data)
+        if route is None:
+            route = self.routes.get(data.partition(":")[0])
+            if route is None:
+                return None
+        
+        if route.state is not None and route.state != raw_state:
+            return None
+        
+        try:
+            return route, route.factory.unpack(data)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Некорректные callback_data '{data}': {e}")
+            return None
+    
+    async def feed(self, callback_data: CallbackData, callback: CallbackQuery, **kwargs: Any) -> Any:
+        """Вызвать хэндлер маршрута напрямую (например, повтор выбора специализации)."""
+        route = self.routes.get(callback_data.pack()) or self.routes.get(callback_data.__prefix__)
+        if route is None:
+            return None
+        return await route.handler.call(callback, callback_data=callback_data, **kwargs)
+    
+    @staticmethod
+    def _has_route(callback: CallbackQuery, callback_route: CallbackRoute | None = None) -> bool:
+        """Фильтр: маршрут найден CallbackDispatchMiddleware."""
+        return callback_route is not None
+    
+    @staticmethod
+    async def _dispatch(callback: CallbackQuery, callback_route: CallbackRoute, **kwargs: Any) -> Any:
+        """Единственный aiogram-хэндлер: вызов хэндлера из таблицы."""
+        return await callback_route.handler.call(callback, **kwargs)
+
+
+# Глобальный экземпляр
+callback_dispatcher = CallbackDispatcher()
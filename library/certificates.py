@@ -1,25 +1,27 @@
 """
 Генерация PDF сертификатов о прохождении теста.
 Production-ready с ReportLab и поддержкой русских шрифтов.
+
+ReportLab импортируется при первом сертификате (не при импорте library),
+шрифты регистрируются один раз на процесс.
 """
 import logging
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
 from config.settings import settings
 from .models import CurrentTestState
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
 def register_fonts():
-    """Регистрация русских шрифтов для PDF."""
+    """Регистрация русских шрифтов для PDF (один раз)."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    
     try:
         pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
         pdfmetrics.registerFont(TTFont('DejaVu-Bold', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'))
@@ -32,6 +34,10 @@ def register_fonts():
 
 async def generate_certificate(test_state: CurrentTestState, user_id: int) -> Path:
     """Генерирует PDF сертификат."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    
     settings.certs_dir.mkdir(parents=True, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -11,3 +11,5 @@ class Difficulty(str, Enum):
     BASIC = "базовый"
     STANDARD = "стандартный"
     ADVANCED = "продвинутый"
+    ADAPTIVE = "адаптивный"  # CAT: вопросы по оценке уровня (library.adaptive)
+    TRAINING = "тренировка"  # Повторение ошибок прошлых тестов (library.review)
@@ -0,0 +1,343 @@
+"""
+Показанные вопросы пользователя: не повторять вопросы между попытками.
+
+Для каждой пары (пользователь, специализация) хранится битовая карта по
+позициям вопросов в банке (SeenQuestions, 1 бит на вопрос: банк из 10 000
+вопросов — 1,25 КБ). Выбор вопросов в тест (sample) берёт непоказанные;
+когда их не хватает, берутся все оставшиеся, карта сбрасывается и тест
+добирается из остального банка — начинается новый круг. Проверка и отметка
+вопроса — O(1).
+
+Карты загружаются из БД статистики при первом тесте пользователя и живут
+в памяти (stats.exposure_store, не больше exposure_cache_size карт). Изменённые
+карты записываются пачкой (один executemany) раз в exposure_flush_interval
+секунд и при остановке бота; при сбое записи остаются в очереди.
+
+Позиции берутся из текущей версии банка: при добавлении вопросов в конец
+карта дополняется нулями, при перестановке вопросов в JSON история показов
+становится приблизительной — для цели «не повторять» этого достаточно.
+"""
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Set, Tuple
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    import aiosqlite
+    
+    from .sampling import WeightedSampler
+
+logger = logging.getLogger(__name__)
+
+# Угадывание непоказанных, пока их не меньше REJECTION_FACTOR × вопросов теста:
+# в среднем не больше size / REJECTION_FACTOR попыток — дешевле перечисления карты
+REJECTION_FACTOR = 8
+# Номера нулевых битов каждого значения байта
+FREE_BITS = tuple(tuple(bit for bit in range(8) if not value >> bit & 1) for value in range(256))
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS seen_questions (
+        user_id INTEGER NOT NULL,
+        specialization TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        bits BLOB NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, specialization)
+    ) WITHOUT ROWID
+    """,
+)
+
+UPSERT_SEEN = """
+    INSERT INTO seen_questions (user_id, specialization, size, bits) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, specialization) DO UPDATE SET
+        size = excluded.size,
+        bits = excluded.bits,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+Key = Tuple[int, str]
+
+
+class SeenQuestions:
+    """Битовая карта показанных вопросов (бит i — позиция i в банке)."""
+    
+    __slots__ = ("key", "size", "bits", "seen", "rounds")
+    
+    def __init__(self, key: Key, size: int, bits: bytes = b""):
+        """
+        Args:
+            key: (user_id, specialization)
+            size: Число вопросов в банке
+            bits: Сохранённая карта (пусто — ничего не показано)
+        """
+        self.key = key
+        self.size = 0
+        self.bits = bytearray(bits)
+        self.seen = 0
+        self.rounds = 0  # Сколько раз карта сбрасывалась в этом процессе
+        self.resize(size)
+    
+    def resize(self, size: int):
+        """Подогнать карту под размер банка (новые вопросы — непоказанные)."""
+        if size == self.size and len(self.bits) == (size + 7) // 8:
+            return
+        self.size = size
+        self.bits = self.bits[:(size + 7) // 8].ljust((size + 7) // 8, b"\0")
+        if size % 8 and self.bits:
+            self.bits[-1] &= (1 << (size % 8)) - 1
+        self.seen = int.from_bytes(self.bits, "little").bit_count()
+    
+    def __contains__(self, position: int) -> bool:
+        return bool(self.bits[position >> 3] >> (position & 7) & 1)
+    
+    def mark(self, position: int):
+        """Отметить вопрос показанным."""
+        mask = 1 << (position & 7)
+        byte = self.bits[position >> 3]
+        if not byte & mask:
+            self.bits[position >> 3] = byte | mask
+            self.seen += 1
+    
+    def reset(self):
+        """Начать новый круг: все вопросы снова непоказанные."""
+        self.bits[:] = bytes(len(self.bits))
+        self.seen = 0
+        self.rounds += 1
+    
+    def forget(self, positions: Iterable[int]):
+        """Новый круг по части банка (пулу сложности): позиции снова непоказанные."""
+        for position in positions:
+            mask = 1 << (position & 7)
+            byte = self.bits[position >> 3]
+            if byte & mask:
+                self.bits[position >> 3] = byte & ~mask
+                self.seen -= 1
+        self.rounds += 1
+    
+    @property
+    def unseen(self) -> int:
+        return self.size - self.seen
+    
+    def _unseen_positions(self) -> List[int]:
+        """Все непоказанные позиции (по таблице свободных битов байта)."""
+        positions = [
+            (i << 3) + bit
+            for i, byte in enumerate(self.bits) if byte != 0xFF
+            for bit in FREE_BITS[byte]
+        ]
+        while positions and positions[-1] >= self.size:
+            positions.pop()
+        return positions
+    
+    def _pick_unseen(
+        self,
+        count: int,
+        taken: Set[int],
+        rng: random.Random,
+        weights: Optional["WeightedSampler"] = None
+    ) -> List[int]:
+        """count случайных непоказанных позиций не из taken (их должно хватать)."""
+        if weights is not None:
+            picks = weights.sample(count, rng, excluded=lambda p: p in self or p in taken)
+            taken.update(picks)
+            return picks
+        free = self.unseen - len(taken)
+        if free >= REJECTION_FACTOR * count:
+            # Непоказанных много: угадывание, size / free попыток на вопрос в среднем
+            picks = []
+            while len(picks) < count:
+                position = rng.randrange(self.size)
+                if position not in self and position not in taken:
+                    taken.add(position)
+                    picks.append(position)
+            return picks
+        candidates = [p for p in self._unseen_positions() if p not in taken]
+        picks = rng.sample(candidates, count)
+        taken.update(picks)
+        return picks
+    
+    def sample(
+        self,
+        count: int,
+        rng: random.Random = random,
+        weights: Optional["WeightedSampler"] = None,
+        taken: Optional[Set[int]] = None
+    ) -> List[int]:
+        """
+        Позиции вопросов для нового теста с отметкой показанными.
+        
+        Сначала непоказанные; если их меньше count, берутся все, карта
+        сбрасывается и тест добирается из остальных вопросов банка.
+        
+        Args:
+            count: Число вопросов (не больше числа позиций вне taken)
+            rng: Источник случайности
+            weights: Веса позиций (None — равновероятно)
+            taken: Уже выбранные в этот тест позиции (не повторяются;
+                после сброса карты снова отмечаются показанными)
+        
+        Returns:
+            Позиции в случайном порядке
+        """
+        taken = set(taken) if taken else set()
+        count = min(count, self.size - len(taken))
+        if count <= 0:
+            return []
+        if self.unseen - sum(1 for position in taken if position not in self) >= count:
+            picks = self._pick_unseen(count, taken, rng, weights)
+        else:
+            picks = [position for position in self._unseen_positions() if position not in taken]
+            taken.update(picks)
+            self.reset()
+            for position in taken:
+                self.mark(position)
+            picks += self._pick_unseen(count - len(picks), taken, rng, weights)
+        for position in picks:
+            self.mark(position)
+        rng.shuffle(picks)
+        return picks
+
+
+class ExposureStore:
+    """Кэш карт показанных вопросов с пакетной записью в БД статистики."""
+    
+    def __init__(self, connect: Callable[[], "aiosqlite.Connection"], cache_size: int = 10_000):
+        """
+        Args:
+            connect: Фабрика соединений (StatsManager.connect)
+            cache_size: Сколько карт держать в памяти (вытесняются давно не использованные)
+        """
+        self.connect = connect
+        self.cache_size = cache_size
+        self._entries: "OrderedDict[Key, SeenQuestions]" = OrderedDict()
+        self._dirty: Set[Key] = set()
+        self._task: asyncio.Task | None = None
+        self.flushes = 0
+        self.written = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def pending(self) -> int:
+        """Изменённых карт, ещё не записанных в БД."""
+        return len(self._dirty)
+    
+    async def get(self, user_id: int, specialization: str, size: int) -> SeenQuestions:
+        """
+        Карта пользователя для банка из size вопросов (из кэша или БД).
+        
+        Args:
+            user_id: ID пользователя
+            specialization: Специализация
+            size: Число вопросов в текущей версии банка
+        """
+        key = (user_id, specialization)
+        entry = self._entries.get(key)
+        if entry is None:
+            async with self.connect() as db:
+                cursor = await db.execute(
+                    "SELECT bits FROM seen_questions WHERE user_id = ? AND specialization = ?", key
+                )
+                row = await cursor.fetchone()
+            # Пока шёл запрос, карту мог загрузить параллельный хэндлер
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = SeenQuestions(key, size, row[0] if row else b"")
+        self._entries.move_to_end(key)
+        entry.resize(size)
+        return entry
+    
+    def touch(self, entry: SeenQuestions):
+        """Карта изменена: записать при следующем flush."""
+        self._dirty.add(entry.key)
+    
+    async def flush(self) -> int:
+        """
+        Записать изменённые карты одной транзакцией и вытеснить лишние из кэша.
+        
+        Returns:
+            Число записанных карт
+        """
+        written = 0
+        if self._dirty:
+            keys, self._dirty = self._dirty, set()
+            rows = [
+                (*key, entry.size, bytes(entry.bits))
+                for key in keys
+                if (entry := self._entries.get(key)) is not None
+            ]
+            try:
+                async with self.connect() as db:
+                    await db.executemany(UPSERT_SEEN, rows)
+                    await db.commit()
+            except Exception:
+                # Не потерять изменения: запишутся при следующем flush
+                self._dirty |= keys
+                raise
+            written = len(rows)
+            self.flushes += 1
+            self.written += written
+        
+        excess = len(self._entries) - self.cache_size
+        if excess > 0:
+            for key in [k for k in self._entries if k not in self._dirty][:excess]:
+                del self._entries[key]
+        return written
+    
+    async def _run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Не удалось записать показанные вопросы ({self.pending} карт): {e}")
+    
+    def start(self, interval: float):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval), name="exposure-flush")
+    
+    async def stop(self):
+        """Остановить периодическую запись и записать оставшиеся изменения."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"❌ Показанные вопросы не записаны при остановке ({self.pending} карт): {e}")
+
+
+def setup_exposure(dispatcher: Dispatcher):
+    """
+    Периодическая запись карт показанных вопросов в жизненном цикле диспетчера.
+    
+    Args:
+        dispatcher: Dispatcher бота (хранилище доступно как dispatcher["exposure_store"])
+    """
+    if not settings.exposure_enabled:
+        return
+    # Хранилище создаётся в stats (там же схема БД), stats импортирует этот модуль
+    from .stats import exposure_store
+    
+    dispatcher["exposure_store"] = exposure_store
+    
+    async def on_startup():
+        exposure_store.start(settings.exposure_flush_interval)
+    
+    async def on_shutdown():
+        await exposure_store.stop()
+        logger.info(
+            f"💾 Показанные вопросы: записей {exposure_store.written} "
+            f"за {exposure_store.flushes} сбросов, карт в памяти {len(exposure_store)}"
+        )
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
@@ -0,0 +1,299 @@
+"""
+Ответы по вопросам и инкрементальная аналитика заданий.
+
+При сохранении результата (StatsManager.save_result) в той же транзакции:
+    - ответы попытки пишутся одним компактным BLOB в test_responses
+      (на вопрос 10 байт: uid, маска выбранных, маска правильных);
+    - счётчики вопросов в item_stats увеличиваются UPSERT'ом пачкой
+      (показан, решён верно, дан ответ, выборы каждого варианта).
+
+Поэтому трудность (p-value) и эффективность дистракторов читаются
+по первичному ключу (specialization, uid) без пересчёта истории;
+rebuild() пересобирает счётчики из test_responses (ремонт/миграция).
+"""
+import struct
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from .models import CurrentTestState, Question
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+BLOB_VERSION = 1
+RESPONSE = struct.Struct("<qBB")  # uid, маска выбранных, маска правильных
+MAX_OPTIONS = 6
+
+# Вариант считается рабочим дистрактором, если его выбирает не меньше 5% отвечавших
+DISTRACTOR_MIN_SHARE = 0.05
+
+# (uid, маска выбранных, маска правильных)
+Response = Tuple[int, int, int]
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS test_responses (
+        result_id INTEGER PRIMARY KEY,
+        specialization TEXT NOT NULL,
+        data BLOB NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS item_stats (
+        specialization TEXT NOT NULL,
+        uid INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        options INTEGER NOT NULL,
+        correct_mask INTEGER NOT NULL,
+        shown INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        answered INTEGER NOT NULL DEFAULT 0,
+        opt1 INTEGER NOT NULL DEFAULT 0,
+        opt2 INTEGER NOT NULL DEFAULT 0,
+        opt3 INTEGER NOT NULL DEFAULT 0,
+        opt4 INTEGER NOT NULL DEFAULT 0,
+        opt5 INTEGER NOT NULL DEFAULT 0,
+        opt6 INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (specialization, uid)
+    ) WITHOUT ROWID
+    """,
+    # Результаты калибровки (calibrate_items.py, library.calibration)
+    """
+    CREATE TABLE IF NOT EXISTS item_calibration (
+        specialization TEXT NOT NULL,
+        uid INTEGER NOT NULL,
+        responses INTEGER NOT NULL,
+        p_value REAL NOT NULL,
+        point_biserial REAL NOT NULL,
+        irt_a REAL NOT NULL,
+        irt_b REAL NOT NULL,
+        calibrated_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (specialization, uid)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bank_calibration (
+        specialization TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL,
+        items INTEGER NOT NULL,
+        alpha REAL NOT NULL,
+        calibrated_at TIMESTAMP NOT NULL
+    )
+    """,
+)
+
+OPTION_COLUMNS = ", ".join(f"opt{i}" for i in range(1, MAX_OPTIONS + 1))
+
+UPSERT_ITEM = f"""
+    INSERT INTO item_stats (
+        specialization, uid, question, options, correct_mask,
+        shown, correct, answered, {OPTION_COLUMNS}
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, {", ".join("?" * MAX_OPTIONS)})
+    ON CONFLICT (specialization, uid) DO UPDATE SET
+        shown = shown + excluded.shown,
+        correct = correct + excluded.correct,
+        answered = answered + excluded.answered,
+        {", ".join(f"opt{i} = opt{i} + excluded.opt{i}" for i in range(1, MAX_OPTIONS + 1))}
+"""
+
+SELECT_ITEMS = f"""
+    SELECT specialization, uid, question, options, correct_mask,
+           shown, correct, answered, {OPTION_COLUMNS}
+    FROM item_stats
+"""
+
+
+def to_mask(answers) -> int:
+    """{1, 3} → 0b101 (бит i — вариант i + 1)."""
+    mask = 0
+    for answer in answers:
+        mask |= 1 << (answer - 1)
+    return mask
+
+
+def collect_responses(test_state: CurrentTestState) -> List[Tuple[Question, Response]]:
+    """Ответы попытки по вопросам с uid (вопросы без uid пропускаются)."""
+    return [
+        (question, (
+            question.uid,
+            to_mask(test_state.answers_history.get(idx, ())),
+            to_mask(question.correct_answers)
+        ))
+        for idx, question in enumerate(test_state.questions)
+        if question.uid
+    ]
+
+
+def encode_responses(responses: List[Response]) -> bytes:
+    """Ответы попытки в BLOB: версия + RESPONSE на каждый вопрос."""
+    return bytes((BLOB_VERSION,)) + b"".join(RESPONSE.pack(*response) for response in responses)
+
+
+def decode_responses(blob: bytes) -> List[Response]:
+    """BLOB test_responses.data → [(uid, маска выбранных, маска правильных)]."""
+    if not blob or blob[0] != BLOB_VERSION:
+        return []
+    return list(RESPONSE.iter_unpack(memoryview(blob)[1:]))
+
+
+async def record_attempt(db: "aiosqlite.Connection", result_id: int, test_state: CurrentTestState):
+    """
+    Записать ответы попытки и обновить счётчики вопросов (в транзакции вызывающего).
+    
+    Args:
+        db: Открытое соединение (commit делает вызывающий)
+        result_id: id строки test_results
+        test_state: Завершённый тест
+    """
+    responses = collect_responses(test_state)
+    if not responses:
+        return
+    specialization = test_state.specialization
+    await db.execute(
+        "INSERT INTO test_responses (result_id, specialization, data) VALUES (?, ?, ?)",
+        (result_id, specialization, encode_responses([r for _, r in responses]))
+    )
+    await db.executemany(UPSERT_ITEM, [
+        (
+            specialization, uid, question.question[:500], len(question.options), correct_mask,
+            1, int(selected == correct_mask), int(selected != 0),
+            *((selected >> i) & 1 for i in range(MAX_OPTIONS))
+        )
+        for question, (uid, selected, correct_mask) in responses
+    ])
+
+
+class ItemStats:
+    """Счётчики одного вопроса и производные показатели."""
+    
+    __slots__ = ("specialization", "uid", "question", "options", "correct_mask",
+                 "shown", "correct", "answered", "option_counts")
+    
+    def __init__(self, row: tuple):
+        (self.specialization, self.uid, self.question, self.options, self.correct_mask,
+         self.shown, self.correct, self.answered, *counts) = row
+        self.option_counts = tuple(counts[:self.options])
+    
+    @property
+    def p_value(self) -> float:
+        """Трудность: доля верных ответов среди показов (1.0 — все решили)."""
+        return self.correct / self.shown if self.shown else 0.0
+    
+    def is_correct_option(self, option: int) -> bool:
+        """option — 1-based номер варианта."""
+        return bool(self.correct_mask >> (option - 1) & 1)
+    
+    def distractor_shares(self) -> List[Tuple[int, float]]:
+        """Неправильные варианты: (номер, доля выбравших среди отвечавших)."""
+        total = self.answered or 1
+        return [
+            (option, count / total)
+            for option, count in enumerate(self.option_counts, start=1)
+            if not self.is_correct_option(option)
+        ]
+    
+    @property
+    def distractor_efficiency(self) -> float:
+        """Доля рабочих дистракторов (выбираются ≥ DISTRACTOR_MIN_SHARE отвечавших)."""
+        shares = self.distractor_shares()
+        if not shares or not self.answered:
+            return 0.0
+        return sum(share >= DISTRACTOR_MIN_SHARE for _, share in shares) / len(shares)
+
+
+class ItemAnalytics:
+    """Чтение и пересборка счётчиков вопросов в БД статистики."""
+    
+    def __init__(self, connect: Callable[[], "aiosqlite.Connection"]):
+        """
+        Args:
+            connect: Фабрика соединений (StatsManager.connect)
+        """
+        self.connect = connect
+    
+    async def get_item(self, specialization: str, uid: int) -> Optional[ItemStats]:
+        """Счётчики вопроса по первичному ключу."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                SELECT_ITEMS + " WHERE specialization = ? AND uid = ?", (specialization, uid)
+            )
+            row = await cursor.fetchone()
+        return ItemStats(row) if row else None
+    
+    async def get_items(self, specialization: str, min_shown: int = 0) -> List[ItemStats]:
+        """Все вопросы специализации, показанные не меньше min_shown раз."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                SELECT_ITEMS + " WHERE specialization = ? AND shown >= ?", (specialization, min_shown)
+            )
+            rows = await cursor.fetchall()
+        return [ItemStats(row) for row in rows]
+    
+    async def get_calibration(self, specialization: str) -> Dict[int, Tuple[float, float]]:
+        """Параметры 2PL откалиброванных вопросов (calibrate_items.py): uid → (a, b)."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                "SELECT uid, irt_a, irt_b FROM item_calibration WHERE specialization = ?", (specialization,)
+            )
+            rows = await cursor.fetchall()
+        return {uid: (a, b) for uid, a, b in rows}
+    
+    async def get_discrimination(self, specialization: str) -> Dict[int, float]:
+        """Точечно-бисериальная дискриминация откалиброванных вопросов: uid → r_pb."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                "SELECT uid, point_biserial FROM item_calibration WHERE specialization = ?", (specialization,)
+            )
+            rows = await cursor.fetchall()
+        return dict(rows)
+    
+    async def get_calibration_stamp(self, specialization: str) -> Optional[str]:
+        """Время последней калибровки специализации (None — не калибровалась)."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                "SELECT calibrated_at FROM bank_calibration WHERE specialization = ?", (specialization,)
+            )
+            row = await cursor.fetchone()
+        return row[0] if row else None
+    
+    async def rebuild(self) -> int:
+        """
+        Пересобрать item_stats из test_responses (тексты вопросов сохраняются).
+        
+        Returns:
+            Число обработанных попыток
+        """
+        totals = {}
+        attempts = 0
+        async with self.connect() as db:
+            cursor = await db.execute(
+                "SELECT specialization, uid, question, options FROM item_stats"
+            )
+            meta = {(row[0], row[1]): (row[2], row[3]) for row in await cursor.fetchall()}
+            
+            async with db.execute("SELECT specialization, data FROM test_responses") as cursor:
+                async for specialization, blob in cursor:
+                    attempts += 1
+                    for uid, selected, correct_mask in decode_responses(blob):
+                        key = (specialization, uid)
+                        counts = totals.get(key)
+                        if counts is None:
+                            counts = totals[key] = [correct_mask, 0, 0, 0] + [0] * MAX_OPTIONS
+                        counts[1] += 1
+                        counts[2] += selected == correct_mask
+                        counts[3] += selected != 0
+                        for i in range(MAX_OPTIONS):
+                            counts[4 + i] += (selected >> i) & 1
+            
+            rows = []
+            for (specialization, uid), counts in totals.items():
+                question, options = meta.get((specialization, uid), ("", MAX_OPTIONS))
+                rows.append((specialization, uid, question, options, *counts))
+            await db.execute("DELETE FROM item_stats")
+            await db.executemany(
+                f"INSERT INTO item_stats (specialization, uid, question, options, correct_mask, "
+                f"shown, correct, answered, {OPTION_COLUMNS}) "
+                f"VALUES ({', '.join('?' * (8 + MAX_OPTIONS))})",
+                rows
+            )
+            await db.commit()
+        return attempts
@@ -4,7 +4,15 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from config.settings import settings
 from .enum import Difficulty
+from .callbacks import (
+    SpecCallback,
+    DifficultyCallback,
+    AnswerCallback,
+    MenuCallback,
+    MenuAction
+)
 
 
 # Маппинг цифр на эмодзи
@@ -24,23 +32,23 @@ def get_main_keyboard() -> InlineKeyboardMarkup:
     
     # 11 специализаций - ПОЛНЫЕ названия в одну колонку
     specs = [
-        ("🚨 ООУПДС", "spec_oupds"),
-        ("📊 Исполнительное производство", "spec_ispolniteli"),
-        ("🧑‍🧑‍🧒 Алименты", "spec_aliment"),
-        ("🎯 Дознание", "spec_doznanie"),
-        ("⏳ Исполнительный розыск и реализация имущества", "spec_rozyisk"),
-        ("📈 Организация профессиональной подготовки", "spec_prof"),
-        ("📡 Организация управления и контроля", "spec_oko"),
-        ("💻 Информатизация и информационная безопасность", "spec_informatika"),
-        ("👥 Кадровая работа", "spec_kadry"),
-        ("🔒 Обеспечение собственной безопасности", "spec_bezopasnost"),
-        ("💼 Управленческая деятельность", "spec_upravlenie"),
+        ("🚨 ООУПДС", "oupds"),
+        ("📊 Исполнительное производство", "ispolniteli"),
+        ("🧑‍🧑‍🧒 Алименты", "aliment"),
+        ("🎯 Дознание", "doznanie"),
+        ("⏳ Исполнительный розыск и реализация имущества", "rozyisk"),
+        ("📈 Организация профессиональной подготовки", "prof"),
+        ("📡 Организация управления и контроля", "oko"),
+        ("💻 Информатизация и информационная безопасность", "informatika"),
+        ("👥 Кадровая работа", "kadry"),
+        ("🔒 Обеспечение собственной безопасности", "bezopasnost"),
+        ("💼 Управленческая деятельность", "upravlenie"),
     ]
     
-    for text, callback in specs:
-        builder.button(text=text, callback_data=callback)
+    for text, spec in specs:
+        builder.button(text=text, callback_data=SpecCallback(spec=spec))
     
-    builder.button(text="❓ Помощь 🆘", callback_data="help")
+    builder.button(text="❓ Помощь 🆘", callback_data=MenuCallback(action=MenuAction.HELP))
     
     # ВСЁ В ОДНУ КОЛОНКУ!
     builder.adjust(1)
@@ -53,14 +61,18 @@ def get_difficulty_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     difficulties = [
-        ("🥉 Резерв (20 вопросов, 35 мин)", "diff_резерв"),
-        ("🥈 Базовый (30 вопросов, 25 мин)", "diff_базовый"),
-        ("🥇 Стандартный (40 вопросов, 20 мин)", "diff_стандартный"),
-        ("💎 Продвинутый (50 вопросов, 20 мин)", "diff_продвинутый"),
+        ("🥉 Резерв (20 вопросов, 35 мин)", Difficulty.RESERVE),
+        ("🥈 Базовый (30 вопросов, 25 мин)", Difficulty.BASIC),
+        ("🥇 Стандартный (40 вопросов, 20 мин)", Difficulty.STANDARD),
+        ("💎 Продвинутый (50 вопросов, 20 мин)", Difficulty.ADVANCED),
     ]
+    if settings.adaptive_enabled:
+        difficulties.append(("🎯 Адаптивный (до 30 вопросов, 25 мин)", Difficulty.ADAPTIVE))
+    if settings.training_enabled:
+        difficulties.append(("🔁 Тренировка: повторение ошибок", Difficulty.TRAINING))
     
-    for text, callback in difficulties:
-        builder.button(text=text, callback_data=callback)
+    for text, level in difficulties:
+        builder.button(text=text, callback_data=DifficultyCallback(level=level))
     
     builder.adjust(1)  # 1 колонка
     return builder.as_markup()
@@ -94,11 +106,11 @@ def get_test_keyboard(num_options: int, selected: set[int] | None = None) -> Inl
         
         builder.button(
             text=button_text,
-            callback_data=f"ans_{i}"
+            callback_data=AnswerCallback(num=i)
         )
     
     # Кнопка "Далее"
-    builder.button(text="➡️ Далее", callback_data="next")
+    builder.button(text="➡️ Далее", callback_data=MenuCallback(action=MenuAction.NEXT))
     
     # Компоновка: все кнопки в один ряд (или несколько рядов по 5)
     if num_options <= 5:
@@ -113,11 +125,29 @@ def get_finish_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура после завершения теста."""
     builder = InlineKeyboardBuilder()
     
-    builder.button(text="📋 Показать правильные ответы", callback_data="show_answers")
-    builder.button(text="🏆 Сертификат PDF", callback_data="generate_cert")
-    builder.button(text="🔄 Повторить тест", callback_data="repeat_test")
-    builder.button(text="📊 Моя статистика", callback_data="my_stats")
-    builder.button(text="🏠 Главное меню", callback_data="main_menu")
+    builder.button(
+        text="📋 Показать правильные ответы",
+        callback_data=MenuCallback(action=MenuAction.SHOW_ANSWERS)
+    )
+    builder.button(text="🏆 Сертификат PDF", callback_data=MenuCallback(action=MenuAction.GENERATE_CERT))
+    builder.button(text="🔄 Повторить тест", callback_data=MenuCallback(action=MenuAction.REPEAT_TEST))
+    builder.button(text="📊 Моя статистика", callback_data=MenuCallback(action=MenuAction.MY_STATS))
+    builder.button(text="🏠 Главное меню", callback_data=MenuCallback(action=MenuAction.MAIN_MENU))
+    
+    builder.adjust(1)  # 1 колонка
+    return builder.as_markup()
+
+
+def get_training_finish_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура после тренировки (без сертификата: это не экзамен)."""
+    builder = InlineKeyboardBuilder()
+    
+    builder.button(
+        text="📋 Показать правильные ответы",
+        callback_data=MenuCallback(action=MenuAction.SHOW_ANSWERS)
+    )
+    builder.button(text="🔄 Повторить тест", callback_data=MenuCallback(action=MenuAction.REPEAT_TEST))
+    builder.button(text="🏠 Главное меню", callback_data=MenuCallback(action=MenuAction.MAIN_MENU))
     
     builder.adjust(1)  # 1 колонка
     return builder.as_markup()
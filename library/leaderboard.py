@@ -0,0 +1,639 @@
+"""
+Рейтинги сотрудников и подразделений по специализации, уровню и периоду.
+
+Рейтинг (Board) ведётся на каждую тройку (специализация, уровень, период),
+период — «all» (за всё время) или месяц «ГГГГ-ММ». Балл сотрудника — лучший
+процент за период, подразделения — средний лучший процент его сотрудников.
+Место — 1 + число участников с баллом выше (равный балл — одно место).
+
+Баллы сравниваются с точностью 0,1% — 1001 корзина. Ranking держит участников
+по корзинам и дерево Фенвика по числу участников в корзинах: место — сумма
+на префиксе, корзина k-го сверху — спуск по дереву, смена балла — два
+изменения счётчиков; всё O(log 1001) при любом числе участников. Топ-K —
+спуск к корзине каждого следующего места.
+
+Рейтинги обновляются в памяти при каждом сохранённом результате
+(StatsManager.save_result), без GROUP BY по test_results на каждый запрос.
+Изменённые записи сотрудников пишутся в leaderboard_entries пачкой (один
+executemany) раз в leaderboard_snapshot_interval секунд и при остановке.
+При старте рейтинги за всё время и текущий месяц загружаются из этой таблицы
+(первый запуск — пересчёт по test_results), затем досчитываются результаты
+test_results новее последней записи (аварийная остановка до snapshot). Если
+загрузка не удалась, она повторяется с каждым snapshot, а результаты за это
+время досчитываются так же. В многопроцессном режиме worker после записи
+забирает записи, изменённые другими worker'ами.
+"""
+import asyncio
+import heapq
+import html
+import logging
+import time
+from array import array
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+from .enum import Difficulty
+from .models import CurrentTestState, normalize_tag
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Баллы с точностью 0,1%: корзины 0..1000
+SCALE = 10
+BUCKETS = 100 * SCALE + 1
+# Старшая степень двойки не больше BUCKETS (спуск по дереву Фенвика)
+TOP_STEP = 1 << (BUCKETS.bit_length() - 1)
+ALL_TIME = "all"
+# Запас при чтении записей других worker'ов: запись фиксируется позже своей метки времени
+SYNC_OVERLAP = 60.0
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS leaderboard_entries (
+        specialization TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        period TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        full_name TEXT NOT NULL,
+        department TEXT NOT NULL,
+        best REAL NOT NULL,
+        tests INTEGER NOT NULL,
+        reached INTEGER NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (specialization, difficulty, period, user_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_leaderboard_updated
+    ON leaderboard_entries (updated_at)
+    """,
+)
+
+UPSERT_ENTRY = """
+    INSERT INTO leaderboard_entries (
+        specialization, difficulty, period, user_id,
+        full_name, department, best, tests, reached, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (specialization, difficulty, period, user_id) DO UPDATE SET
+        full_name = excluded.full_name,
+        department = excluded.department,
+        best = excluded.best,
+        tests = excluded.tests,
+        reached = excluded.reached,
+        updated_at = excluded.updated_at
+"""
+
+SELECT_ENTRIES = """
+    SELECT specialization, difficulty, period, user_id, full_name, department, best, tests, reached
+    FROM leaderboard_entries
+"""
+
+# Первый запуск: лучшие результаты по test_results (ФИО, подразделение и время — лучшей попытки)
+BACKFILL = """
+    SELECT specialization, difficulty, user_id, COALESCE(full_name, ''), COALESCE(department, ''),
+           MAX(percentage), COUNT(*), CAST(strftime('%s', created_at) AS INTEGER)
+    FROM test_results
+    WHERE created_at >= datetime(?, 'unixepoch')
+    GROUP BY specialization, difficulty, user_id
+"""
+
+# Результаты новее последней записи рейтингов: не учтены из-за сбоя загрузки или аварийной остановки
+REPLAY = """
+    SELECT user_id, specialization, difficulty, COALESCE(full_name, ''), COALESCE(department, ''),
+           percentage, CAST(strftime('%s', created_at) AS INTEGER)
+    FROM test_results
+    WHERE created_at > datetime(?, 'unixepoch')
+    ORDER BY id
+"""
+
+BoardKey = Tuple[str, str, str]
+
+
+def score_bucket(score: float) -> int:
+    """Корзина балла (проценты с точностью 0,1)."""
+    return min(max(round(score * SCALE), 0), BUCKETS - 1)
+
+
+def current_month(now: Optional[float] = None) -> str:
+    """Период текущего месяца, «ГГГГ-ММ» (местное время)."""
+    return datetime.fromtimestamp(time.time() if now is None else now).strftime("%Y-%m")
+
+
+def month_start(now: Optional[float] = None) -> float:
+    """Начало текущего месяца (unix-время)."""
+    moment = datetime.fromtimestamp(time.time() if now is None else now)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class Ranking:
+    """Участники по баллам: место и k-й сверху за O(log BUCKETS) (дерево Фенвика по корзинам)."""
+    
+    __slots__ = ("tree", "buckets", "places")
+    
+    def __init__(self):
+        # Индекс i дерева — корзина BUCKETS - i: лучшие баллы в начале префикса
+        self.tree = array("i", bytes(4 * (BUCKETS + 1)))
+        self.buckets: Dict[int, Dict[Hashable, tuple]] = {}  # Корзина → участник → порядок в корзине
+        self.places: Dict[Hashable, int] = {}  # Участник → корзина
+    
+    def __len__(self) -> int:
+        return len(self.places)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.places
+    
+    def _add(self, bucket: int, delta: int):
+        i = BUCKETS - bucket
+        while i <= BUCKETS:
+            self.tree[i] += delta
+            i += i & -i
+    
+    def above(self, bucket: int) -> int:
+        """Число участников с баллом выше корзины bucket."""
+        i = BUCKETS - bucket - 1
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+    
+    def bucket_at(self, k: int) -> int:
+        """Корзина k-го сверху участника (1 ≤ k ≤ len): спуск по дереву."""
+        i = 0
+        step = TOP_STEP
+        while step:
+            if i + step <= BUCKETS and self.tree[i + step] < k:
+                i += step
+                k -= self.tree[i]
+            step >>= 1
+        return BUCKETS - (i + 1)
+    
+    def set(self, key: Hashable, score: float, order: tuple = ()):
+        """
+        Добавить участника или изменить его балл.
+        
+        Args:
+            key: Участник
+            score: Балл, проценты
+            order: Порядок среди участников с тем же баллом (меньше — выше)
+        """
+        bucket = score_bucket(score)
+        old = self.places.get(key)
+        if old == bucket:
+            self.buckets[bucket][key] = order
+            return
+        if old is not None:
+            self.remove(key)
+        self.places[key] = bucket
+        self.buckets.setdefault(bucket, {})[key] = order
+        self._add(bucket, 1)
+    
+    def remove(self, key: Hashable):
+        bucket = self.places.pop(key, None)
+        if bucket is None:
+            return
+        members = self.buckets[bucket]
+        del members[key]
+        if not members:
+            del self.buckets[bucket]
+        self._add(bucket, -1)
+    
+    def rank(self, key: Hashable) -> Optional[int]:
+        """Место участника (None — не участвует)."""
+        bucket = self.places.get(key)
+        return None if bucket is None else self.above(bucket) + 1
+    
+    def top(self, count: int) -> List[Tuple[int, Hashable]]:
+        """(место, участник) для первых count участников по убыванию балла."""
+        count = min(count, len(self.places))
+        result: List[Tuple[int, Hashable]] = []
+        while len(result) < count:
+            place = len(result) + 1
+            members = self.buckets[self.bucket_at(place)]
+            for key in heapq.nsmallest(count - len(result), members, key=members.__getitem__):
+                result.append((place, key))
+        return result
+
+
+class Entry:
+    """Результат сотрудника в рейтинге: лучший процент за период."""
+    
+    __slots__ = ("user_id", "full_name", "department", "best", "tests", "reached")
+    
+    def __init__(self, user_id: int, full_name: str, department: str, best: float, tests: int, reached: int):
+        """
+        Args:
+            user_id: ID пользователя
+            full_name: ФИО (из последнего теста)
+            department: Подразделение (из последнего теста)
+            best: Лучший процент за период
+            tests: Тестов за период
+            reached: Когда получен лучший процент (unix-время; раньше — выше при равном балле)
+        """
+        self.user_id = user_id
+        self.full_name = full_name
+        self.department = department
+        self.best = best
+        self.tests = tests
+        self.reached = reached
+
+
+class Board:
+    """Рейтинг (специализация, уровень, период): сотрудники и подразделения."""
+    
+    __slots__ = ("key", "entries", "people", "departments", "totals")
+    
+    def __init__(self, key: BoardKey):
+        self.key = key
+        self.entries: Dict[int, Entry] = {}
+        self.people = Ranking()
+        self.departments = Ranking()
+        # Ключ подразделения → [название, сумма лучших процентов, сотрудников]
+        self.totals: Dict[str, list] = {}
+    
+    def put(self, entry: Entry):
+        """Добавить или заменить запись сотрудника."""
+        old = self.entries.get(entry.user_id)
+        if old is not None:
+            self._leave(old)
+        self.entries[entry.user_id] = entry
+        self.people.set(entry.user_id, entry.best, (entry.reached, entry.user_id))
+        self._join(entry)
+    
+    def record(self, user_id: int, full_name: str, department: str, percentage: float, now: int) -> Entry:
+        """Учесть результат теста сотрудника."""
+        old = self.entries.get(user_id)
+        if old is None:
+            entry = Entry(user_id, full_name, department, percentage, 1, now)
+        elif percentage > old.best:
+            entry = Entry(user_id, full_name, department, percentage, old.tests + 1, now)
+        else:
+            entry = Entry(user_id, full_name, department, old.best, old.tests + 1, old.reached)
+        self.put(entry)
+        return entry
+    
+    def department_of(self, entry: Entry) -> str:
+        return normalize_tag(entry.department)
+    
+    def _join(self, entry: Entry):
+        key = self.department_of(entry)
+        total = self.totals.get(key)
+        if total is None:
+            total = self.totals[key] = [entry.department, 0.0, 0]
+        total[1] += entry.best
+        total[2] += 1
+        self.departments.set(key, total[1] / total[2], (-total[2], key))
+    
+    def _leave(self, entry: Entry):
+        key = self.department_of(entry)
+        total = self.totals[key]
+        total[1] -= entry.best
+        total[2] -= 1
+        if total[2]:
+            self.departments.set(key, total[1] / total[2], (-total[2], key))
+        else:
+            del self.totals[key]
+            self.departments.remove(key)
+
+
+Row = Tuple[str, str, str, int, str, str, float, int, int]
+
+
+class LeaderboardStore:
+    """Рейтинги в памяти с пакетной записью в БД статистики."""
+    
+    def __init__(self, connect: Callable[[], "aiosqlite.Connection"]):
+        """
+        Args:
+            connect: Фабрика соединений (StatsManager.connect)
+        """
+        self.connect = connect
+        self.boards: Dict[BoardKey, Board] = {}
+        # Пользователь → (время, специализация, уровень) последнего результата (рейтинг /top по умолчанию)
+        self.latest: Dict[int, Tuple[int, str, str]] = {}
+        self.loaded = False
+        self._dirty: Set[Tuple[BoardKey, int]] = set()
+        self._synced = 0.0
+        self._task: asyncio.Task | None = None
+        self.snapshots = 0
+        self.written = 0
+    
+    def __len__(self) -> int:
+        """Записей сотрудников во всех рейтингах в памяти."""
+        return sum(len(board.entries) for board in self.boards.values())
+    
+    @property
+    def pending(self) -> int:
+        """Изменённых записей, ещё не записанных в БД."""
+        return len(self._dirty)
+    
+    def board(self, specialization: str, difficulty: str, period: str = ALL_TIME) -> Optional[Board]:
+        return self.boards.get((specialization, difficulty, period))
+    
+    def _board(self, key: BoardKey) -> Board:
+        board = self.boards.get(key)
+        if board is None:
+            board = self.boards[key] = Board(key)
+        return board
+    
+    def record(self, user_id: int, test_state: CurrentTestState, now: Optional[float] = None):
+        """
+        Учесть сохранённый результат теста в рейтингах за всё время и за месяц.
+        До загрузки рейтингов (load) результаты не учитываются: load досчитает
+        их по test_results.
+        """
+        if not self.loaded:
+            return
+        self._record(
+            user_id, test_state.specialization, test_state.difficulty.value,
+            test_state.full_name, test_state.department, test_state.percentage,
+            int(time.time() if now is None else now)
+        )
+    
+    def _record(
+        self, user_id: int, specialization: str, difficulty: str,
+        full_name: str, department: str, percentage: float, now: int
+    ):
+        for period in (ALL_TIME, current_month(now)):
+            key = (specialization, difficulty, period)
+            self._board(key).record(user_id, full_name, department, percentage, now)
+            self._dirty.add((key, user_id))
+        self.latest[user_id] = (now, specialization, difficulty)
+    
+    def _apply(self, rows: Iterable[Row]) -> int:
+        """Записи из БД в рейтинги (заменяют записи в памяти)."""
+        count = 0
+        for specialization, difficulty, period, user_id, full_name, department, best, tests, reached in rows:
+            self._board((specialization, difficulty, period)).put(
+                Entry(user_id, full_name, department, best, tests, reached)
+            )
+            latest = self.latest.get(user_id)
+            if period == ALL_TIME and (latest is None or latest[0] < reached):
+                self.latest[user_id] = (reached, specialization, difficulty)
+            count += 1
+        return count
+    
+    async def load(self) -> int:
+        """
+        Загрузить рейтинги за всё время и текущий месяц из БД (если таблица
+        пуста — пересчитать по test_results) и досчитать результаты новее
+        последней записи; изменения запишутся при следующем snapshot.
+        
+        Returns:
+            Число загруженных записей
+        """
+        now = time.time()
+        month = current_month(now)
+        async with self.connect() as db:
+            # Startup-хук может выполниться раньше StatsManager.init_db
+            for statement in SCHEMA:
+                await db.execute(statement)
+            await db.commit()
+            cursor = await db.execute(SELECT_ENTRIES + " WHERE period IN (?, ?)", (ALL_TIME, month))
+            rows = await cursor.fetchall()
+            cursor = await db.execute("SELECT MAX(updated_at) FROM leaderboard_entries")
+            (last_snapshot,) = await cursor.fetchone()
+            cursor = await db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'test_results'"
+            )
+            has_results = await cursor.fetchone() is not None
+            backfill = last_snapshot is None and has_results
+            replay = []
+            if backfill:
+                for period, since in ((ALL_TIME, 0), (month, month_start(now))):
+                    cursor = await db.execute(BACKFILL, (int(since),))
+                    rows += [(s, d, period, *rest) for s, d, *rest in await cursor.fetchall()]
+            elif has_results:
+                cursor = await db.execute(REPLAY, (int(last_snapshot),))
+                replay = await cursor.fetchall()
+        
+        self.boards.clear()
+        self.latest.clear()
+        self._dirty.clear()
+        count = self._apply(rows)
+        if backfill:
+            self._dirty.update(((s, d, period), user_id) for s, d, period, user_id, *_ in rows)
+        for user_id, specialization, difficulty, full_name, department, percentage, created in replay:
+            self._record(user_id, specialization, difficulty, full_name, department, percentage, created)
+        if replay:
+            logger.info(f"🏆 Рейтинги: учтено {len(replay)} результатов новее последней записи")
+        self._synced = now
+        self.loaded = True
+        return count
+    
+    async def snapshot(self) -> int:
+        """
+        Записать изменённые записи одной транзакцией, в многопроцессном режиме —
+        забрать записи других worker'ов; рейтинги прошлых месяцев выгрузить из памяти.
+        
+        Returns:
+            Число записанных записей
+        """
+        written = 0
+        if self._dirty:
+            keys, self._dirty = self._dirty, set()
+            updated_at = time.time()
+            rows = [
+                (*key, user_id, entry.full_name, entry.department, entry.best, entry.tests, entry.reached, updated_at)
+                for key, user_id in keys
+                if (board := self.boards.get(key)) is not None
+                and (entry := board.entries.get(user_id)) is not None
+            ]
+            try:
+                async with self.connect() as db:
+                    await db.executemany(UPSERT_ENTRY, rows)
+                    await db.commit()
+            except Exception:
+                # Не потерять изменения: запишутся при следующем snapshot
+                self._dirty |= keys
+                raise
+            written = len(rows)
+            self.snapshots += 1
+            self.written += written
+        
+        if settings.workers > 1:
+            await self.sync()
+        
+        month = current_month()
+        dirty_boards = {key for key, _ in self._dirty}
+        for key in [k for k in self.boards if k[2] not in (ALL_TIME, month) and k not in dirty_boards]:
+            del self.boards[key]
+        return written
+    
+    async def sync(self) -> int:
+        """Записи, изменённые в БД другими worker'ами после прошлой синхронизации."""
+        since = self._synced - SYNC_OVERLAP
+        self._synced = time.time()
+        async with self.connect() as db:
+            cursor = await db.execute(
+                SELECT_ENTRIES + " WHERE updated_at >= ? AND period IN (?, ?)",
+                (since, ALL_TIME, current_month())
+            )
+            rows = await cursor.fetchall()
+        # Записи, изменённые здесь и ещё не записанные, новее БД
+        return self._apply(row for row in rows if ((row[0], row[1], row[2]), row[3]) not in self._dirty)
+    
+    async def _run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if not self.loaded:
+                # Загрузка при старте не удалась: повторяем, пропущенные результаты досчитает load
+                try:
+                    count = await self.load()
+                except Exception as e:
+                    logger.error(f"❌ Рейтинги не загружены, повтор через {interval:.0f} с: {e}")
+                    continue
+                logger.info(f"🏆 Рейтинги загружены: {len(self.boards)} рейтингов, {count} записей")
+            try:
+                await self.snapshot()
+            except Exception as e:
+                logger.error(f"❌ Не удалось записать рейтинги ({self.pending} записей): {e}")
+    
+    def start(self, interval: float):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval), name="leaderboard-snapshot")
+    
+    async def stop(self):
+        """Остановить периодическую запись и записать оставшиеся изменения."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if not self.loaded:
+            return
+        try:
+            await self.snapshot()
+        except Exception as e:
+            logger.error(f"❌ Рейтинги не записаны при остановке ({self.pending} записей): {e}")
+
+
+# Уровни, по которым ведутся рейтинги (тренировка не сохраняется как результат)
+RANKED_LEVELS = tuple(d.value for d in Difficulty if d != Difficulty.TRAINING)
+PERIOD_WORDS = {"месяц": "month", "month": "month", "всё": ALL_TIME, "все": ALL_TIME, "all": ALL_TIME}
+
+TOP_USAGE = (
+    "🏆 <b>Рейтинг</b>: /top [специализация] [уровень] [месяц|всё]\n"
+    f"Специализации: {', '.join(settings.specializations)}\n"
+    f"Уровни: {', '.join(RANKED_LEVELS)}"
+)
+
+
+def format_board(board: Board, user_id: int, top: int) -> str:
+    """Текст рейтинга: топ сотрудников и подразделений, место пользователя."""
+    specialization, difficulty, period = board.key
+    title = "за всё время" if period == ALL_TIME else f"за месяц {period}"
+    lines = [f"🏆 <b>Рейтинг: {specialization} · {difficulty} · {title}</b>", ""]
+    
+    lines.append(f"👤 <b>Сотрудники</b> ({len(board.people)}):")
+    for place, key in board.people.top(top):
+        entry = board.entries[key]
+        department = f" ({html.escape(entry.department)})" if entry.department else ""
+        lines.append(f"{place}. {html.escape(entry.full_name) or '—'}{department} — {entry.best:.1f}%")
+    
+    lines += ["", f"🏢 <b>Подразделения</b> ({len(board.departments)}):"]
+    for place, key in board.departments.top(top):
+        name, total, members = board.totals[key]
+        lines.append(f"{place}. {html.escape(name) or '—'} — {total / members:.1f}% ({members} чел.)")
+    
+    entry = board.entries.get(user_id)
+    if entry is not None:
+        department = board.department_of(entry)
+        lines += [
+            "",
+            f"📍 Ваше место: {board.people.rank(user_id)} из {len(board.people)} "
+            f"({entry.best:.1f}%, тестов: {entry.tests})",
+            f"📍 Ваше подразделение: {board.departments.rank(department)} из {len(board.departments)}"
+        ]
+    return "\n".join(lines)
+
+
+def leaderboard_text(user_id: int, args: str = "") -> str:
+    """
+    Ответ на /top: рейтинг по аргументам команды.
+    
+    Без специализации и уровня — рейтинг последнего теста пользователя
+    (или самый большой рейтинг указанной специализации / уровня).
+    
+    Args:
+        user_id: ID пользователя
+        args: Аргументы команды: специализация, уровень, «месяц» или «всё» в любом порядке
+    """
+    from .stats import leaderboard_store
+    
+    if not settings.leaderboard_enabled or not leaderboard_store.loaded:
+        return "🏆 Рейтинги сейчас недоступны"
+    
+    specialization = difficulty = None
+    period = ALL_TIME
+    for word in args.lower().split():
+        if word in settings.specializations:
+            specialization = word
+        elif word in RANKED_LEVELS:
+            difficulty = word
+        elif word in PERIOD_WORDS:
+            period = PERIOD_WORDS[word]
+        else:
+            return f"❌ Не понял «{html.escape(word)}»\n\n{TOP_USAGE}"
+    
+    latest = leaderboard_store.latest.get(user_id)
+    if latest is not None and specialization in (None, latest[1]) and difficulty in (None, latest[2]):
+        specialization, difficulty = latest[1], latest[2]
+    elif specialization is None or difficulty is None:
+        candidates = [
+            board for (spec, level, board_period), board in leaderboard_store.boards.items()
+            if board_period == ALL_TIME and specialization in (None, spec) and difficulty in (None, level)
+        ]
+        if not candidates:
+            return f"🏆 Результатов пока нет\n\n{TOP_USAGE}"
+        specialization, difficulty, _ = max(candidates, key=lambda board: len(board.entries)).key
+    
+    if period != ALL_TIME:
+        period = current_month()
+    board = leaderboard_store.board(specialization, difficulty, period)
+    if board is None or not board.entries:
+        return f"🏆 {specialization} · {difficulty}: результатов за этот период пока нет\n\n{TOP_USAGE}"
+    return format_board(board, user_id, settings.leaderboard_top)
+
+
+def setup_leaderboard(dispatcher: Dispatcher):
+    """
+    Загрузка рейтингов и их периодическая запись в жизненном цикле диспетчера.
+    
+    Args:
+        dispatcher: Dispatcher бота (хранилище доступно как dispatcher["leaderboard_store"])
+    """
+    if not settings.leaderboard_enabled:
+        return
+    # Хранилище создаётся в stats (там же схема БД), stats импортирует этот модуль
+    from .stats import leaderboard_store
+    
+    dispatcher["leaderboard_store"] = leaderboard_store
+    
+    async def on_startup():
+        started = time.perf_counter()
+        try:
+            count = await leaderboard_store.load()
+        except Exception as e:
+            # Бот работает и без рейтингов: /top ответит, что они недоступны, загрузка повторится
+            logger.error(f"❌ Рейтинги не загружены: {e}", exc_info=True)
+        else:
+            logger.info(
+                f"🏆 Рейтинги загружены: {len(leaderboard_store.boards)} рейтингов, {count} записей "
+                f"за {(time.perf_counter() - started) * 1000:.0f} мс"
+            )
+        leaderboard_store.start(settings.leaderboard_snapshot_interval)
+    
+    async def on_shutdown():
+        await leaderboard_store.stop()
+        logger.info(
+            f"💾 Рейтинги: записей {leaderboard_store.written} "
+            f"за {leaderboard_store.snapshots} сбросов"
+        )
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
@@ -1,62 +1,90 @@
 """
 Основная логика теста: показ вопросов, обработка ответов, завершение.
 Production-ready с правильной обработкой toggle и истории ответов.
+В тренировке (test_state.training) после каждого ответа — отзыв над следующим
+вопросом, по завершении — новое расписание повторений вместо результата теста.
 """
 import logging
+from datetime import datetime
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
 from .models import CurrentTestState, Question
-from .keyboards import get_test_keyboard, get_finish_keyboard
+from .keyboards import get_test_keyboard, get_finish_keyboard, get_training_finish_keyboard
 from .states import TestStates
+from .metrics import FINISH_TEST_LATENCY
 
 logger = logging.getLogger(__name__)
 
 
-async def show_question(
-    callback: CallbackQuery | Message,
-    test_state: CurrentTestState,
-    question_index: int | None = None
-):
+# Эмодзи номеров вариантов ответов
+OPTION_EMOJI = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣"]
+
+
+def format_question_text(test_state: CurrentTestState) -> str:
     """
-    Показать вопрос пользователю.
-    Варианты ответов показываются в тексте сообщения, кнопки - только эмодзи.
+    Текст текущего вопроса: таймер, номер, формулировка и варианты ответов.
     
     Args:
-        callback: CallbackQuery или Message для отправки
-        test_state: Состояние теста
-        question_index: Индекс вопроса (если None, используется current_index)
-    """
-    if question_index is not None:
-        test_state.current_index = question_index
+        test_state: Состояние теста (current_index и selected_answers уже выставлены)
     
-    # Получаем текущий вопрос
+    Returns:
+        HTML-текст сообщения
+    """
     question = test_state.questions[test_state.current_index]
     
-    # Загружаем ранее выбранные ответы (если есть)
-    test_state.load_answer(test_state.current_index)
-    
     # Формируем текст с вариантами ответов
     timer_text = test_state.timer_task.remaining_time() if test_state.timer_task else "∞"
     
-    # Заголовок
+    # Заголовок (в адаптивном тесте число вопросов заранее неизвестно)
+    total = f"до {test_state.adaptive.max_questions}" if test_state.adaptive else len(test_state.questions)
     header = (
         f"⏰ Осталось: <b>{timer_text}</b>\n\n"
-        f"📝 <b>Вопрос {test_state.current_index + 1}/{len(test_state.questions)}</b>"
+        f"📝 <b>Вопрос {test_state.current_index + 1}/{total}</b>"
     )
     
+    # Тренировка: отзыв на предыдущий ответ
+    if test_state.training is not None and test_state.training.feedback:
+        header = f"{test_state.training.feedback}\n\n{header}"
+    
     # Вопрос
     question_text = f"\n\n{question.question}\n\n"
     
     # Варианты ответов с эмодзи
     options_text = "<b>Варианты ответов:</b>\n"
     for i, option in enumerate(question.options, start=1):
-        emoji = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣"][i-1] if i <= 6 else f"{i}️⃣"
+        emoji = OPTION_EMOJI[i - 1] if i <= 6 else f"{i}️⃣"
         # Отмечаем выбранные варианты
         mark = "✅ " if i in test_state.selected_answers else ""
         options_text += f"{mark}{emoji} {option}\n"
     
-    full_text = header + question_text + options_text
+    return header + question_text + options_text
+
+
+async def show_question(
+    callback: CallbackQuery | Message,
+    test_state: CurrentTestState,
+    question_index: int | None = None
+):
+    """
+    Показать вопрос пользователю.
+    Варианты ответов показываются в тексте сообщения, кнопки - только эмодзи.
+    
+    Args:
+        callback: CallbackQuery или Message для отправки
+        test_state: Состояние теста
+        question_index: Индекс вопроса (если None, используется current_index)
+    """
+    if question_index is not None:
+        test_state.current_index = question_index
+    
+    # Получаем текущий вопрос
+    question = test_state.questions[test_state.current_index]
+    
+    # Загружаем ранее выбранные ответы (если есть)
+    test_state.load_answer(test_state.current_index)
+    
+    full_text = format_question_text(test_state)
     
     # Клавиатура - ТОЛЬКО эмодзи
     keyboard = get_test_keyboard(len(question.options), test_state.selected_answers)
@@ -74,19 +102,18 @@ async def show_question(
 
 async def handle_answer_toggle(
     callback: CallbackQuery,
-    state: FSMContext
+    state: FSMContext,
+    answer_num: int
 ):
     """
     Обработка нажатия на вариант ответа (toggle).
     
     Args:
-        callback: CallbackQuery с данными ans_{number}
+        callback: CallbackQuery с данными ans:{number}
         state: FSM context
+        answer_num: Номер варианта (1-based) из AnswerCallback
     """
     try:
-        # Извлекаем номер ответа из callback_data
-        answer_num = int(callback.data.split("_")[1])
-        
         # Получаем состояние теста
         data = await state.get_data()
         test_state: CurrentTestState = data.get("test_state")
@@ -98,10 +125,10 @@ async def handle_answer_toggle(
         # Toggle: добавляем или убираем ответ
         if answer_num in test_state.selected_answers:
             test_state.selected_answers.discard(answer_num)
-            logger.debug(f"➖ Убран ответ {answer_num}")
+            logger.debug("➖ Убран ответ %s", answer_num)
         else:
             test_state.selected_answers.add(answer_num)
-            logger.debug(f"➕ Добавлен ответ {answer_num}")
+            logger.debug("➕ Добавлен ответ %s", answer_num)
         
         # Обновляем ПОЛНОСТЬЮ сообщение (текст + клавиатуру)
         await show_question(callback, test_state)
@@ -138,6 +165,18 @@ async def handle_next_question(
         # Сохраняем текущий ответ в историю
         test_state.save_current_answer()
         
+        # Тренировка: расписание повторения вопроса и отзыв на ответ
+        notice = None
+        if test_state.training is not None:
+            notice = test_state.training.answer(test_state.current_index, test_state.selected_answers)
+        
+        # Адаптивный режим: обновляем оценку уровня и добавляем следующий вопрос
+        if test_state.adaptive is not None:
+            question = test_state.questions[test_state.current_index]
+            next_question = test_state.adaptive.answer(test_state.selected_answers == question.correct_answers)
+            if next_question is not None:
+                test_state.questions.append(next_question)
+        
         # Очищаем выбор для следующего вопроса
         test_state.selected_answers.clear()
         
@@ -147,6 +186,7 @@ async def handle_next_question(
         # Проверяем, не закончились ли вопросы
         if test_state.current_index >= len(test_state.questions):
             await finish_test(callback, state)
+            await callback.answer(notice)
             return
         
         # Показываем следующий вопрос
@@ -154,11 +194,12 @@ async def handle_next_question(
         
         # Сохраняем состояние
         await state.update_data(test_state=test_state)
-        await callback.answer()
+        await callback.answer(notice)
         
-        logger.info(
-            f"➡️ Пользователь {callback.from_user.id}: "
-            f"вопрос {test_state.current_index + 1}/{len(test_state.questions)}"
+        # debug и ленивое форматирование: запись на каждое нажатие
+        logger.debug(
+            "➡️ Пользователь %s: вопрос %s/%s",
+            callback.from_user.id, test_state.current_index + 1, len(test_state.questions)
         )
         
     except Exception as e:
@@ -166,6 +207,7 @@ async def handle_next_question(
         await callback.answer("❌ Ошибка перехода к следующему вопросу")
 
 
+@FINISH_TEST_LATENCY.track()
 async def finish_test(
     callback: CallbackQuery,
     state: FSMContext
@@ -192,10 +234,15 @@ async def finish_test(
         
         # Подсчитываем результаты
         test_state.calculate_results()
+        test_state.release_bank()
+        
+        if test_state.training is not None:
+            await finish_training(callback, state, test_state)
+            return
         
         # Сохраняем результат в БД
         from .stats import stats_manager
-        await stats_manager.save_result(test_state, callback.from_user.id)
+        await stats_manager.save_result(callback.from_user.id, test_state)
         
         # Формируем сообщение с результатами
         grade_emoji = {
@@ -219,6 +266,11 @@ async def finish_test(
             f"💯 <b>Процент:</b> {test_state.percentage:.1f}%\n"
             f"⏱ <b>Время:</b> {test_state.elapsed_time}"
         )
+        if test_state.adaptive is not None:
+            result_text += (
+                f"\n🎯 <b>Уровень (θ):</b> {test_state.adaptive.theta:+.2f} "
+                f"± {test_state.adaptive.se:.2f}"
+            )
         
         # Отправляем результаты с клавиатурой
         keyboard = get_finish_keyboard()
@@ -236,3 +288,43 @@ async def finish_test(
     except Exception as e:
         logger.error(f"❌ Ошибка завершения теста: {e}", exc_info=True)
         await callback.message.answer("❌ Ошибка при завершении теста")
+
+
+async def finish_training(
+    callback: CallbackQuery,
+    state: FSMContext,
+    test_state: CurrentTestState
+):
+    """
+    Завершение тренировки: запись расписания повторений и итог (без оценки и сертификата).
+    
+    Args:
+        callback: CallbackQuery
+        state: FSM context
+        test_state: Тренировка (test_state.training)
+    """
+    from .stats import review_store
+    
+    training = test_state.training
+    await review_store.save(callback.from_user.id, test_state.specialization, training.reviewed)
+    next_due = await review_store.next_due(callback.from_user.id, test_state.specialization)
+    
+    result_text = (
+        f"🔁 <b>Тренировка завершена!</b>\n\n"
+        f"📚 <b>Специализация:</b> {test_state.specialization}\n"
+        f"📈 <b>Верно:</b> {training.correct} из {len(training.reviewed)}\n"
+        f"⏱ <b>Время:</b> {test_state.elapsed_time}\n\n"
+    )
+    if next_due is None:
+        result_text += "🎉 Вопросов для повторения больше нет"
+    else:
+        result_text += f"📅 <b>Следующее повторение:</b> {datetime.fromtimestamp(next_due):%d.%m.%Y %H:%M}"
+    
+    await callback.message.edit_text(result_text, reply_markup=get_training_finish_keyboard())
+    await state.set_state(TestStates.showing_results)
+    await state.update_data(test_state=test_state)
+    
+    logger.info(
+        f"🔁 Пользователь {callback.from_user.id} завершил тренировку {test_state.specialization}: "
+        f"верно {training.correct} из {len(training.reviewed)}"
+    )
@@ -0,0 +1,203 @@
+"""
+Монитор здоровья event loop: задержка планирования и зависания.
+
+Heartbeat-корутина каждые `interval` секунд засыпает и замеряет, насколько
+позже запланированного она проснулась (lag). Сторожевой поток следит за
+временем последнего heartbeat: если loop не отвечает дольше порога, снимает
+стек потока event loop (sys._current_frames) — это и есть блокирующий код.
+
+Опционально включается asyncio debug с slow_callback_duration = порог
+(asyncio сам пишет в лог "Executing <Handle ...> took N seconds").
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+from .metrics import LOOP_LAG, LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Замер задержки event loop и снимки стека при зависаниях."""
+    
+    def __init__(
+        self,
+        interval: float = 0.5,
+        stall_threshold: float = 0.25,
+        summary_interval: float = 300.0,
+        debug: bool = False
+    ):
+        """
+        Инициализация монитора.
+        
+        Args:
+            interval: Период heartbeat (секунды)
+            stall_threshold: Задержка, после которой loop считается зависшим
+            summary_interval: Период сводки в лог (0 - без сводки)
+            debug: Включить asyncio debug (отчёт о медленных callback'ах)
+        """
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.summary_interval = summary_interval
+        self.debug = debug
+        
+        self._lag = LOOP_LAG.labels()
+        self._stalls = LOOP_STALLS.labels()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id = 0
+        
+        # Общие с потоком-сторожем поля (чтение/запись атомарны под GIL)
+        self._last_beat = 0.0
+        self._beat = 0
+        self._reported_beat = -1
+        
+        # Окно сводки
+        self._window_count = 0
+        self._window_sum = 0.0
+        self._window_max = 0.0
+        self._window_stalls = 0
+        self.max_lag = 0.0
+        self.stalls = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Запустить heartbeat и сторожевой поток (из работающего event loop)."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        loop.slow_callback_duration = self.stall_threshold
+        if self.debug:
+            loop.set_debug(True)
+        
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"🩺 Монитор event loop запущен (период {self.interval}s, "
+            f"порог {self.stall_threshold * 1000:.0f} мс, debug={self.debug})"
+        )
+    
+    async def stop(self):
+        """Остановить монитор и записать итоговую сводку."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+        self._log_summary()
+    
+    async def _heartbeat(self):
+        """Замер задержки пробуждения относительно запланированного времени."""
+        loop = asyncio.get_running_loop()
+        next_summary = loop.time() + self.summary_interval
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            lag = max(0.0, now - expected)
+            
+            self._beat += 1
+            self._last_beat = time.monotonic()
+            self._lag.observe(lag)
+            self._window_count += 1
+            self._window_sum += lag
+            if lag > self._window_max:
+                self._window_max = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            
+            # Сторож уже сообщил о зависании со стеком — не дублируем
+            if lag > self.stall_threshold and self._reported_beat != self._beat - 1:
+                self._record_stall()
+                logger.warning(f"⚠️ Задержка event loop {lag * 1000:.0f} мс")
+            
+            if self.summary_interval and now >= next_summary:
+                self._log_summary()
+                next_summary = now + self.summary_interval
+    
+    def _watch(self):
+        """Поток-сторож: снимок стека event loop при отсутствии heartbeat."""
+        deadline = self.interval + self.stall_threshold
+        while not self._stop.wait(self.stall_threshold / 2):
+            beat = self._beat
+            overdue = time.monotonic() - self._last_beat
+            if overdue <= deadline or self._reported_beat == beat:
+                continue
+            self._reported_beat = beat
+            self._record_stall()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "стек недоступен"
+            logger.warning(
+                f"⚠️ Event loop заблокирован {(overdue - self.interval) * 1000:.0f} мс, "
+                f"стек потока event loop:\n{stack}"
+            )
+    
+    def _record_stall(self):
+        self._stalls.inc()
+        self._window_stalls += 1
+        self.stalls += 1
+    
+    def _log_summary(self):
+        """Сводка за окно: средняя/максимальная задержка и число зависаний."""
+        if not self._window_count:
+            return
+        mean = self._window_sum / self._window_count
+        logger.info(
+            f"🩺 Event loop: lag средний {mean * 1000:.1f} мс, "
+            f"максимум {self._window_max * 1000:.1f} мс, зависаний {self._window_stalls} "
+            f"(замеров {self._window_count})"
+        )
+        self._window_count = 0
+        self._window_sum = 0.0
+        self._window_max = 0.0
+        self._window_stalls = 0
+
+
+def setup_loop_monitor(dispatcher: Dispatcher):
+    """
+    Подключить монитор event loop к жизненному циклу диспетчера.
+    
+    Args:
+        dispatcher: Dispatcher бота (монитор доступен как dispatcher["loop_monitor"])
+    """
+    if not settings.loop_monitor_enabled:
+        return
+    
+    monitor = LoopMonitor(
+        interval=settings.loop_lag_interval,
+        stall_threshold=settings.loop_stall_threshold,
+        summary_interval=settings.loop_summary_interval,
+        debug=settings.loop_debug
+    )
+    dispatcher["loop_monitor"] = monitor
+    
+    async def on_startup():
+        monitor.start()
+    
+    async def on_shutdown():
+        await monitor.stop()
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
@@ -0,0 +1,358 @@
+"""
+Метрики в формате Prometheus: счётчики, gauge и гистограммы задержек.
+Локальный HTTP endpoint /metrics (aiohttp) без внешних зависимостей.
+
+Горячий путь: дочерние метрики с метками создаются один раз и кэшируются
+(labels() → словарь), observe() — bisect по кортежу границ и инкремент.
+Гистограммы хэндлеров привязываются к функциям хэндлеров при старте
+(bind_handler_metrics), middleware находит их одним обращением к словарю.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiogram import Dispatcher
+
+from config.settings import settings
+from .callbacks import callback_dispatcher
+from .states import TestStates
+from .timers import TestTimer
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм задержек (секунды)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Метки в формате {a="1",b="2"}."""
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    """Базовый класс метрики с кэшем дочерних метрик по меткам."""
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+    
+    @abstractmethod
+    def _new_child(self):
+        """Новая дочерняя метрика (для очередного набора значений меток)."""
+    
+    def labels(self, *values: str):
+        """Дочерняя метрика для значений меток (создаётся один раз)."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+    
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонный счётчик."""
+    kind = "counter"
+    
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def set(self, value: float):
+        self.value = value
+    
+    def inc(self, amount: float = 1):
+        self.value += amount
+    
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Текущее значение (может расти и убывать)."""
+    kind = "gauge"
+    
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    def track(self):
+        """Декоратор async-функции: замер длительности вызова."""
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик и сборщиков значений на момент запроса /metrics."""
+    
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+    
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+    
+    def on_collect(self, collector: Callable[[], None]):
+        """Функция, обновляющая gauge перед выдачей (вне горячего пути)."""
+        self.collectors.append(collector)
+    
+    def render(self) -> str:
+        """Текстовый формат Prometheus."""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка сборщика метрик: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# === ГЛОБАЛЬНЫЙ РЕЕСТР И МЕТРИКИ БОТА ===
+registry = MetricsRegistry()
+
+HANDLER_LATENCY = registry.register(Histogram(
+    "bot_handler_duration_seconds", "Длительность обработки хэндлером", ["handler"]
+))
+HANDLER_ERRORS = registry.register(Counter(
+    "bot_handler_errors_total", "Ошибки, перехваченные ErrorHandlerMiddleware", ["handler"]
+))
+API_LATENCY = registry.register(Histogram(
+    "bot_telegram_api_duration_seconds", "Длительность вызовов Telegram Bot API", ["method"]
+))
+API_ERRORS = registry.register(Counter(
+    "bot_telegram_api_errors_total", "Ошибки вызовов Telegram Bot API", ["method"]
+))
+ACTIVE_SESSIONS = registry.register(Gauge(
+    "bot_active_test_sessions", "Пользователи в процессе прохождения теста"
+))
+ACTIVE_TIMERS = registry.register(Gauge(
+    "bot_active_timers", "Запущенные таймеры тестов"
+))
+SCHEDULER = registry.register(Gauge(
+    "bot_update_scheduler", "Метрики очередей UpdateSchedulerMiddleware", ["metric"]
+))
+ANTISPAM_USERS = registry.register(Gauge(
+    "bot_antispam_tracked_users", "Пользователи в памяти AntiSpamMiddleware"
+))
+LOOP_LAG = registry.register(Histogram(
+    "bot_event_loop_lag_seconds", "Задержка планирования event loop"
+))
+LOOP_STALLS = registry.register(Counter(
+    "bot_event_loop_stalls_total", "Зависания event loop дольше порога"
+))
+BANK_RELOADS = registry.register(Counter(
+    "bot_question_bank_reloads_total", "Горячие перезагрузки банков вопросов", ["specialization", "result"]
+))
+
+# Предсозданные дочерние метрики для хэндлеров вне callback-таблицы
+FINISH_TEST_LATENCY = HANDLER_LATENCY.labels("finish_test")
+
+
+# Функция хэндлера → дочерняя гистограмма длительности (заполняется bind_handler_metrics)
+_handler_latency: Dict[Optional[Callable], _HistogramChild] = {}
+
+
+def _handler_callback(data: Dict[str, Any]) -> Optional[Callable]:
+    """Функция хэндлера aiogram (или маршрута callback-таблицы) из data middleware."""
+    route = data.get("callback_route")
+    handler = route.handler if route is not None else data.get("handler")
+    return handler.callback if handler is not None else None
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    """Имя хэндлера aiogram (или маршрута callback-таблицы) из data middleware."""
+    callback = _handler_callback(data)
+    return callback.__name__ if callback is not None else "unknown"
+
+
+def handler_latency(data: Dict[str, Any]) -> _HistogramChild:
+    """Гистограмма длительности хэндлера из data middleware (без labels() на каждое событие)."""
+    callback = _handler_callback(data)
+    child = _handler_latency.get(callback)
+    if child is None:
+        # Хэндлер, зарегистрированный после старта
+        child = _handler_latency[callback] = HANDLER_LATENCY.labels(
+            callback.__name__ if callback is not None else "unknown"
+        )
+    return child
+
+
+def bind_handler_metrics(dispatcher: Dispatcher) -> int:
+    """
+    Привязать гистограммы длительности к хэндлерам message и callback_query
+    всех роутеров диспетчера и маршрутам callback-таблицы.
+    
+    Returns:
+        Число привязанных хэндлеров
+    """
+    callbacks = [route.handler.callback for route in callback_dispatcher.routes.values()]
+    for router in dispatcher.chain_tail:
+        # Единственный хэндлер таблицы маршрутов: время учитывается по маршруту
+        if router is callback_dispatcher.router:
+            continue
+        for observer in (router.message, router.callback_query):
+            callbacks.extend(handler.callback for handler in observer.handlers)
+    for callback in callbacks:
+        if callback not in _handler_latency:
+            _handler_latency[callback] = HANDLER_LATENCY.labels(callback.__name__)
+    return len(callbacks)
+
+
+async def start_metrics_server(host: str, port: int) -> "web.AppRunner":
+    """
+    Запустить HTTP endpoint /metrics.
+    
+    Args:
+        host: Адрес (по умолчанию только localhost)
+        port: Порт
+    
+    Returns:
+        AppRunner для последующей остановки (runner.cleanup())
+    """
+    from aiohttp import web
+    
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+    
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Метрики: http://{host}:{port}/metrics")
+    return runner
+
+
+def setup_metrics(dispatcher: Dispatcher):
+    """
+    Подключить сборщики gauge и endpoint /metrics к диспетчеру.
+    
+    Сервер стартует в startup-хуке; в многопроцессном режиме каждый worker
+    слушает свой порт: metrics_port + 1 + worker_id.
+    
+    Args:
+        dispatcher: Dispatcher бота (update_scheduler, antispam в workflow data)
+    """
+    if not settings.metrics_enabled:
+        return
+    
+    answering = TestStates.answering_question.state
+    
+    def collect():
+        storage = getattr(dispatcher.storage, "storage", {})
+        ACTIVE_SESSIONS.labels().set(
+            sum(1 for record in storage.values() if record.state == answering)
+        )
+        ACTIVE_TIMERS.labels().set(len(TestTimer.active))
+        scheduler = dispatcher.get("update_scheduler")
+        if scheduler:
+            for key, value in scheduler.snapshot().items():
+                SCHEDULER.labels(key).set(value)
+        antispam = dispatcher.get("antispam")
+        if antispam:
+            ANTISPAM_USERS.labels().set(antispam.tracked_users)
+    
+    registry.on_collect(collect)
+    server: Dict[str, Optional["web.AppRunner"]] = {"runner": None}
+    
+    async def on_startup():
+        # Роутеры подключаются после setup_metrics
+        bind_handler_metrics(dispatcher)
+        worker_id = dispatcher.get("worker_id")
+        port = settings.metrics_port if worker_id is None else settings.metrics_port + 1 + worker_id
+        try:
+            server["runner"] = await start_metrics_server(settings.metrics_host, port)
+        except OSError as e:
+            logger.warning(f"⚠️ Endpoint метрик не запущен ({settings.metrics_host}:{port}): {e}")
+    
+    async def on_shutdown():
+        runner = server["runner"]
+        if runner:
+            server["runner"] = None
+            await runner.cleanup()
+    
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
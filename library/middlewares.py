@@ -1,36 +1,92 @@
 """
-Middlewares: AntiSpam (flood protect), ErrorHandler.
-Для dp.message.middleware() и dp.callback_query.middleware().
+Middlewares: AntiSpam (flood protect), ErrorHandler, CallbackDispatch, UpdateScheduler, Metrics.
+Для dp.message.middleware(), dp.callback_query.middleware() и dp.update.outer_middleware().
+ApiMetricsMiddleware — для bot.session.middleware().
 """
+import asyncio
 import logging
 import time
 from typing import Dict, Any, Callable, Awaitable
-from collections import defaultdict
+from collections import OrderedDict
 
-from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery, TelegramObject
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod, Response
+from aiogram.types import Message, CallbackQuery, TelegramObject, Update
+
+from .callbacks import CallbackDispatcher
+from .metrics import HANDLER_ERRORS, API_LATENCY, API_ERRORS, handler_latency, handler_name
 
 logger = logging.getLogger(__name__)
 
 
 class AntiSpamMiddleware(BaseMiddleware):
     """
-    Защита от спама: ограничение частоты сообщений.
-    Лимит: 3 сообщения в секунду на пользователя.
+    Защита от спама: GCRA (Generic Cell Rate Algorithm) на пользователя.
+    Лимит: max_requests событий за rate_limit секунд (всплеск до max_requests).
+    
+    На пользователя хранится одно число — TAT (theoretical arrival time).
+    Проверка O(1); записи с TAT в прошлом эквивалентны новому пользователю
+    и вытесняются с начала OrderedDict (амортизированно O(1) на событие).
+    Один экземпляр подключается и к message, и к callback_query.
     """
     
-    def __init__(self, rate_limit: float = 0.5, max_requests: int = 3):
+    def __init__(self, rate_limit: float = 0.5, max_requests: int = 3, max_users: int = 100_000):
         """
         Инициализация middleware.
         
         Args:
-            rate_limit: Минимальный интервал между сообщениями (секунды)
-            max_requests: Максимум запросов за интервал
+            rate_limit: Окно ограничения (секунды)
+            max_requests: Максимум запросов за окно
+            max_users: Жёсткий предел отслеживаемых пользователей (LRU)
         """
         super().__init__()
         self.rate_limit = rate_limit
         self.max_requests = max_requests
-        self.user_last_time: Dict[int, list[float]] = defaultdict(list)
+        self.max_users = max_users
+        self.emission_interval = rate_limit / max_requests
+        self.burst_tolerance = rate_limit - self.emission_interval
+        self._tat: OrderedDict[int, float] = OrderedDict()
+    
+    @property
+    def tracked_users(self) -> int:
+        """Количество пользователей в памяти."""
+        return len(self._tat)
+    
+    def allow(self, user_id: int, now: float | None = None) -> bool:
+        """
+        Проверить и учесть запрос пользователя.
+        
+        Args:
+            user_id: ID пользователя
+            now: Текущее время (time.monotonic), для тестов и бенчмарков
+        
+        Returns:
+            True если запрос укладывается в лимит
+        """
+        if now is None:
+            now = time.monotonic()
+        
+        tat = self._tat.get(user_id, now)
+        if tat < now:
+            tat = now
+        
+        if tat - now > self.burst_tolerance:
+            return False
+        
+        self._tat[user_id] = tat + self.emission_interval
+        self._tat.move_to_end(user_id)
+        self._evict(now)
+        return True
+    
+    def _evict(self, now: float):
+        """Удалить простаивающих пользователей с начала очереди (и сверх max_users)."""
+        entries = self._tat
+        while entries:
+            user_id = next(iter(entries))
+            if entries[user_id] > now and len(entries) <= self.max_users:
+                break
+            del entries[user_id]
     
     async def __call__(
         self,
@@ -40,17 +96,9 @@ class AntiSpamMiddleware(BaseMiddleware):
     ) -> Any:
         """Обработка события с проверкой на спам."""
         user_id = event.from_user.id
-        now = time.time()
-        
-        # Получаем историю запросов пользователя
-        user_times = self.user_last_time[user_id]
-        
-        # Удаляем старые записи (старше rate_limit)
-        user_times[:] = [t for t in user_times if now - t < self.rate_limit]
         
-        # Проверяем лимит
-        if len(user_times) >= self.max_requests:
-            logger.warning(f"⚠️ Спам от пользователя {user_id}")
+        if not self.allow(user_id):
+            logger.warning("⚠️ Спам от пользователя %s", user_id)
             
             if isinstance(event, CallbackQuery):
                 await event.answer("⏳ Слишком частые действия! Подождите немного.", show_alert=True)
@@ -59,9 +107,6 @@ class AntiSpamMiddleware(BaseMiddleware):
             
             return
         
-        # Добавляем текущее время
-        user_times.append(now)
-        
         # Продолжаем обработку
         return await handler(event, data)
 
@@ -83,6 +128,7 @@ class ErrorHandlerMiddleware(BaseMiddleware):
             return await handler(event, data)
         
         except Exception as e:
+            HANDLER_ERRORS.labels(handler_name(data)).inc()
             logger.error(
                 f"❌ Ошибка в хэндлере для пользователя {event.from_user.id}: {e}",
                 exc_info=True
@@ -103,3 +149,202 @@ class ErrorHandlerMiddleware(BaseMiddleware):
             
             # Не пробрасываем ошибку дальше
             return None
+
+
+class CallbackDispatchMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.callback_query.
+    Один раз разбирает callback_data и находит маршрут в CallbackDispatcher,
+    вместо проверки цепочки F.data-фильтров в каждом роутере.
+    """
+    
+    def __init__(self, dispatcher: CallbackDispatcher):
+        """
+        Инициализация middleware.
+        
+        Args:
+            dispatcher: Таблица маршрутов callback_data
+        """
+        super().__init__()
+        self.dispatcher = dispatcher
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Разбор callback_data и передача маршрута хэндлеру через data."""
+        if event.data:
+            resolved = self.dispatcher.resolve(event.data, data.get("raw_state"))
+            if resolved is not None:
+                data["callback_route"], data["callback_data"] = resolved
+        
+        return await handler(event, data)
+
+
+class _ChatQueue:
+    """Очередь updates одного чата: FIFO-блокировка и глубина."""
+    __slots__ = ("lock", "depth")
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: планировщик обработки updates.
+    
+    - updates одного чата выполняются строго по очереди (FIFO asyncio.Lock),
+      поэтому get_data/update_data одного пользователя не перемежаются,
+      а raw_state перечитывается после ожидания в очереди;
+    - разные чаты обрабатываются параллельно, но не более max_concurrent одновременно;
+    - при перегрузке (max_pending ожидающих или max_chat_queue в одном чате)
+      новые updates отбрасываются без обработки (на нажатие кнопки — короткий
+      ответ «повторите», чтобы кнопка не ждала таймаута Telegram).
+    """
+    
+    def __init__(self, max_concurrent: int = 64, max_pending: int = 1000, max_chat_queue: int = 10):
+        """
+        Инициализация планировщика.
+        
+        Args:
+            max_concurrent: Максимум одновременно выполняемых хэндлеров
+            max_pending: Максимум updates в обработке и ожидании (порог сброса)
+            max_chat_queue: Максимум updates в очереди одного чата
+        """
+        super().__init__()
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.max_chat_queue = max_chat_queue
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._queues: Dict[int, _ChatQueue] = {}
+        
+        # Метрики
+        self.pending = 0
+        self.in_flight = 0
+        self.peak_pending = 0
+        self.processed_total = 0
+        self.shed_total = 0
+    
+    def snapshot(self) -> Dict[str, int]:
+        """Текущие метрики очередей."""
+        return {
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "waiting": self.pending - self.in_flight,
+            "chats": len(self._queues),
+            "peak_pending": self.peak_pending,
+            "processed_total": self.processed_total,
+            "shed_total": self.shed_total,
+        }
+    
+    @staticmethod
+    async def _answer_shed(callback: CallbackQuery, bot: Bot | None):
+        """Ответ на отброшенное нажатие: кнопка не «крутится» до таймаута Telegram."""
+        if bot is None:
+            return
+        try:
+            await bot.answer_callback_query(
+                callback.id, text="⏳ Бот перегружен, нажмите ещё раз через пару секунд"
+            )
+        except Exception as e:
+            logger.debug("⚠️ Не удалось ответить на отброшенный callback %s: %s", callback.id, e)
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Постановка update в очередь его чата с учётом глобального лимита."""
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else (user.id if user else 0)
+        
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _ChatQueue()
+        
+        # Сброс нагрузки
+        if self.pending >= self.max_pending or queue.depth >= self.max_chat_queue:
+            self.shed_total += 1
+            # debug: при перегрузке лог на каждый сброс сам станет нагрузкой
+            logger.debug(
+                "⚠️ Перегрузка: update %s от %s отброшен (в обработке %s, в очереди чата %s)",
+                event.update_id, key, self.pending, queue.depth
+            )
+            if queue.depth == 0:
+                del self._queues[key]
+            if event.callback_query is not None:
+                await self._answer_shed(event.callback_query, data.get("bot"))
+            return None
+        
+        queue.depth += 1
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            async with queue.lock:
+                async with self._semaphore:
+                    self.in_flight += 1
+                    try:
+                        # FSMContextMiddleware прочитал состояние до очереди чата:
+                        # пока update ждал, предыдущий мог сменить состояние
+                        state = data.get("state")
+                        if state is not None:
+                            data["raw_state"] = await state.get_state()
+                        return await handler(event, data)
+                    finally:
+                        self.in_flight -= 1
+                        self.processed_total += 1
+        finally:
+            self.pending -= 1
+            queue.depth -= 1
+            if queue.depth == 0:
+                del self._queues[key]
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Гистограмма длительности хэндлеров (bot_handler_duration_seconds{handler}).
+    Подключается первым inner-middleware для message и callback_query.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Замер длительности обработки события."""
+        child = handler_latency(data)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            child.observe(time.perf_counter() - start)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Длительность и ошибки вызовов Bot API по методам.
+    Для bot.session.middleware().
+    """
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Response:
+        """Замер вызова API."""
+        api_method = method.__api_method__
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            API_ERRORS.labels(api_method).inc()
+            raise
+        finally:
+            API_LATENCY.labels(api_method).observe(time.perf_counter() - start)
@@ -1,8 +1,11 @@
 """
 Модели для тестов: Pydantic v2, 4 уровня сложности.
-Question: из JSON (difficulty optional → BASIC).
+Question: из JSON (difficulty — реальная сложность вопроса, без поля — не размечена),
+uid — стабильный id для аналитики,
+topic/tags — метки для планов экзамена (settings.exam_blueprints).
 CurrentTestState: toggle-ответы, таймер, результаты, история ответов.
 """
+import hashlib
 import time
 from typing import List, Set, Optional, Dict
 from pydantic import BaseModel, Field, field_validator
@@ -10,12 +13,65 @@ from pydantic import BaseModel, Field, field_validator
 from .enum import Difficulty
 
 
+def question_uid(question: str, options: List[str]) -> int:
+    """
+    Стабильный id вопроса: 64-битный хэш текста и вариантов (в их порядке).
+    Не зависит от позиции в банке и версии банка; меняется при правке текста.
+    """
+    key = "\x1f".join([question, *options]).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little", signed=True)
+
+
+def normalize_tag(tag: str) -> str:
+    """Ключ метки в индексе: регистр и лишние пробелы не важны."""
+    return " ".join(tag.split()).casefold()
+
+
+def question_labels(topic: str, tags: List[str]) -> List[str]:
+    """Метки вопроса для индекса (тема и теги, нормализованные, без повторов)."""
+    labels = []
+    for label in (topic, *tags):
+        label = normalize_tag(label)
+        if label and label not in labels:
+            labels.append(label)
+    return labels
+
+
+def parse_difficulty(value) -> Optional[Difficulty]:
+    """
+    Сложность вопроса из банка: уровень без учёта регистра («Продвинутый»);
+    пусто — сложность не размечена.
+    
+    Raises:
+        ValueError: неизвестный уровень или режим теста («адаптивный», «тренировка»)
+    """
+    if value is None or isinstance(value, str) and not value.strip():
+        return None
+    if not isinstance(value, Difficulty):
+        try:
+            value = Difficulty(str(value).strip().lower())
+        except ValueError:
+            raise ValueError(f"difficulty: неизвестный уровень «{value}»") from None
+    if value in (Difficulty.ADAPTIVE, Difficulty.TRAINING):
+        raise ValueError(f"difficulty: «{value.value}» — режим теста, а не сложность вопроса")
+    return value
+
+
 class Question(BaseModel):
     """Вопрос из библиотеки."""
     question: str = Field(..., min_length=1, max_length=2000)
     options: List[str] = Field(..., min_length=3, max_length=6)
     correct_answers: Set[int] = Field(..., min_length=1)
-    difficulty: Difficulty = Difficulty.BASIC  # Default для JSON без поля
+    difficulty: Optional[Difficulty] = None  # Реальная сложность вопроса (None — не размечена)
+    uid: int = 0  # question_uid(), выставляется при выборе вопросов в тест
+    topic: str = Field(default="", max_length=200)  # Тема (раздел экзамена)
+    tags: List[str] = Field(default_factory=list, max_length=20)  # Дополнительные метки
+
+    @field_validator('difficulty', mode='before')
+    @classmethod
+    def validate_difficulty(cls, v):
+        """Уровень без учёта регистра; режим теста не может быть сложностью вопроса."""
+        return parse_difficulty(v)
 
     @field_validator('correct_answers', mode='after')
     @classmethod
@@ -36,6 +92,9 @@ class CurrentTestState(BaseModel):
     answers_history: Dict[int, Set[int]] = Field(default_factory=dict)  # {question_idx: {selected}}
     start_time: float = Field(default_factory=time.time)
     timer_task: Optional[object] = None  # asyncio.Task
+    bank: Optional[object] = None  # QuestionBank — версия банка, с которой начат тест
+    adaptive: Optional[object] = None  # AdaptiveSession — адаптивный режим (вопросы добавляются по ходу)
+    training: Optional[object] = None  # TrainingSession — тренировка (повторение ошибок)
     
     # Данные пользователя
     full_name: str = ""
@@ -70,6 +129,15 @@ class CurrentTestState(BaseModel):
         """Загрузить ранее выбранный ответ из истории."""
         self.selected_answers = self.answers_history.get(question_index, set()).copy()
     
+    def release_bank(self):
+        """
+        Тест завершён: не держать версию банка (старая версия после перезагрузки
+        освобождается, хотя состояние живёт на экране результатов).
+        """
+        self.bank = None
+        if self.adaptive is not None:
+            self.adaptive.bank = None
+    
     def calculate_results(self):
         """Подсчет результатов теста."""
         self.total_questions = len(self.questions)
@@ -82,6 +150,11 @@ class CurrentTestState(BaseModel):
         
         self.percentage = (self.correct_count / self.total_questions * 100) if self.total_questions > 0 else 0.0
         
+        # Адаптивный тест: доля верных зависит от подобранных вопросов, процент —
+        # ожидаемая доля верных по всему банку при итоговой оценке уровня
+        if self.adaptive is not None:
+            self.percentage = self.adaptive.domain_score() * 100
+        
         # Определение оценки
         if self.percentage >= 80:
             self.grade = "отлично"
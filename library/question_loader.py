@@ -1,53 +1,233 @@
 """
 Загрузка вопросов из JSON файлов специализаций.
 Фильтр по уровню сложности + fallback + random shuffle.
+
+Банки разбираются один раз и хранятся в кэше процесса (QuestionBank);
+при старте все банки загружаются параллельно в пуле потоков и проверяются
+(preload_question_banks / setup_question_banks).
+
+Если есть актуальный скомпилированный банк (.qbank, см. compile_banks.py),
+он отображается в память вместо разбора JSON; вопросы декодируются по индексу
+только для выбранных в тест (bank_format.CompiledQuestions).
+
+Версии банка неизменяемы: горячая перезагрузка (bank_watcher) подменяет
+банк в кэше целиком (swap_bank), начатые тесты держат свою версию.
+
+При загрузке строится индекс меток (тема и теги вопроса → позиции в банке).
+План экзамена уровня (settings.exam_blueprints: метка → число вопросов)
+выполняется стратифицированной выборкой по индексу — O(k) на тест.
+
+Сложность вопросов (поле difficulty в JSON) разбивается при загрузке на пулы
+позиций по уровням. Остаток теста после плана набирается из пулов по составу
+уровня (settings.difficulty_mix), нехватка пула — из difficulty_fallback
+по порядку, затем из всего банка. Банк без размеченной сложности — весь
+остаток из всего банка.
 """
+import asyncio
+import itertools
 import json
 import logging
 import random
+import time
+import weakref
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+from aiogram import Dispatcher
 
 from config.settings import settings
-from .models import Question
+from .bank_format import (
+    DIFFICULTY_CODES, DIFFICULTY_LEVELS, CompiledBankError, CompiledQuestions,
+    open_compiled_bank, write_compiled_bank
+)
+from .models import Question, normalize_tag, parse_difficulty, question_labels, question_uid
 from .enum import Difficulty
 
+if TYPE_CHECKING:
+    from .exposure import SeenQuestions
+    from .sampling import WeightedSampler
+
 logger = logging.getLogger(__name__)
 
 
-def load_questions_for_specialization(
-    specialization: str,
-    difficulty: Difficulty,
-    user_id: int | None = None
-) -> List[Question]:
+class BankError(ValueError):
+    """Банк вопросов отсутствует, повреждён или не проходит проверку."""
+
+
+# Номера версий банков (общие для всех специализаций, растут монотонно)
+_versions = itertools.count(1)
+# Все живые версии банков (в кэше и в начатых тестах)
+_live: "weakref.WeakSet[QuestionBank]" = weakref.WeakSet()
+
+
+class QuestionBank:
     """
-    Загружает вопросы для специализации/сложности.
+    Разобранный банк вопросов специализации (неизменяемый).
+    questions — кортеж из JSON или CompiledQuestions поверх mmap,
+    tags — индекс меток: нормализованная тема/тег → позиции вопросов,
+    level_codes — код сложности каждой позиции (bank_format.DIFFICULTY_LEVELS;
+    None — сложность в банке не размечена), levels — пулы позиций по уровням
+    ("" — вопросы без сложности).
+    """
+    
+    __slots__ = ("specialization", "questions", "source", "skipped", "load_ms", "version", "tags",
+                 "level_codes", "levels", "__weakref__")
+    
+    def __init__(
+        self,
+        specialization: str,
+        questions: Sequence[Question],
+        source: Path,
+        skipped: int = 0,
+        load_ms: float = 0.0
+    ):
+        self.specialization = specialization
+        self.questions = questions
+        self.source = source
+        self.skipped = skipped
+        self.load_ms = load_ms
+        self.version = next(_versions)
+        self.tags = build_tag_index(questions)
+        self.level_codes = build_level_codes(questions)
+        self.levels = build_level_index(self.level_codes)
+        _live.add(self)
+    
+    def __len__(self) -> int:
+        return len(self.questions)
+
+
+def build_tag_index(questions: Sequence[Question]) -> Dict[str, array]:
+    """Индекс меток банка: нормализованная тема/тег → позиции вопросов."""
+    if isinstance(questions, CompiledQuestions):
+        return questions.tag_index()
+    index: Dict[str, array] = {}
+    for position, question in enumerate(questions):
+        if question.topic or question.tags:
+            for label in question_labels(question.topic, question.tags):
+                index.setdefault(label, array("I")).append(position)
+    return index
+
+
+def build_level_codes(questions: Sequence[Question]) -> Optional[bytes]:
+    """Коды сложности по позициям (None — ни у одного вопроса сложность не размечена)."""
+    if isinstance(questions, CompiledQuestions):
+        return questions.level_codes()
+    if not any(question.difficulty for question in questions):
+        return None
+    return bytes(DIFFICULTY_CODES[question.difficulty] for question in questions)
+
+
+def build_level_index(codes: Optional[bytes]) -> Dict[str, array]:
+    """Пулы позиций по уровням сложности: значение уровня ("" — без сложности) → позиции."""
+    if codes is None:
+        return {}
+    by_code = [array("I") for _ in DIFFICULTY_LEVELS]
+    for position, code in enumerate(codes):
+        by_code[code].append(position)
+    return {
+        level.value if level else "": positions
+        for level, positions in zip(DIFFICULTY_LEVELS, by_code) if positions
+    }
+
+
+def _parse_tags(value) -> List[str]:
+    """Теги из JSON: список строк или строка через запятую."""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise ValueError("tags: ожидается список строк или строка через запятую")
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+# Попыток случайного выбора из страты на вопрос до перебора страты
+STRATUM_TRIES = 4
+# Попыток взвешенного выбора из пула сложности на вопрос (выбор по весам всего
+# банка с отбраковкой чужих позиций), затем — равновероятно по пулу
+LEVEL_TRIES = 16
+# Уже сообщали о нехватке вопросов по плану: (версия банка, уровень, метка)
+_blueprint_warned: Set[tuple] = set()
+# Уже сообщали о нехватке вопросов по составу сложности: (версия банка, уровень)
+_mix_warned: Set[tuple] = set()
+
+# Кэш банков процесса: специализация → QuestionBank
+_banks: Dict[str, QuestionBank] = {}
+
+
+def compiled_bank_path(specialization: str) -> Path:
+    """Путь к скомпилированному банку специализации."""
+    return settings.compiled_banks_dir / f"{specialization}.qbank"
+
+
+def parse_bank(specialization: str) -> QuestionBank:
+    """
+    Загрузить банк специализации: актуальный .qbank через mmap, иначе JSON.
     
     Args:
         specialization: Название специализации (oupds, aliment, и т.д.)
-        difficulty: Уровень сложности
-        user_id: ID пользователя для seed (optional)
     
     Returns:
-        Список объектов Question
+        QuestionBank с корректными вопросами
+    
+    Raises:
+        BankError: банк не загружается (см. parse_json_bank)
     """
+    json_path = settings.questions_dir / f"{specialization}.json"
+    qbank_path = compiled_bank_path(specialization)
+    
+    if settings.bank_compiled and qbank_path.exists():
+        start = time.perf_counter()
+        try:
+            questions, fresh = open_compiled_bank(qbank_path, json_path)
+            if fresh and len(questions):
+                return QuestionBank(
+                    specialization,
+                    questions,
+                    qbank_path,
+                    skipped=questions.skipped,
+                    load_ms=(time.perf_counter() - start) * 1000
+                )
+        except (CompiledBankError, OSError) as e:
+            logger.warning(f"⚠️ {e}; используется JSON {specialization}")
+        else:
+            logger.warning(
+                f"⚠️ {qbank_path.name} устарел относительно {json_path.name}, "
+                f"используется JSON (пересоберите: python compile_banks.py)"
+            )
+    
+    return parse_json_bank(specialization)
+
+
+def parse_json_bank(specialization: str) -> QuestionBank:
+    """
+    Прочитать и разобрать JSON банк специализации.
+    
+    Args:
+        specialization: Название специализации (oupds, aliment, и т.д.)
+    
+    Returns:
+        QuestionBank с корректными вопросами (некорректные пропускаются)
+    
+    Raises:
+        BankError: файл не найден, не JSON, не список или нет ни одного вопроса
+    """
+    start = time.perf_counter()
+    
     # Путь к JSON файлу
     json_path = settings.questions_dir / f"{specialization}.json"
     
     if not json_path.exists():
-        logger.error(f"❌ Файл вопросов не найден: {json_path}")
-        return []
+        raise BankError(f"Файл вопросов не найден: {json_path}")
     
     try:
         with json_path.open("r", encoding="utf-8") as f:
             raw_data = json.load(f)
-    except (json.JSONDecodeError, PermissionError) as e:
-        logger.error(f"❌ Ошибка чтения JSON {specialization}: {e}")
-        return []
+    except (json.JSONDecodeError, PermissionError, UnicodeDecodeError) as e:
+        raise BankError(f"Ошибка чтения JSON {specialization}: {e}") from e
     
     if not isinstance(raw_data, list):
-        logger.error(f"❌ Неверный формат JSON {specialization}: ожидается список")
-        return []
+        raise BankError(f"Неверный формат JSON {specialization}: ожидается список")
     
     # Парсинг вопросов
     questions = []
@@ -74,36 +254,329 @@ def load_questions_for_specialization(
                 question=item["question"],
                 options=opts,
                 correct_answers=correct,
-                difficulty=difficulty  # Все вопросы получают выбранную сложность
+                difficulty=item.get("difficulty"),
+                topic=str(item.get("topic") or "").strip(),
+                tags=_parse_tags(item.get("tags") or [])
             )
             questions.append(q)
             
-        except (KeyError, ValueError, TypeError) as e:
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
             logger.warning(f"⚠️ Пропуск вопроса {specialization}:{idx}: {e}")
             continue
     
     if not questions:
-        logger.error(f"❌ Не удалось загрузить вопросы для {specialization}")
+        raise BankError(f"Не удалось загрузить вопросы для {specialization}")
+    
+    return QuestionBank(
+        specialization,
+        tuple(questions),
+        json_path,
+        skipped=len(raw_data) - len(questions),
+        load_ms=(time.perf_counter() - start) * 1000
+    )
+
+
+def compile_bank(specialization: str) -> QuestionBank:
+    """
+    Разобрать JSON банк и записать его в .qbank (compiled_banks_dir).
+    
+    Returns:
+        Исходный банк из JSON (для отчёта о компиляции)
+    
+    Raises:
+        BankError: JSON банк не загружается
+    """
+    bank = parse_json_bank(specialization)
+    write_compiled_bank(compiled_bank_path(specialization), bank.questions, bank.source, bank.skipped)
+    return bank
+
+
+def reload_bank(specialization: str) -> QuestionBank:
+    """
+    Новая версия банка после изменения JSON (для горячей перезагрузки).
+    Если используется .qbank, он пересобирается и открывается заново.
+    
+    Raises:
+        BankError: JSON банк не загружается
+    """
+    if settings.bank_compiled and compiled_bank_path(specialization).exists():
+        compile_bank(specialization)
+        return parse_bank(specialization)
+    return parse_json_bank(specialization)
+
+
+def swap_bank(bank: QuestionBank) -> Optional[QuestionBank]:
+    """
+    Атомарно подменить банк специализации в кэше.
+    
+    Returns:
+        Предыдущая версия (None, если банка в кэше не было)
+    """
+    old = _banks.get(bank.specialization)
+    _banks[bank.specialization] = bank
+    return old
+
+
+def live_bank_versions(specialization: str) -> int:
+    """Сколько версий банка специализации ещё живо (кэш + начатые тесты)."""
+    return sum(1 for bank in list(_live) if bank.specialization == specialization)
+
+
+def get_bank(specialization: str) -> Optional[QuestionBank]:
+    """Банк из кэша (при промахе — загрузка); None, если банк не загружается."""
+    bank = _banks.get(specialization)
+    if bank is None:
+        try:
+            bank = _banks[specialization] = parse_bank(specialization)
+        except BankError as e:
+            logger.error(f"❌ {e}")
+            return None
+    return bank
+
+
+def pick_stratum(
+    pool: Sequence[int],
+    want: int,
+    taken: Set[int],
+    seen: Optional["SeenQuestions"] = None,
+    rng: random.Random = random
+) -> List[int]:
+    """
+    want позиций из страты (позиций одной метки) не из taken, сначала непоказанные.
+    
+    В среднем O(want): случайные позиции страты с отбраковкой; страта
+    перебирается целиком, только если она почти исчерпана.
+    
+    Returns:
+        Выбранные позиции (меньше want, если страта меньше); добавляются в taken
+    """
+    picks = []
+    tries = STRATUM_TRIES * want
+    while len(picks) < want and tries > 0:
+        tries -= 1
+        position = pool[rng.randrange(len(pool))]
+        if position in taken or (seen is not None and position in seen):
+            continue
+        taken.add(position)
+        picks.append(position)
+    
+    if len(picks) < want:
+        rest = [position for position in pool if position not in taken]
+        rng.shuffle(rest)
+        if seen is not None:
+            rest.sort(key=seen.__contains__)  # Непоказанные вперёд, порядок внутри групп случайный
+        for position in rest[:want - len(picks)]:
+            taken.add(position)
+            picks.append(position)
+    return picks
+
+
+def blueprint_positions(
+    bank: QuestionBank,
+    difficulty: Difficulty,
+    count: int,
+    taken: Set[int],
+    seen: Optional["SeenQuestions"] = None,
+    rng: random.Random = random
+) -> List[int]:
+    """
+    Позиции вопросов по плану экзамена уровня (settings.exam_blueprints).
+    
+    Метки плана берутся по порядку, пока не набрано count вопросов; вопрос
+    с несколькими метками засчитывается в первую из них.
+    
+    Returns:
+        Позиции (пусто, если плана для уровня нет); добавляются в taken
+    """
+    blueprint: Mapping[str, int] = settings.exam_blueprints.get(difficulty.value, {})
+    picks: List[int] = []
+    for label, quota in blueprint.items():
+        want = min(quota, count - len(picks))
+        if want <= 0:
+            break
+        pool = bank.tags.get(normalize_tag(label), ())
+        got = pick_stratum(pool, want, taken, seen, rng) if pool else []
+        picks += got
+        
+        key = (bank.version, difficulty, label)
+        if len(got) < want and key not in _blueprint_warned:
+            _blueprint_warned.add(key)
+            logger.warning(
+                f"⚠️ План «{difficulty.value}» {bank.specialization}: по метке «{label}» "
+                f"{len(got)} вопросов из {want}, остальные — из всего банка"
+            )
+    return picks
+
+
+def pick_level(
+    bank: QuestionBank,
+    level: str,
+    want: int,
+    taken: Set[int],
+    seen: Optional["SeenQuestions"] = None,
+    weights: Optional["WeightedSampler"] = None,
+    rng: random.Random = random
+) -> List[int]:
+    """
+    want позиций из пула сложности level ("" — без сложности) не из taken.
+    
+    С весами — выбор по весам всего банка с отбраковкой позиций других
+    уровней (в среднем Σw банка / Σw пула попыток на вопрос); не добранное
+    за LEVEL_TRIES попыток на вопрос — равновероятно по пулу (pick_stratum).
+    Если непоказанных в пуле не хватило, по пулу начинается новый круг.
+    
+    Returns:
+        Выбранные позиции (меньше want, если пул меньше); добавляются в taken
+    """
+    level = level.strip().lower()
+    pool = bank.levels.get(level)
+    if not pool or want <= 0:
+        return []
+    picks = []
+    if weights is not None:
+        code = DIFFICULTY_CODES[parse_difficulty(level)]
+        codes = bank.level_codes
+        tries = LEVEL_TRIES * want
+        while len(picks) < want and tries > 0:
+            tries -= 1
+            position = weights.draw(rng)
+            if codes[position] != code or position in taken or (seen is not None and position in seen):
+                continue
+            taken.add(position)
+            picks.append(position)
+    picks += pick_stratum(pool, want - len(picks), taken, seen, rng)
+    if seen is not None and any(position in seen for position in picks):
+        seen.forget(pool)  # Выбранные отметятся показанными после выбора всего теста
+    return picks
+
+
+def mix_quotas(mix: Mapping[str, float], count: int) -> Dict[str, int]:
+    """
+    Число вопросов из каждого пула по долям состава (метод наибольших остатков:
+    сумма ровно count, доли не обязаны давать в сумме 1).
+    """
+    total = sum(share for share in mix.values() if share > 0)
+    if total <= 0:
+        return {}
+    exact = {level: count * share / total for level, share in mix.items() if share > 0}
+    quotas = {level: int(value) for level, value in exact.items()}
+    by_remainder = sorted(exact, key=lambda level: exact[level] - quotas[level], reverse=True)
+    for level in by_remainder[:count - sum(quotas.values())]:
+        quotas[level] += 1
+    return quotas
+
+
+def level_positions(
+    bank: QuestionBank,
+    difficulty: Difficulty,
+    count: int,
+    taken: Set[int],
+    seen: Optional["SeenQuestions"] = None,
+    weights: Optional["WeightedSampler"] = None,
+    rng: random.Random = random
+) -> List[int]:
+    """
+    Позиции вопросов по составу уровня (settings.difficulty_mix) из пулов сложности.
+    
+    Нехватка пулов состава добирается из пулов settings.difficulty_fallback
+    по порядку, затем из всего банка. O(count) в среднем.
+    
+    Returns:
+        count позиций (меньше, если в банке не хватает вопросов); добавляются в taken
+    """
+    picks: List[int] = []
+    for level, quota in mix_quotas(settings.difficulty_mix.get(difficulty.value, {}), count).items():
+        picks += pick_level(bank, level, quota, taken, seen, weights, rng)
+    
+    short = count - len(picks)
+    if short:
+        key = (bank.version, difficulty)
+        if key not in _mix_warned:
+            _mix_warned.add(key)
+            available = ", ".join(f"{level or 'без сложности'} {len(pool)}" for level, pool in bank.levels.items())
+            logger.warning(
+                f"⚠️ Состав «{difficulty.value}» {bank.specialization}: не хватает {short} вопросов "
+                f"в пулах сложности ({available}), добор по difficulty_fallback"
+            )
+        for level in settings.difficulty_fallback.get(difficulty.value, ()):
+            if len(picks) == count:
+                break
+            picks += pick_level(bank, level, count - len(picks), taken, seen, weights, rng)
+        if len(picks) < count:
+            picks += pick_stratum(range(len(bank)), count - len(picks), taken, seen, rng)
+    return picks
+
+
+def load_questions_for_specialization(
+    specialization: str,
+    difficulty: Difficulty,
+    bank: QuestionBank | None = None,
+    seen: Optional["SeenQuestions"] = None,
+    weights: Optional["WeightedSampler"] = None
+) -> List[Question]:
+    """
+    Загружает вопросы для специализации/сложности.
+    
+    Args:
+        specialization: Название специализации (oupds, aliment, и т.д.)
+        difficulty: Уровень сложности
+        bank: Версия банка (по умолчанию текущая из кэша)
+        seen: Показанные пользователю вопросы (сначала берутся непоказанные,
+            выбранные отмечаются); None — выборка без учёта истории
+        weights: Веса позиций версии банка (sampling.get_question_weights);
+            None — все вопросы равновероятны
+    
+    Returns:
+        Список объектов Question
+    """
+    if bank is None:
+        bank = get_bank(specialization)
+    if bank is None:
         return []
     
     # Количество вопросов для данного уровня сложности
     target_count = settings.difficulty_questions.get(difficulty.value, 30)
     
-    # Random shuffle с user_seed для честности
-    if user_id:
-        random.seed(user_id)
-    random.shuffle(questions)
-    random.seed()  # Сброс seed
-    
-    # Выбор нужного количества вопросов
-    if len(questions) < target_count:
+    if len(bank) < target_count:
         logger.warning(
-            f"⚠️ Мало вопросов {specialization}: {len(questions)} < {target_count}. "
+            f"⚠️ Мало вопросов {specialization}: {len(bank)} < {target_count}. "
             f"Используем все доступные."
         )
-        selected = questions
+    
+    # Случайная выборка индексов: O(target_count),
+    # из скомпилированного банка декодируются только выбранные вопросы
+    count = min(target_count, len(bank))
+    if weights is not None and len(weights) != len(bank):
+        weights = None  # Веса другой версии банка
+    if seen is not None:
+        seen.resize(len(bank))
+    
+    # Сначала план экзамена уровня (если задан), остаток — по составу сложности
+    # (банк с размеченной сложностью) или из всего банка
+    taken: Set[int] = set()
+    indices = blueprint_positions(bank, difficulty, count, taken, seen)
+    rest = count - len(indices)
+    if bank.levels and difficulty.value in settings.difficulty_mix:
+        indices += level_positions(bank, difficulty, rest, taken, seen, weights)
+    elif seen is not None:
+        indices += seen.sample(rest, weights=weights, taken=taken)
+    elif weights is not None:
+        indices += weights.sample(rest, excluded=taken.__contains__)
     else:
-        selected = questions[:target_count]
+        # Лишние len(taken) позиций покрывают совпадения с уже выбранными
+        extra = random.sample(range(len(bank)), min(len(bank), rest + len(taken)))
+        indices += [i for i in extra if i not in taken][:rest]
+    if seen is not None:
+        for i in indices:
+            seen.mark(i)
+    random.shuffle(indices)
+    
+    # Копии вопросов получают uid (банк в кэше не меняется), сложность — своя из банка
+    questions = bank.questions
+    selected = []
+    for i in indices:
+        question = questions[i]
+        selected.append(question.model_copy(update={"uid": question_uid(question.question, question.options)}))
     
     logger.info(
         f"✅ Загружено {len(selected)} вопросов для {specialization} "
@@ -111,3 +584,93 @@ def load_questions_for_specialization(
     )
     
     return selected
+
+
+def validate_bank(bank: QuestionBank) -> List[str]:
+    """
+    Проблемы банка: пропущенные вопросы и нехватка вопросов для уровней
+    сложности с фиксированной длиной теста.
+    
+    Returns:
+        Список описаний проблем (пустой - банк в порядке)
+    """
+    problems = []
+    if bank.skipped:
+        problems.append(f"{bank.specialization}: пропущено некорректных вопросов: {bank.skipped}")
+    for level, required in settings.difficulty_questions.items():
+        # Для адаптивного теста и тренировки число — предел длины, а не минимум банка
+        if level in (Difficulty.ADAPTIVE.value, Difficulty.TRAINING.value):
+            continue
+        if len(bank) < required:
+            problems.append(
+                f"{bank.specialization}: {len(bank)} вопросов < {required} для уровня «{level}»"
+            )
+    return problems
+
+
+async def preload_question_banks(
+    specializations: Iterable[str] | None = None,
+    max_workers: int | None = None
+) -> List[str]:
+    """
+    Параллельная загрузка и проверка банков в пуле потоков, заполнение кэша.
+    
+    Args:
+        specializations: Специализации (по умолчанию settings.specializations)
+        max_workers: Размер пула потоков
+    
+    Returns:
+        Список проблем всех банков (ошибки загрузки и нехватка вопросов)
+    """
+    names = list(specializations or settings.specializations)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(
+        max_workers=max_workers or settings.bank_preload_workers,
+        thread_name_prefix="bank-preload"
+    ) as executor:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, parse_bank, name) for name in names),
+            return_exceptions=True
+        )
+    
+    problems = []
+    total = 0
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            problems.append(f"{name}: {result}")
+            logger.error(f"❌ Банк {name}: {result}")
+            continue
+        _banks[name] = result
+        total += len(result)
+        levels = ", ".join(f"{level or 'без сложности'} {len(pool)}" for level, pool in result.levels.items())
+        logger.info(
+            f"📚 Банк {name}: {len(result)} вопросов, {result.load_ms:.1f} мс ({result.source.name})"
+            + (f"; сложность: {levels}" if levels else "")
+        )
+        for problem in validate_bank(result):
+            logger.warning(f"⚠️ {problem}")
+            problems.append(problem)
+    
+    logger.info(
+        f"✅ Банки вопросов загружены: {len(names) - sum(isinstance(r, Exception) for r in results)}"
+        f"/{len(names)}, {total} вопросов за {(time.perf_counter() - start) * 1000:.0f} мс"
+    )
+    return problems
+
+
+def setup_question_banks(dispatcher: Dispatcher):
+    """
+    Прогрев кэша банков в startup-хуке диспетчера.
+    В production при проблемах (и BANK_FAIL_FAST) запуск прерывается.
+    """
+    async def on_startup():
+        problems = await preload_question_banks()
+        if problems and settings.environment == "production" and settings.bank_fail_fast:
+            raise BankError(
+                f"Банки вопросов не прошли проверку ({len(problems)} проблем): "
+                + "; ".join(problems)
+            )
+    
+    dispatcher.startup.register(on_startup)
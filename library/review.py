@@ -0,0 +1,305 @@
+"""
+Тренировка: интервальное повторение вопросов, на которые пользователь ошибся.
+
+Ошибка в тесте (ответ из answers_history не совпал с правильным) заводит
+карточку вопроса или возвращает её к повторению (record_mistakes, в транзакции
+StatsManager.save_result). Расписание — SM-2: после ошибки вопрос снова
+к повторению через review_relearn_minutes, верные ответы подряд дают
+интервалы review_first_interval, review_second_interval дней, дальше
+интервал умножается на коэффициент лёгкости карточки.
+
+Карточки хранятся в БД статистики (review_cards, WITHOUT ROWID: только
+ключ и пять чисел). Очередь пользователя — индекс (user_id, specialization, due):
+выбор ближайших к повторению — спуск по B-дереву O(log n) и k соседних
+записей, без сортировки всех карточек.
+
+Тренировка (уровень «тренировка») — до difficulty_questions["тренировка"]
+карточек, срок которых наступил. После каждого ответа — сразу отзыв
+(верно / правильные варианты); новое расписание записывается одним
+executemany при завершении. Ответы тренировки не попадают в test_results
+и item_stats: это повторение, а не экзамен.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+
+from config.settings import settings
+from .enum import Difficulty
+from .models import CurrentTestState, Question, question_uid
+from .question_loader import QuestionBank
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+# Оценки ответа по шкале SM-2 (0–5): ответ в боте только верный или неверный
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS review_cards (
+        user_id INTEGER NOT NULL,
+        specialization TEXT NOT NULL,
+        uid INTEGER NOT NULL,
+        due INTEGER NOT NULL,
+        interval REAL NOT NULL,
+        ease REAL NOT NULL,
+        reps INTEGER NOT NULL,
+        lapses INTEGER NOT NULL,
+        PRIMARY KEY (user_id, specialization, uid)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_review_due
+    ON review_cards (user_id, specialization, due)
+    """,
+)
+
+UPSERT_CARD = """
+    INSERT INTO review_cards (user_id, specialization, uid, due, interval, ease, reps, lapses)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, specialization, uid) DO UPDATE SET
+        due = excluded.due,
+        interval = excluded.interval,
+        ease = excluded.ease,
+        reps = excluded.reps,
+        lapses = excluded.lapses
+"""
+
+# Ошибка в тесте: новая карточка или возврат существующей к повторению
+UPSERT_MISTAKE = """
+    INSERT INTO review_cards (user_id, specialization, uid, due, interval, ease, reps, lapses)
+    VALUES (?, ?, ?, ?, 0, ?, 0, 1)
+    ON CONFLICT (user_id, specialization, uid) DO UPDATE SET
+        due = excluded.due,
+        interval = 0,
+        ease = MAX(?, ease + ?),
+        reps = 0,
+        lapses = lapses + 1
+"""
+
+
+def ease_delta(quality: int) -> float:
+    """Изменение коэффициента лёгкости SM-2 при оценке quality (0–5)."""
+    return 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+
+
+class Card:
+    """Карточка повторения: расписание SM-2 одного вопроса пользователя."""
+    
+    __slots__ = ("uid", "due", "interval", "ease", "reps", "lapses")
+    
+    def __init__(self, uid: int, due: int, interval: float, ease: float, reps: int = 0, lapses: int = 0):
+        """
+        Args:
+            uid: question_uid вопроса
+            due: Срок повторения (unix-время, секунды)
+            interval: Текущий интервал, дни (0 — после ошибки)
+            ease: Коэффициент лёгкости
+            reps: Верных повторений подряд
+            lapses: Сколько раз вопрос был забыт (ошибок)
+        """
+        self.uid = uid
+        self.due = due
+        self.interval = interval
+        self.ease = ease
+        self.reps = reps
+        self.lapses = lapses
+    
+    def review(self, correct: bool, now: float):
+        """Пересчитать расписание по ответу (SM-2)."""
+        quality = QUALITY_CORRECT if correct else QUALITY_WRONG
+        self.ease = max(settings.review_min_ease, self.ease + ease_delta(quality))
+        if not correct:
+            self.reps = 0
+            self.interval = 0.0
+            self.lapses += 1
+            self.due = int(now) + settings.review_relearn_minutes * 60
+            return
+        self.reps += 1
+        if self.reps == 1:
+            self.interval = settings.review_first_interval
+        elif self.reps == 2:
+            self.interval = settings.review_second_interval
+        else:
+            self.interval = round(self.interval * self.ease, 1)
+        self.due = int(now + self.interval * DAY)
+
+
+async def record_mistakes(db: "aiosqlite.Connection", user_id: int, test_state: CurrentTestState):
+    """
+    Завести карточки вопросов, на которые пользователь ответил неверно
+    (в транзакции вызывающего). Вопросы, до которых тест не дошёл, не учитываются.
+    
+    Args:
+        db: Открытое соединение (commit делает вызывающий)
+        user_id: ID пользователя
+        test_state: Завершённый тест
+    """
+    due = int(time.time()) + settings.review_relearn_minutes * 60
+    rows = [
+        (
+            user_id, test_state.specialization, question.uid, due,
+            settings.review_initial_ease, settings.review_min_ease, ease_delta(QUALITY_WRONG)
+        )
+        for idx, question in enumerate(test_state.questions)
+        if question.uid and idx in test_state.answers_history
+        and test_state.answers_history[idx] != question.correct_answers
+    ]
+    if rows:
+        await db.executemany(UPSERT_MISTAKE, rows)
+
+
+class ReviewStore:
+    """Карточки повторения в БД статистики."""
+    
+    def __init__(self, connect: Callable[[], "aiosqlite.Connection"]):
+        """
+        Args:
+            connect: Фабрика соединений (StatsManager.connect)
+        """
+        self.connect = connect
+    
+    async def due_cards(
+        self,
+        user_id: int,
+        specialization: str,
+        limit: int,
+        now: Optional[float] = None
+    ) -> List[Card]:
+        """Карточки со сроком не позже now, самые просроченные первыми (по индексу due)."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                """
+                SELECT uid, due, interval, ease, reps, lapses FROM review_cards
+                WHERE user_id = ? AND specialization = ? AND due <= ?
+                ORDER BY due LIMIT ?
+                """,
+                (user_id, specialization, int(now if now is not None else time.time()), limit)
+            )
+            rows = await cursor.fetchall()
+        return [Card(*row) for row in rows]
+    
+    async def next_due(self, user_id: int, specialization: str) -> Optional[int]:
+        """Ближайший срок повторения (None — карточек нет)."""
+        async with self.connect() as db:
+            cursor = await db.execute(
+                "SELECT MIN(due) FROM review_cards WHERE user_id = ? AND specialization = ?",
+                (user_id, specialization)
+            )
+            row = await cursor.fetchone()
+        return row[0] if row else None
+    
+    async def save(self, user_id: int, specialization: str, cards: Iterable[Card]):
+        """Записать расписание карточек одной транзакцией."""
+        rows = [
+            (user_id, specialization, card.uid, card.due, card.interval, card.ease, card.reps, card.lapses)
+            for card in cards
+        ]
+        if not rows:
+            return
+        async with self.connect() as db:
+            await db.executemany(UPSERT_CARD, rows)
+            await db.commit()
+    
+    async def drop(self, user_id: int, specialization: str, uids: Iterable[int]):
+        """Удалить карточки вопросов, которых больше нет в банке."""
+        async with self.connect() as db:
+            await db.executemany(
+                "DELETE FROM review_cards WHERE user_id = ? AND specialization = ? AND uid = ?",
+                [(user_id, specialization, uid) for uid in uids]
+            )
+            await db.commit()
+
+
+class TrainingSession:
+    """Тренировка: карточки к повторению, их вопросы и отзыв на последний ответ."""
+    
+    __slots__ = ("user_id", "specialization", "cards", "questions", "reviewed", "correct", "feedback")
+    
+    def __init__(self, user_id: int, specialization: str, cards: List[Card], questions: List[Question]):
+        self.user_id = user_id
+        self.specialization = specialization
+        self.cards = cards
+        self.questions = questions
+        self.reviewed: List[Card] = []
+        self.correct = 0
+        self.feedback = ""  # Отзыв на предыдущий ответ (HTML, над следующим вопросом)
+    
+    def answer(self, index: int, selected: Set[int]) -> str:
+        """
+        Учесть ответ на вопрос index: пересчитать карточку и подготовить отзыв.
+        
+        Returns:
+            Короткий отзыв для всплывающего уведомления
+        """
+        card = self.cards[index]
+        question = self.questions[index]
+        correct = selected == question.correct_answers
+        card.review(correct, time.time())
+        self.reviewed.append(card)
+        self.correct += correct
+        
+        if correct:
+            self.feedback = f"✅ <b>Верно!</b> Следующее повторение через {card.interval:g} дн."
+            return "✅ Верно!"
+        options = "\n".join(
+            f"✔️ {number}. {question.options[number - 1]}" for number in sorted(question.correct_answers)
+        )
+        self.feedback = f"❌ <b>Неверно.</b> Правильный ответ:\n{options}"
+        return "❌ Неверно"
+
+
+# uid → позиция для версий банка (строится один раз на версию)
+_positions: "weakref.WeakKeyDictionary[QuestionBank, Dict[int, int]]" = weakref.WeakKeyDictionary()
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def uid_positions(bank: QuestionBank) -> Dict[int, int]:
+    """uid → позиция вопроса в банке (для .qbank — декодирование всех вопросов)."""
+    return {question_uid(q.question, q.options): position for position, q in enumerate(bank.questions)}
+
+
+async def start_training_session(user_id: int, bank: QuestionBank) -> Optional[TrainingSession]:
+    """
+    Новая тренировка по карточкам пользователя, срок которых наступил.
+    
+    Карточки вопросов, которых нет в текущей версии банка (удалены или
+    изменены), удаляются.
+    
+    Returns:
+        None — повторять нечего
+    """
+    from .stats import review_store
+    
+    specialization = bank.specialization
+    limit = settings.difficulty_questions.get(Difficulty.TRAINING.value, 20)
+    cards = await review_store.due_cards(user_id, specialization, limit)
+    if not cards:
+        return None
+    
+    positions = _positions.get(bank)
+    if positions is None:
+        async with _locks.setdefault(specialization, asyncio.Lock()):
+            positions = _positions.get(bank)
+            if positions is None:
+                loop = asyncio.get_running_loop()
+                positions = _positions[bank] = await loop.run_in_executor(None, uid_positions, bank)
+    
+    stale = [card.uid for card in cards if card.uid not in positions]
+    if stale:
+        await review_store.drop(user_id, specialization, stale)
+        logger.info(f"🧹 Тренировка {specialization}: удалено карточек устаревших вопросов {len(stale)}")
+        cards = [card for card in cards if card.uid in positions]
+        if not cards:
+            return None
+    
+    questions = [
+        bank.questions[positions[card.uid]].model_copy(update={"uid": card.uid}) for card in cards
+    ]
+    return TrainingSession(user_id, specialization, cards, questions)
@@ -0,0 +1,293 @@
+"""
+Взвешенный выбор вопросов: таблицы псевдонимов Уолкера (метод Vose).
+
+Вес вопроса — насколько часто его давать в тест (экспозиция, качество).
+AliasTable строится за O(n) и даёт выбор с вероятностью w_i / Σw за O(1):
+случайная ячейка + одна монетка. Чтобы менять веса без полной перестройки,
+WeightedSampler делит вопросы на блоки по BLOCK: верхняя таблица выбирает
+блок по сумме весов, таблица блока — вопрос. Изменение веса перестраивает
+только свой блок (O(BLOCK)) и верхнюю таблицу (O(n / BLOCK)).
+
+Выбор без повторов — отбраковка уже взятых (и исключённых вызывающим)
+вопросов: пока их вес мал, в среднем O(1) на вопрос. Если отбраковок слишком
+много (исключена почти вся масса весов), остаток добирается точным взвешенным
+выбором без возвращения (Efraimidis–Spirakis) по оставшимся вопросам.
+
+Веса версии банка (QuestionWeights) считаются по item_stats (показы) и
+item_calibration (r_pb) и кэшируются; раз в sampling_weights_refresh секунд
+пересчитываются, в выборщике обновляются только изменившиеся.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import random
+import time
+from array import array
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from config.settings import settings
+from .models import question_uid
+from .question_loader import QuestionBank
+from .stats import item_analytics
+
+logger = logging.getLogger(__name__)
+
+# Вопросов в блоке WeightedSampler
+BLOCK = 256
+# Отбраковок на вопрос, после которых выбор переходит к точному добору
+MAX_REJECTIONS = 16
+# Изменение веса меньше этой доли не перестраивает блок
+WEIGHT_TOLERANCE = 0.01
+
+
+class AliasTable:
+    """Таблица псевдонимов: выбор i с вероятностью w_i / Σw за O(1)."""
+    
+    __slots__ = ("prob", "alias", "total")
+    
+    def __init__(self, weights: Sequence[float]):
+        """
+        Args:
+            weights: Неотрицательные веса (сумма может быть нулевой — тогда draw недоступен)
+        """
+        n = len(weights)
+        self.total = math.fsum(weights)
+        self.prob = array("d", bytes(8 * n))
+        self.alias = array("I", range(n))
+        if not n or self.total <= 0:
+            return
+        
+        scaled = [w * n / self.total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large[-1]
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(large.pop())
+        # Остатки — ровно 1 с точностью до округления
+        for i in large + small:
+            self.prob[i] = 1.0
+    
+    def __len__(self) -> int:
+        return len(self.prob)
+    
+    def draw(self, rng: random.Random = random) -> int:
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+
+class WeightedSampler:
+    """Веса вопросов банка, разбитые на блоки с таблицами псевдонимов."""
+    
+    __slots__ = ("weights", "block", "blocks", "top", "rebuilt")
+    
+    def __init__(self, weights: Sequence[float], block: int = BLOCK):
+        """
+        Args:
+            weights: Вес каждой позиции банка (> 0 хотя бы у одной)
+            block: Вопросов в блоке
+        
+        Raises:
+            ValueError: Все веса нулевые или есть отрицательные
+        """
+        if any(w < 0 for w in weights) or not math.fsum(weights) > 0:
+            raise ValueError("Веса вопросов должны быть неотрицательными и не все нулевыми")
+        self.weights = array("d", weights)
+        self.block = block
+        self.blocks = [
+            AliasTable(self.weights[start:start + block]) for start in range(0, len(self.weights), block)
+        ]
+        self.top = AliasTable([table.total for table in self.blocks])
+        self.rebuilt = 0  # Перестроено блоков при обновлениях
+    
+    def __len__(self) -> int:
+        return len(self.weights)
+    
+    @property
+    def total(self) -> float:
+        return self.top.total
+    
+    def draw(self, rng: random.Random = random) -> int:
+        """Одна позиция с вероятностью w_i / Σw (с возвращением), O(1)."""
+        b = self.top.draw(rng)
+        return b * self.block + self.blocks[b].draw(rng)
+    
+    def update(self, changes: Mapping[int, float]) -> int:
+        """
+        Изменить веса позиций; перестраиваются только затронутые блоки.
+        
+        Args:
+            changes: позиция → новый вес (≥ 0)
+        
+        Returns:
+            Число перестроенных блоков
+        
+        Raises:
+            ValueError: Отрицательный вес или все веса стали нулевыми
+        """
+        touched = set()
+        for position, weight in changes.items():
+            if weight < 0:
+                raise ValueError(f"Отрицательный вес позиции {position}")
+            if self.weights[position] != weight:
+                self.weights[position] = weight
+                touched.add(position // self.block)
+        for b in touched:
+            start = b * self.block
+            self.blocks[b] = AliasTable(self.weights[start:start + self.block])
+        if touched:
+            top = AliasTable([table.total for table in self.blocks])
+            if top.total <= 0:
+                raise ValueError("Все веса вопросов нулевые")
+            self.top = top
+            self.rebuilt += len(touched)
+        return len(touched)
+    
+    def sample(
+        self,
+        count: int,
+        rng: random.Random = random,
+        excluded: Optional[Callable[[int], bool]] = None
+    ) -> List[int]:
+        """
+        count разных позиций, каждая следующая — с вероятностью, пропорциональной
+        весу среди ещё не взятых (взвешенный выбор без возвращения).
+        
+        Args:
+            count: Сколько позиций нужно
+            rng: Источник случайности
+            excluded: Позиции, которые брать нельзя (например, уже показанные)
+        
+        Returns:
+            Позиции в порядке выбора (меньше count, если допустимых позиций
+            с ненулевым весом не хватает)
+        """
+        picks: List[int] = []
+        taken = set()
+        budget = MAX_REJECTIONS * count
+        while len(picks) < count and budget > 0:
+            position = self.draw(rng)
+            if position in taken or (excluded is not None and excluded(position)):
+                budget -= 1
+                continue
+            taken.add(position)
+            picks.append(position)
+        if len(picks) < count:
+            # Почти вся масса весов исключена: точный добор по оставшимся, O(n log k)
+            rest = (
+                p for p in range(len(self.weights))
+                if self.weights[p] > 0 and p not in taken and (excluded is None or not excluded(p))
+            )
+            keyed = heapq.nlargest(
+                count - len(picks), rest, key=lambda p: rng.random() ** (1.0 / self.weights[p])
+            )
+            picks.extend(keyed)
+        return picks
+
+
+def item_weight(shown: int, mean_shown: float, point_biserial: Optional[float]) -> float:
+    """
+    Вес вопроса для выбора в тест.
+    
+    Экспозиция: (средние показы / показы вопроса)^sampling_exposure_power —
+    часто показываемые вопросы выбираются реже, новые чаще. Качество: вопрос
+    с r_pb ниже sampling_min_discrimination получает множитель
+    sampling_low_quality_weight.
+    """
+    weight = ((mean_shown + 1) / (shown + 1)) ** settings.sampling_exposure_power
+    if point_biserial is not None and point_biserial < settings.sampling_min_discrimination:
+        weight *= settings.sampling_low_quality_weight
+    return min(max(weight, 0.05), 20.0)
+
+
+class QuestionWeights:
+    """Веса позиций версии банка и выборщик по ним."""
+    
+    __slots__ = ("specialization", "bank_version", "uids", "sampler", "refreshed")
+    
+    def __init__(self, bank: QuestionBank):
+        self.specialization = bank.specialization
+        self.bank_version = bank.version
+        self.uids = array("q", (question_uid(q.question, q.options) for q in bank.questions))
+        self.sampler: Optional[WeightedSampler] = None
+        self.refreshed = 0.0
+    
+    def compute(self, shown: Mapping[int, int], discrimination: Mapping[int, float]) -> List[float]:
+        """Веса всех позиций по показам (uid → показы) и r_pb (uid → r_pb)."""
+        counts = [shown.get(uid, 0) for uid in self.uids]
+        mean_shown = sum(counts) / len(counts) if counts else 0.0
+        return [
+            item_weight(count, mean_shown, discrimination.get(uid))
+            for count, uid in zip(counts, self.uids)
+        ]
+    
+    def apply(self, weights: List[float]) -> int:
+        """
+        Новые веса: первый раз — построение, дальше — обновление только
+        заметно изменившихся позиций.
+        
+        Returns:
+            Число перестроенных блоков (при построении — все)
+        """
+        if self.sampler is None:
+            self.sampler = WeightedSampler(weights)
+            return len(self.sampler.blocks)
+        current = self.sampler.weights
+        changes = {
+            position: weight for position, weight in enumerate(weights)
+            if abs(weight - current[position]) > WEIGHT_TOLERANCE * current[position]
+        }
+        return self.sampler.update(changes)
+
+
+# Веса по специализациям (последняя версия банка)
+_weights: Dict[str, QuestionWeights] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def get_question_weights(bank: QuestionBank) -> Optional[WeightedSampler]:
+    """
+    Выборщик с весами вопросов для версии банка (None — взвешенный выбор выключен).
+    
+    Веса строятся при смене версии банка и пересчитываются из БД статистики
+    не чаще раза в sampling_weights_refresh секунд.
+    """
+    if not settings.sampling_weights_enabled or not len(bank):
+        return None
+    specialization = bank.specialization
+    entry = _weights.get(specialization)
+    if (
+        entry is not None and entry.bank_version == bank.version
+        and time.monotonic() - entry.refreshed < settings.sampling_weights_refresh
+    ):
+        return entry.sampler
+    
+    async with _locks.setdefault(specialization, asyncio.Lock()):
+        entry = _weights.get(specialization)
+        if entry is None or entry.bank_version != bank.version:
+            # uid всех вопросов (для .qbank — декодирование банка) — в пуле потоков
+            loop = asyncio.get_running_loop()
+            entry = await loop.run_in_executor(None, QuestionWeights, bank)
+        elif time.monotonic() - entry.refreshed < settings.sampling_weights_refresh:
+            return entry.sampler
+        
+        # Повторная попытка — не раньше следующего периода, даже при ошибке
+        entry.refreshed = time.monotonic()
+        _weights[specialization] = entry
+        try:
+            shown = {item.uid: item.shown for item in await item_analytics.get_items(specialization)}
+            discrimination = await item_analytics.get_discrimination(specialization)
+        except Exception as e:
+            logger.warning(f"⚠️ Веса вопросов {specialization} не обновлены: {e}")
+            return entry.sampler
+        rebuilt = entry.apply(entry.compute(shown, discrimination))
+        logger.debug(
+            "⚖️ Веса вопросов %s (банк v%s): перестроено блоков %s из %s",
+            specialization, bank.version, rebuilt, len(entry.sampler.blocks)
+        )
+    return entry.sampler
@@ -0,0 +1,361 @@
+"""
+Многопроцессный режим: supervisor + N worker-процессов с шардированием по user_id.
+
+Front-процесс (webhook или polling) только принимает updates, определяет
+user_id и передаёт JSON update в очередь своего worker'а (multiprocessing.Queue).
+Каждый worker — отдельный процесс со своим event loop, Bot и Dispatcher.
+
+Состояние, привязанное к пользователю (FSM в MemoryStorage, TestTimer),
+живёт в одном worker'е, так как все updates пользователя попадают в один шард.
+Общее состояние — только SQLite статистики (WAL + busy_timeout, см. StatsManager).
+Supervisor следит за worker'ами: упавший worker перезапускается (WorkerPool.watch),
+слишком частые падения останавливают supervisor с ошибкой.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import secrets
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from config.settings import settings, initialize
+
+logger = logging.getLogger(__name__)
+
+DispatcherFactory = Callable[[], Dispatcher]
+BotFactory = Callable[[], Bot]
+
+# Процессы запускаются через spawn: родитель к моменту старта уже
+# имеет event loop и фоновые потоки, fork в таком состоянии небезопасен
+MP_CONTEXT = multiprocessing.get_context("spawn")
+# Проверка worker'ов supervisor'ом, секунды
+WATCH_INTERVAL = 1.0
+# Больше MAX_RESTARTS падений worker'а за RESTART_WINDOW секунд — supervisor останавливается
+MAX_RESTARTS = 5
+RESTART_WINDOW = 60.0
+
+
+def extract_user_id(update: Dict[str, Any]) -> int:
+    """
+    Определить user_id из сырого update без pydantic-валидации.
+
+    Args:
+        update: Update в виде словаря (JSON Bot API)
+
+    Returns:
+        ID пользователя (или чата), 0 если не найден
+    """
+    for key, event in update.items():
+        if not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user")
+        if user:
+            return user["id"]
+        chat = event.get("chat")
+        if chat:
+            return chat["id"]
+    return 0
+
+
+def shard_for(user_id: int, workers: int) -> int:
+    """Номер worker'а для пользователя (стабилен между перезапусками)."""
+    return user_id % workers
+
+
+def _worker_process(
+    index: int,
+    inbox: multiprocessing.Queue,
+    ready: multiprocessing.Queue,
+    dispatcher_factory: DispatcherFactory,
+    bot_factory: BotFactory,
+    concurrency: int
+):
+    """Точка входа worker-процесса."""
+    # Остановкой управляет supervisor (sentinel в очереди)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # spawn: новый интерпретатор, логирование настраивается заново
+    initialize()
+    asyncio.run(_worker_loop(index, inbox, ready, dispatcher_factory, bot_factory, concurrency))
+
+
+async def _worker_loop(
+    index: int,
+    inbox: multiprocessing.Queue,
+    ready: multiprocessing.Queue,
+    dispatcher_factory: DispatcherFactory,
+    bot_factory: BotFactory,
+    concurrency: int
+):
+    """Цикл worker'а: чтение очереди и обработка updates в своём Dispatcher."""
+    bot = bot_factory()
+    dp = dispatcher_factory()
+    dp["worker_id"] = index
+
+    loop = asyncio.get_running_loop()
+    updates: asyncio.Queue = asyncio.Queue()
+
+    def reader():
+        """Блокирующее чтение multiprocessing.Queue в отдельном потоке."""
+        while True:
+            payload = inbox.get()
+            loop.call_soon_threadsafe(updates.put_nowait, payload)
+            if payload is None:
+                return
+
+    threading.Thread(target=reader, name=f"worker-{index}-reader", daemon=True).start()
+
+    await dp.emit_startup(bot=bot, worker_id=index)
+    ready.put(index)
+    logger.info(f"▶️ Worker {index} запущен")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    async def feed(payload: bytes):
+        try:
+            await dp.feed_raw_update(bot, json.loads(payload))
+        except Exception as e:
+            logger.error(f"❌ Worker {index}: ошибка обработки update: {e}", exc_info=True)
+        finally:
+            semaphore.release()
+
+    while (payload := await updates.get()) is not None:
+        await semaphore.acquire()
+        task = asyncio.create_task(feed(payload))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await dp.emit_shutdown(bot=bot, worker_id=index)
+    await bot.session.close()
+    logger.info(f"⏸️ Worker {index} остановлен")
+
+
+class WorkerPool:
+    """Пул worker-процессов с шардированием updates по user_id."""
+
+    def __init__(
+        self,
+        workers: int,
+        dispatcher_factory: DispatcherFactory,
+        bot_factory: BotFactory,
+        concurrency: int | None = None
+    ):
+        """
+        Инициализация пула.
+
+        Args:
+            workers: Количество worker-процессов
+            dispatcher_factory: Функция уровня модуля, создающая Dispatcher
+            bot_factory: Функция уровня модуля, создающая Bot
+            concurrency: Лимит одновременно обрабатываемых updates в worker'е
+        """
+        self.workers = workers
+        self.dispatcher_factory = dispatcher_factory
+        self.bot_factory = bot_factory
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.queues: List[multiprocessing.Queue] = []
+        self.processes: List[multiprocessing.Process] = []
+        self.dispatched = [0] * workers
+        self.restarts = 0
+        self._crashes: List[List[float]] = [[] for _ in range(workers)]  # Время падений worker'а
+        self._ready = MP_CONTEXT.Queue()
+
+    def _spawn(self, index: int) -> Tuple[multiprocessing.Queue, multiprocessing.Process]:
+        """Очередь и запущенный процесс worker'а index."""
+        inbox = MP_CONTEXT.Queue()
+        process = MP_CONTEXT.Process(
+            target=_worker_process,
+            args=(
+                index, inbox, self._ready,
+                self.dispatcher_factory, self.bot_factory, self.concurrency
+            ),
+            name=f"bot-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return inbox, process
+
+    def start(self):
+        """Запустить worker-процессы."""
+        for index in range(self.workers):
+            inbox, process = self._spawn(index)
+            self.queues.append(inbox)
+            self.processes.append(process)
+        logger.info(f"✅ Запущено {self.workers} worker-процессов")
+
+    async def watch(self, interval: float = WATCH_INTERVAL):
+        """
+        Следить за worker'ами: упавший worker (ошибка, OOM) перезапускается с новой
+        очередью. Updates из старой очереди и FSM-состояния его пользователей теряются.
+
+        Raises:
+            RuntimeError: worker падает больше MAX_RESTARTS раз за RESTART_WINDOW секунд
+        """
+        while True:
+            await asyncio.sleep(interval)
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                now = time.monotonic()
+                crashes = [t for t in self._crashes[index] if now - t < RESTART_WINDOW] + [now]
+                self._crashes[index] = crashes
+                if len(crashes) > MAX_RESTARTS:
+                    raise RuntimeError(
+                        f"{process.name}: падений {len(crashes)} за {RESTART_WINDOW:.0f} с "
+                        f"(код выхода {process.exitcode}), supervisor остановлен"
+                    )
+                logger.error(f"❌ {process.name} завершился (код выхода {process.exitcode}), перезапуск")
+                # Старую очередь никто не читает: не ждать её фонового потока при выходе
+                old = self.queues[index]
+                old.cancel_join_thread()
+                old.close()
+                self.queues[index], self.processes[index] = self._spawn(index)
+                self.restarts += 1
+
+    async def wait_ready(self, timeout: float = 60):
+        """Дождаться готовности всех worker'ов."""
+        loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            await loop.run_in_executor(None, self._ready.get, True, timeout)
+
+    def dispatch(self, update: Dict[str, Any], payload: bytes | None = None):
+        """
+        Передать update worker'у его пользователя.
+
+        Args:
+            update: Update в виде словаря
+            payload: Исходный JSON (если уже есть, чтобы не сериализовать повторно)
+        """
+        index = shard_for(extract_user_id(update), self.workers)
+        self.dispatched[index] += 1
+        self.queues[index].put(payload if payload is not None else json.dumps(update).encode())
+
+    def stop(self, timeout: float = 30):
+        """Остановить worker'ов: sentinel в очередь, затем join/terminate."""
+        for inbox in self.queues:
+            inbox.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"⚠️ {process.name} не остановился, terminate")
+                process.terminate()
+        logger.info(f"⏸️ Worker-процессы остановлены (распределение: {self.dispatched})")
+
+
+def create_sharding_webhook_app(pool: WorkerPool, secret_token: str) -> web.Application:
+    """
+    Front webhook: проверка секрета, определение шарда, передача в очередь.
+
+    Args:
+        pool: Пул worker'ов
+        secret_token: Ожидаемый X-Telegram-Bot-Api-Secret-Token
+
+    Returns:
+        Приложение aiohttp
+    """
+    async def handle(request: web.Request) -> web.Response:
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secrets.compare_digest(token, secret_token):
+            return web.Response(status=401)
+        payload = await request.read()
+        pool.dispatch(json.loads(payload), payload)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_route("POST", settings.webhook_path, handle)
+    return app
+
+
+async def run_sharded_webhook(pool: WorkerPool, bot: Bot, allowed_updates: List[str] | None = None):
+    """Front в webhook-режиме (до отмены задачи)."""
+    secret_token = settings.webhook_secret or secrets.token_urlsafe(32)
+    runner = web.AppRunner(create_sharding_webhook_app(pool, secret_token))
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+
+    try:
+        await bot.set_webhook(
+            url=settings.webhook_url,
+            secret_token=secret_token,
+            max_connections=settings.webhook_max_connections,
+            allowed_updates=allowed_updates
+        )
+        logger.info(f"✅ Webhook зарегистрирован: {settings.webhook_url} ({pool.workers} worker'ов)")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_sharded_polling(pool: WorkerPool, bot: Bot, allowed_updates: List[str] | None = None):
+    """Front в режиме long polling (до отмены задачи)."""
+    await bot.delete_webhook()
+    offset = None
+    logger.info(f"✅ Polling запущен ({pool.workers} worker'ов)")
+
+    while True:
+        try:
+            updates: List[Update] = await bot.get_updates(
+                offset=offset,
+                timeout=10,
+                allowed_updates=allowed_updates
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка getUpdates: {e}")
+            await asyncio.sleep(1)
+            continue
+
+        for update in updates:
+            pool.dispatch(update.model_dump(mode="json", by_alias=True, exclude_unset=True))
+            offset = update.update_id + 1
+
+
+async def run_supervisor(
+    bot: Bot,
+    dispatcher_factory: DispatcherFactory,
+    bot_factory: BotFactory,
+    allowed_updates: List[str] | None = None
+):
+    """
+    Supervisor: запуск пула worker'ов и front-приёма updates.
+
+    Args:
+        bot: Bot front-процесса (getUpdates / setWebhook)
+        dispatcher_factory: Функция уровня модуля, создающая Dispatcher в worker'е
+        bot_factory: Функция уровня модуля, создающая Bot в worker'е
+        allowed_updates: Типы updates для Telegram
+    """
+    pool = WorkerPool(settings.workers, dispatcher_factory, bot_factory)
+    pool.start()
+    try:
+        await pool.wait_ready()
+        if settings.run_mode == "webhook":
+            front = run_sharded_webhook(pool, bot, allowed_updates)
+        else:
+            front = run_sharded_polling(pool, bot, allowed_updates)
+        # Front работает до отмены, наблюдение за worker'ами завершается только ошибкой
+        tasks = [
+            asyncio.create_task(front, name="sharding-front"),
+            asyncio.create_task(pool.watch(), name="sharding-watch")
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()
+    finally:
+        pool.stop()
@@ -2,14 +2,21 @@
 Управление статистикой тестов с SQLite.
 Сохранение результатов, отслеживание активности, напоминания.
 """
-import aiosqlite
 import logging
+import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional
 from pathlib import Path
 
 from config.settings import settings
 from .models import CurrentTestState
+from .item_analytics import SCHEMA as ITEM_SCHEMA, ItemAnalytics, record_attempt
+from .exposure import SCHEMA as EXPOSURE_SCHEMA, ExposureStore
+from .review import SCHEMA as REVIEW_SCHEMA, ReviewStore, record_mistakes
+from .leaderboard import SCHEMA as LEADERBOARD_SCHEMA, LeaderboardStore
+
+if TYPE_CHECKING:
+    import aiosqlite
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +25,25 @@ class StatsManager:
     """Менеджер статистики пользователей."""
     
     DB_PATH = settings.data_dir / "stats.db"
+    # Ожидание блокировки при записи из нескольких процессов (секунды)
+    BUSY_TIMEOUT = 10.0
     
     def __init__(self):
         self.db_path = self.DB_PATH
     
+    def connect(self) -> "aiosqlite.Connection":
+        """Соединение с БД (безопасно для нескольких worker-процессов)."""
+        # aiosqlite (и поток соединения) нужны только при первом обращении к БД
+        import aiosqlite
+        return aiosqlite.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
+    
     async def init_db(self):
         """Инициализация базы данных."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.connect() as db:
+            # WAL: чтение не блокирует запись, запись из нескольких процессов
+            # сериализуется через busy_timeout (режим сохраняется в файле БД)
+            await db.execute("PRAGMA journal_mode=WAL")
+            
             # Таблица результатов тестов
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS test_results (
@@ -54,13 +73,32 @@ class StatsManager:
                 )
             """)
             
+            # Ответы по вопросам и счётчики вопросов (item_analytics)
+            for statement in ITEM_SCHEMA:
+                await db.execute(statement)
+            
+            # Показанные вопросы пользователей (exposure)
+            for statement in EXPOSURE_SCHEMA:
+                await db.execute(statement)
+            
+            # Карточки повторения ошибок (review)
+            for statement in REVIEW_SCHEMA:
+                await db.execute(statement)
+            
+            # Снимки рейтингов (leaderboard)
+            for statement in LEADERBOARD_SCHEMA:
+                await db.execute(statement)
+            
             await db.commit()
             logger.info("✅ База данных инициализирована")
     
     async def save_result(self, user_id: int, test_state: CurrentTestState):
-        """Сохраняет результат теста."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
+        """
+        Сохраняет результат теста, ответы по вопросам, счётчики вопросов и карточки ошибок;
+        после записи обновляет рейтинги в памяти.
+        """
+        async with self.connect() as db:
+            cursor = await db.execute("""
                 INSERT INTO test_results (
                     user_id, full_name, position, department,
                     specialization, difficulty, grade,
@@ -79,6 +117,8 @@ class StatsManager:
                 test_state.percentage,
                 test_state.elapsed_time
             ))
+            await record_attempt(db, cursor.lastrowid, test_state)
+            await record_mistakes(db, user_id, test_state)
             
             # Обновляем активность
             await db.execute("""
@@ -93,11 +133,13 @@ class StatsManager:
             
             await db.commit()
             logger.info(f"✅ Результат сохранён для пользователя {user_id}")
+        
+        leaderboard_store.record(user_id, test_state)
     
     async def get_user_stats(self, user_id: int) -> Dict:
         """Возвращает статистику пользователя."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.connect() as db:
+            db.row_factory = sqlite3.Row
             
             # Общая статистика
             cursor = await db.execute("""
@@ -140,7 +182,7 @@ class StatsManager:
     
     async def update_activity(self, user_id: int):
         """Обновляет время последней активности."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.connect() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_activity (user_id, last_activity, test_count, reminder_sent)
                 VALUES (
@@ -164,7 +206,7 @@ class StatsManager:
         """
         threshold = (datetime.now() - timedelta(days=days)).isoformat()
         
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.connect() as db:
             cursor = await db.execute("""
                 SELECT user_id
                 FROM user_activity
@@ -177,7 +219,7 @@ class StatsManager:
     
     async def mark_reminder_sent(self, user_id: int):
         """Отмечает, что напоминание отправлено."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.connect() as db:
             await db.execute("""
                 UPDATE user_activity
                 SET reminder_sent = 1
@@ -186,5 +228,9 @@ class StatsManager:
             await db.commit()
 
 
-# Глобальный экземпляр
+# Глобальные экземпляры
 stats_manager = StatsManager()
+item_analytics = ItemAnalytics(stats_manager.connect)
+exposure_store = ExposureStore(stats_manager.connect, settings.exposure_cache_size)
+review_store = ReviewStore(stats_manager.connect)
+leaderboard_store = LeaderboardStore(stats_manager.connect)
@@ -15,6 +15,9 @@ logger = logging.getLogger(__name__)
 class TestTimer:
     """Асинхронный таймер для теста."""
     
+    # Запущенные таймеры процесса (для метрик)
+    active: set["TestTimer"] = set()
+    
     def __init__(self, duration_minutes: int, timeout_callback: Callable[[], Awaitable[None]]):
         """
         Инициализация таймера.
@@ -39,6 +42,8 @@ class TestTimer:
         except asyncio.CancelledError:
             logger.debug("⏰ Таймер отменён")
             raise
+        finally:
+            TestTimer.active.discard(self)
     
     async def start(self):
         """Запустить таймер."""
@@ -48,6 +53,7 @@ class TestTimer:
         
         self.start_time = time.time()
         self.task = asyncio.create_task(self._run())
+        TestTimer.active.add(self)
         logger.info(f"▶️ Таймер запущен на {self.duration_seconds // 60} мин")
     
     def stop(self):
@@ -55,6 +61,7 @@ class TestTimer:
         if self.task and not self.task.done():
             self._cancelled = True
             self.task.cancel()
+            TestTimer.active.discard(self)
             logger.info("⏸️ Таймер остановлен")
     
     def remaining_time(self) -> str:
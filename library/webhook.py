@@ -0,0 +1,115 @@
+"""
+Webhook-режим: aiohttp-сервер с SimpleRequestHandler вместо long polling.
+Проверка секретного токена и ограничение числа одновременно обрабатываемых updates.
+"""
+import asyncio
+import logging
+import secrets
+from typing import Any, Dict
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_SECRET_KEY = web.AppKey("webhook_secret", str)
+
+
+class ConcurrencyLimitedRequestHandler(SimpleRequestHandler):
+    """
+    SimpleRequestHandler с ограничением параллельной обработки.
+    Telegram получает ответ сразу, а обработка updates идёт в фоне
+    не более чем в `concurrency` задачах одновременно.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int, **kwargs: Any):
+        """
+        Инициализация обработчика.
+
+        Args:
+            dispatcher: Диспетчер aiogram
+            bot: Экземпляр бота
+            concurrency: Максимум одновременно обрабатываемых updates
+            **kwargs: Параметры SimpleRequestHandler (secret_token и т.д.)
+        """
+        super().__init__(dispatcher=dispatcher, bot=bot, **kwargs)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        """Обработка update с учётом лимита параллельности."""
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+
+def create_webhook_app(
+    dp: Dispatcher,
+    bot: Bot,
+    secret_token: str | None = None,
+    concurrency: int | None = None
+) -> web.Application:
+    """
+    Создать aiohttp-приложение webhook.
+
+    Args:
+        dp: Диспетчер с роутерами и middlewares
+        bot: Экземпляр бота
+        secret_token: Секрет для X-Telegram-Bot-Api-Secret-Token
+            (по умолчанию из настроек или случайный)
+        concurrency: Лимит параллельной обработки (по умолчанию из настроек)
+
+    Returns:
+        Настроенное приложение aiohttp
+    """
+    secret_token = secret_token or settings.webhook_secret or secrets.token_urlsafe(32)
+
+    app = web.Application()
+    app[WEBHOOK_SECRET_KEY] = secret_token
+
+    handler = ConcurrencyLimitedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        concurrency=concurrency or settings.webhook_concurrency,
+        secret_token=secret_token
+    )
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """
+    Запустить webhook-сервер и зарегистрировать webhook в Telegram.
+    Работает до отмены задачи (Ctrl+C / остановка процесса).
+
+    Args:
+        dp: Диспетчер с роутерами и middlewares
+        bot: Экземпляр бота
+    """
+    app = create_webhook_app(dp, bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+    logger.info(
+        f"🌐 Webhook-сервер слушает {settings.webhook_host}:{settings.webhook_port}"
+        f"{settings.webhook_path} (параллельность {settings.webhook_concurrency})"
+    )
+
+    try:
+        await bot.set_webhook(
+            url=settings.webhook_url,
+            secret_token=app[WEBHOOK_SECRET_KEY],
+            max_connections=settings.webhook_max_connections,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info(f"✅ Webhook зарегистрирован: {settings.webhook_url}")
+
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,8 +1,11 @@
 """
 Пакет с роутерами специализаций (11 модулей).
-Каждый файл — отдельная специализация с полным FSM тестом.
+Каждый файл — отдельная специализация с FSM анкеты.
+Общие callback-хэндлеры теста регистрируются в callback_dispatcher из common.py.
 """
 
+from . import common  # noqa: F401 - регистрация общих callback-маршрутов
+
 from .oupds import oupds_router
 from .ispolniteli import ispolniteli_router
 from .aliment import aliment_router
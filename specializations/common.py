@@ -0,0 +1,340 @@
+"""
+specializations/common.py: Общие callback-хэндлеры для всех специализаций.
+Регистрируются в таблице callback_dispatcher (маршрут по callback_data за O(1)):
+difficulty → test → results → ответы / сертификат / статистика / меню.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.fsm.context import FSMContext
+
+from config.settings import settings
+from library import (
+    TestStates,
+    CurrentTestState,
+    Difficulty,
+    load_questions_for_specialization,
+    get_bank,
+    start_adaptive_session,
+    start_training_session,
+    get_question_weights,
+    create_timer,
+    show_question,
+    handle_answer_toggle,
+    handle_next_question,
+    finish_test,
+    get_main_keyboard,
+    generate_certificate,
+    stats_manager,
+    exposure_store,
+    review_store,
+    callback_dispatcher,
+    SpecCallback,
+    DifficultyCallback,
+    AnswerCallback,
+    MenuCallback,
+    MenuAction
+)
+
+logger = logging.getLogger(__name__)
+
+
+@callback_dispatcher.route(DifficultyCallback, state=TestStates.waiting_difficulty)
+async def select_difficulty(
+    callback: CallbackQuery,
+    state: FSMContext,
+    callback_data: DifficultyCallback
+):
+    """Сложность → загрузка вопросов → старт теста."""
+    difficulty = callback_data.level
+    
+    # Получаем данные пользователя
+    user_data = await state.get_data()
+    specialization = user_data.get("specialization", "")
+    
+    # Загружаем вопросы (версия банка закрепляется за тестом до его окончания)
+    bank = get_bank(specialization)
+    adaptive = training = None
+    if difficulty == Difficulty.TRAINING and bank is not None:
+        # Тренировка: вопросы, на которые пользователь ошибался и срок повторения наступил
+        training = await start_training_session(callback.from_user.id, bank)
+        if training is None:
+            next_due = await review_store.next_due(callback.from_user.id, specialization)
+            await callback.answer(
+                "🔁 Вопросов с ошибками пока нет: они появятся после тестов" if next_due is None
+                else f"🔁 Сейчас повторять нечего. Следующее повторение: "
+                     f"{datetime.fromtimestamp(next_due):%d.%m.%Y %H:%M}",
+                show_alert=True
+            )
+            return
+    if difficulty == Difficulty.ADAPTIVE:
+        # Адаптивный тест: первый вопрос сейчас, остальные — по ходу ответов
+        adaptive = await start_adaptive_session(bank) if bank is not None else None
+        if adaptive is None:
+            # Обычный тест сохраняется как базовый: сырой процент не смешивается
+            # с оценками CAT в test_results, item_stats и рейтингах
+            difficulty = Difficulty.BASIC
+            logger.warning(
+                f"⚠️ {specialization}: банк не откалиброван для адаптивного режима "
+                f"(python calibrate_items.py), выдаётся базовый тест"
+            )
+    if training is not None:
+        questions = list(training.questions)
+    elif adaptive is not None:
+        questions = [adaptive.next_question()]
+    else:
+        # Сначала вопросы, которых пользователь ещё не видел (повтор теста — новые вопросы)
+        seen = None
+        if settings.exposure_enabled and bank is not None:
+            seen = await exposure_store.get(callback.from_user.id, specialization, len(bank))
+        weights = await get_question_weights(bank) if bank is not None else None
+        questions = load_questions_for_specialization(
+            specialization, difficulty, bank=bank, seen=seen, weights=weights
+        )
+        if seen is not None:
+            exposure_store.touch(seen)
+    
+    if not questions:
+        await callback.message.edit_text(
+            "❌ Не удалось загрузить вопросы. Попробуйте позже."
+        )
+        await state.clear()
+        return
+    
+    # Создаем состояние теста
+    test_state = CurrentTestState(
+        questions=questions,
+        specialization=specialization,
+        difficulty=difficulty,
+        bank=bank,
+        adaptive=adaptive,
+        training=training,
+        full_name=user_data.get("full_name", ""),
+        position=user_data.get("position", ""),
+        department=user_data.get("department", "")
+    )
+    
+    # Создаем и запускаем таймер
+    async def on_timeout():
+        """Callback при истечении времени."""
+        await finish_test(callback, state)
+    
+    timer = create_timer(difficulty, on_timeout)
+    await timer.start()
+    test_state.timer_task = timer
+    
+    # Обновляем активность пользователя
+    await stats_manager.update_activity(callback.from_user.id)
+    
+    # Сохраняем состояние и переходим к тесту
+    await state.update_data(test_state=test_state)
+    await state.set_state(TestStates.answering_question)
+    
+    # Показываем первый вопрос
+    await show_question(callback, test_state, question_index=0)
+    await callback.answer()
+    
+    logger.info(
+        f"▶️ Пользователь {callback.from_user.id} начал тест "
+        f"{specialization} ({difficulty.value})"
+    )
+
+
+@callback_dispatcher.route(AnswerCallback, state=TestStates.answering_question)
+async def answer_toggle(callback: CallbackQuery, state: FSMContext, callback_data: AnswerCallback):
+    """Toggle выбора ответа во время теста."""
+    await handle_answer_toggle(callback, state, callback_data.num)
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.NEXT), state=TestStates.answering_question)
+async def next_question(callback: CallbackQuery, state: FSMContext):
+    """Кнопка 'Далее' → следующий вопрос."""
+    await handle_next_question(callback, state)
+
+
+# === FINISH CALLBACKS ===
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.SHOW_ANSWERS))
+async def show_correct_answers(callback: CallbackQuery, state: FSMContext):
+    """Показать правильные ответы (автоудаление через 60 сек)."""
+    data = await state.get_data()
+    test_state: CurrentTestState = data.get("test_state")
+    
+    if not test_state:
+        await callback.answer("❌ Данные теста не найдены")
+        return
+    
+    # Формируем текст с правильными ответами
+    answers_text = "📋 <b>Правильные ответы:</b>\n\n"
+    
+    for i, question in enumerate(test_state.questions, 1):
+        user_answer = test_state.answers_history.get(i - 1, set())
+        correct = question.correct_answers
+        is_correct = user_answer == correct
+        
+        emoji = "✅" if is_correct else "❌"
+        correct_nums = ", ".join(str(n) for n in sorted(correct))
+        
+        answers_text += f"{emoji} <b>Вопрос {i}:</b> {correct_nums}\n"
+    
+    answers_text += "\n⏱ <i>Это сообщение будет удалено через 60 секунд</i>"
+    
+    # Отправляем сообщение
+    msg = await callback.message.answer(answers_text)
+    await callback.answer()
+    
+    # Автоудаление через 60 секунд
+    async def delete_after_timeout():
+        await asyncio.sleep(60)
+        try:
+            await msg.delete()
+            logger.info(f"🗑 Удалены правильные ответы для {callback.from_user.id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось удалить сообщение: {e}")
+    
+    asyncio.create_task(delete_after_timeout())
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.GENERATE_CERT))
+async def generate_cert_handler(callback: CallbackQuery, state: FSMContext):
+    """Генерация и отправка PDF сертификата."""
+    data = await state.get_data()
+    test_state: CurrentTestState = data.get("test_state")
+    
+    if not test_state:
+        await callback.answer("❌ Данные теста не найдены")
+        return
+    
+    await callback.answer("📄 Генерация сертификата...")
+    
+    try:
+        # Генерируем PDF
+        pdf_path = await generate_certificate(test_state, callback.from_user.id)
+        
+        if not pdf_path:
+            await callback.message.answer("❌ Не удалось сгенерировать сертификат")
+            return
+        
+        # Отправляем PDF
+        pdf_file = FSInputFile(
+            pdf_path,
+            filename=f"certificate_{test_state.specialization}.pdf"
+        )
+        
+        await callback.message.answer_document(
+            pdf_file,
+            caption=(
+                f"🏆 <b>Ваш сертификат готов!</b>\n\n"
+                f"Специализация: {test_state.specialization.upper()}\n"
+                f"Оценка: {test_state.grade.upper()}\n"
+                f"Результат: {test_state.percentage:.1f}%"
+            )
+        )
+        
+        logger.info(f"📄 Сертификат отправлен пользователю {callback.from_user.id}")
+    
+    except Exception as e:
+        logger.error(f"❌ Ошибка генерации сертификата: {e}", exc_info=True)
+        await callback.message.answer("❌ Произошла ошибка при генерации сертификата")
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.REPEAT_TEST))
+async def repeat_test(callback: CallbackQuery, state: FSMContext):
+    """Повторить тест - возврат к выбору специализации пройденного теста."""
+    data = await state.get_data()
+    test_state: CurrentTestState | None = data.get("test_state")
+    specialization = test_state.specialization if test_state else data.get("specialization")
+    
+    await state.clear()
+    
+    if not specialization:
+        await back_to_main(callback, state)
+        return
+    
+    await callback_dispatcher.feed(SpecCallback(spec=specialization), callback, state=state)
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.MY_STATS))
+async def show_stats_handler(callback: CallbackQuery):
+    """Показать статистику пользователя."""
+    try:
+        stats = await stats_manager.get_user_stats(callback.from_user.id)
+        
+        if "error" in stats:
+            await callback.answer("❌ Ошибка загрузки статистики")
+            return
+        
+        if stats.get("total_tests", 0) == 0:
+            await callback.message.answer(
+                "📊 <b>Ваша статистика</b>\n\n"
+                "У вас пока нет пройденных тестов.\n"
+                "Начните тестирование прямо сейчас!"
+            )
+            await callback.answer()
+            return
+        
+        stats_text = (
+            f"📊 <b>Ваша статистика</b>\n\n"
+            f"📝 Всего тестов: {stats['total_tests']}\n"
+            f"📈 Средний балл: {stats['avg_percentage']}%\n"
+            f"🏆 Лучший результат: {stats['best_percentage']}%\n\n"
+            f"<b>Оценки:</b>\n"
+            f"🥇 Отлично: {stats['excellent']}\n"
+            f"🥈 Хорошо: {stats['good']}\n"
+            f"🥉 Удовлетворительно: {stats['satisfactory']}\n"
+            f"❌ Неудовлетворительно: {stats['fail']}"
+        )
+        
+        # Последние результаты
+        recent = await stats_manager.get_recent_results(callback.from_user.id, 3)
+        if recent:
+            stats_text += "\n\n<b>Последние 3 теста:</b>\n"
+            for r in recent:
+                stats_text += (
+                    f"• {r['specialization']} ({r['difficulty']}): "
+                    f"{r['grade']} - {r['percentage']:.1f}%\n"
+                )
+        
+        await callback.message.answer(stats_text)
+        await callback.answer()
+    
+    except Exception as e:
+        logger.error(f"❌ Ошибка показа статистики: {e}", exc_info=True)
+        await callback.answer("❌ Ошибка загрузки статистики")
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.MAIN_MENU))
+async def back_to_main(callback: CallbackQuery, state: FSMContext):
+    """Вернуться в главное меню."""
+    await state.clear()
+    await callback.message.edit_text(
+        "🧪 <b>ФССП Тест-бот</b>\n\nВыберите специализацию:",
+        reply_markup=get_main_keyboard()
+    )
+    await callback.answer()
+
+
+@callback_dispatcher.route(MenuCallback(action=MenuAction.HELP))
+async def show_help(callback: CallbackQuery):
+    """Показать помощь."""
+    help_text = (
+        "❓ <b>Помощь по боту</b>\n\n"
+        "<b>Как пройти тест:</b>\n"
+        "1️⃣ Выберите специализацию\n"
+        "2️⃣ Введите свои данные (ФИО, должность, подразделение)\n"
+        "3️⃣ Выберите уровень сложности\n"
+        "4️⃣ Отвечайте на вопросы, нажимая на цифры 1️⃣2️⃣3️⃣...\n"
+        "5️⃣ Нажмите ➡️ Далее для перехода к следующему вопросу\n"
+        "6️⃣ Получите результат и PDF сертификат\n\n"
+        "<b>Обозначения:</b>\n"
+        "• 1️⃣2️⃣3️⃣ - варианты ответов\n"
+        "• ✅ - выбранный вариант\n"
+        "• ⏰ - оставшееся время\n\n"
+        "<b>Команды:</b>\n"
+        "/start - начать тест заново\n"
+        "/top - рейтинг сотрудников и подразделений\n\n"
+        "Удачи! 🍀"
+    )
+    await callback.message.edit_text(help_text, reply_markup=get_main_keyboard())
+    await callback.answer()
@@ -11,13 +11,32 @@ from pathlib import Path
 
 from aiogram import Bot, Dispatcher, Router, F
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 
-from config.settings import settings
-from library import AntiSpamMiddleware, ErrorHandlerMiddleware
+from config.settings import settings, initialize
+from library import (
+    AntiSpamMiddleware,
+    ErrorHandlerMiddleware,
+    CallbackDispatchMiddleware,
+    UpdateSchedulerMiddleware,
+    MetricsMiddleware,
+    ApiMetricsMiddleware,
+    setup_metrics,
+    setup_loop_monitor,
+    setup_question_banks,
+    setup_bank_watcher,
+    setup_bank_audit,
+    setup_exposure,
+    setup_leaderboard,
+    leaderboard_text,
+    callback_dispatcher,
+    stats_manager
+)
 from library.keyboards import get_main_keyboard
 
 # Импорт всех роутеров специализаций
@@ -27,12 +46,7 @@ from specializations import (
     kadry_router, bezopasnost_router, upravlenie_router
 )
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# Логирование настраивается в config.settings.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Глобальные переменные
@@ -42,6 +56,7 @@ dp: Dispatcher | None = None
 
 async def on_startup():
     """Инициализация при запуске бота."""
+    await stats_manager.init_db()
     logger.info("🚀 Бот инициализирован и готов к работе")
 
 
@@ -49,6 +64,11 @@ async def on_shutdown():
     """Корректное завершение работы бота."""
     logger.info("🛑 Завершение работы бота")
     
+    # Итоговые метрики планировщика updates
+    scheduler = dp.get("update_scheduler")
+    if scheduler:
+        logger.info(f"📊 Планировщик updates: {scheduler.snapshot()}")
+    
     # Остановка сервиса напоминаний
     reminder_service = dp.get("reminder_service")
     if reminder_service:
@@ -69,74 +89,159 @@ async def on_shutdown():
     logger.info("👋 Бот остановлен корректно")
 
 
-async def main():
-    """Главная функция запуска бота."""
-    global bot, dp
+# Главный роутер с командами /start и /top
+main_router = Router(name="main")
+
+
+@main_router.message(Command("start"))
+async def cmd_start(message: Message):
+    """Команда /start - главное меню."""
+    await message.answer(
+        "🧪 <b>ФССП Тест-бот</b>\n\n"
+        "Выберите специализацию для прохождения теста:",
+        reply_markup=get_main_keyboard()
+    )
+
+
+@main_router.message(Command("top"))
+async def cmd_top(message: Message, command: CommandObject):
+    """Команда /top [специализация] [уровень] [месяц|всё] - рейтинг сотрудников и подразделений."""
+    await message.answer(leaderboard_text(message.from_user.id, command.args or ""))
+
+
+def create_bot() -> Bot:
+    """
+    Создать экземпляр бота (с поддержкой собственного Bot API сервера).
     
-    # Проверка API токена
-    if not settings.api_token:
-        logger.error("❌ API_TOKEN отсутствует! Установите переменную окружения API_TOKEN")
-        sys.exit(1)
+    Returns:
+        Настроенный Bot
+    """
+    session = None
+    if settings.telegram_api_base:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_base))
     
-    # Инициализация бота и диспетчера
     bot = Bot(
         token=settings.api_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(storage=MemoryStorage())
+    if settings.metrics_enabled:
+        bot.session.middleware(ApiMetricsMiddleware())
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """
+    Создать диспетчер с middlewares и всеми роутерами.
+    Хуки startup/shutdown регистрируются в main().
     
-    # Регистрация событий
-    dp.startup.register(on_startup)
-    dp.shutdown.register(on_shutdown)
+    Returns:
+        Настроенный Dispatcher
+    """
+    dispatcher = Dispatcher(storage=MemoryStorage())
     
     # Подключение middlewares
-    dp.message.middleware(AntiSpamMiddleware())
-    dp.callback_query.middleware(AntiSpamMiddleware())
-    dp.message.middleware(ErrorHandlerMiddleware())
-    dp.callback_query.middleware(ErrorHandlerMiddleware())
+    scheduler = UpdateSchedulerMiddleware(
+        max_concurrent=settings.max_concurrent_updates,
+        max_pending=settings.max_pending_updates,
+        max_chat_queue=settings.max_chat_queue
+    )
+    dispatcher.update.outer_middleware(scheduler)
+    dispatcher["update_scheduler"] = scheduler
+    dispatcher.callback_query.outer_middleware(CallbackDispatchMiddleware(callback_dispatcher))
+    if settings.metrics_enabled:
+        # Первым среди inner: время хэндлера вместе с AntiSpam/ErrorHandler
+        dispatcher.message.middleware(MetricsMiddleware())
+        dispatcher.callback_query.middleware(MetricsMiddleware())
+    antispam = AntiSpamMiddleware()
+    dispatcher["antispam"] = antispam
+    dispatcher.message.middleware(antispam)
+    dispatcher.callback_query.middleware(antispam)
+    dispatcher.message.middleware(ErrorHandlerMiddleware())
+    dispatcher.callback_query.middleware(ErrorHandlerMiddleware())
+    setup_metrics(dispatcher)
+    setup_loop_monitor(dispatcher)
+    setup_question_banks(dispatcher)
+    setup_bank_watcher(dispatcher)
+    setup_bank_audit(dispatcher)
+    setup_exposure(dispatcher)
+    setup_leaderboard(dispatcher)
     logger.info("✅ Middlewares подключены")
     
-    # Главный роутер с командой /start
-    main_router = Router()
+    # Подключение роутеров
+    dispatcher.include_router(main_router)
+    dispatcher.include_router(callback_dispatcher.router)
+    dispatcher.include_router(oupds_router)
+    dispatcher.include_router(ispolniteli_router)
+    dispatcher.include_router(aliment_router)
+    dispatcher.include_router(doznanie_router)
+    dispatcher.include_router(rozyisk_router)
+    dispatcher.include_router(prof_router)
+    dispatcher.include_router(oko_router)
+    dispatcher.include_router(informatika_router)
+    dispatcher.include_router(kadry_router)
+    dispatcher.include_router(bezopasnost_router)
+    dispatcher.include_router(upravlenie_router)
     
-    @main_router.message(Command("start"))
-    async def cmd_start(message: Message):
-        """Команда /start - главное меню."""
-        await message.answer(
-            "🧪 <b>ФССП Тест-бот</b>\n\n"
-            "Выберите специализацию для прохождения теста:",
-            reply_markup=get_main_keyboard()
-        )
+    logger.info(
+        f"✅ Загружено 11 роутеров специализаций, "
+        f"{len(callback_dispatcher.routes)} callback-маршрутов"
+    )
+    return dispatcher
+
+
+async def main():
+    """Главная функция запуска бота."""
+    global bot, dp
     
-    # Подключение роутеров
-    dp.include_router(main_router)
-    dp.include_router(oupds_router)
-    dp.include_router(ispolniteli_router)
-    dp.include_router(aliment_router)
-    dp.include_router(doznanie_router)
-    dp.include_router(rozyisk_router)
-    dp.include_router(prof_router)
-    dp.include_router(oko_router)
-    dp.include_router(informatika_router)
-    dp.include_router(kadry_router)
-    dp.include_router(bezopasnost_router)
-    dp.include_router(upravlenie_router)
+    # Проверка API токена
+    if not settings.api_token:
+        logger.error("❌ API_TOKEN отсутствует! Установите переменную окружения API_TOKEN")
+        sys.exit(1)
+    
+    # Инициализация бота
+    bot = create_bot()
+    
+    # Многопроцессный режим: диспетчеры создаются в worker-процессах
+    if settings.workers > 1:
+        from library.sharding import run_supervisor
+        
+        logger.info(f"🚀 Запуск supervisor ({settings.workers} worker'ов, {settings.run_mode})...")
+        await stats_manager.init_db()
+        try:
+            await run_supervisor(bot, create_dispatcher, create_bot)
+        finally:
+            await bot.session.close()
+        return
+    
+    # Инициализация диспетчера
+    dp = create_dispatcher()
     
-    logger.info("✅ Загружено 11 роутеров специализаций")
-    logger.info("🚀 Запуск polling...")
+    # Регистрация событий
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
     
     # Запуск бота
     try:
-        await dp.start_polling(bot)
+        if settings.run_mode == "webhook":
+            from library.webhook import run_webhook
+            
+            logger.info("🚀 Запуск webhook...")
+            await run_webhook(dp, bot)
+        else:
+            logger.info("🚀 Запуск polling...")
+            await dp.start_polling(bot)
     except KeyboardInterrupt:
         logger.info("⚠️ Получен сигнал остановки (Ctrl+C)")
     except Exception as e:
         logger.error(f"❌ Ошибка при работе бота: {e}", exc_info=True)
+        raise
     finally:
         await on_shutdown()
 
 
 if __name__ == "__main__":
+    initialize()
     try:
         asyncio.run(main())
     except KeyboardInterrupt: